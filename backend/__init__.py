@@ -1,8 +1,31 @@
-from backend.config import Config
-from backend.database.vector_store import VectorStore
-from backend.services.chat_service import ChatService
-from backend.services.report_service import ReportService
-from backend.services.market_service import MarketService
-from backend.models.portfolio import Portfolio
-
-__version__ = "1.0.0" 
\ No newline at end of file
+import importlib
+
+__version__ = "1.0.0"
+
+# Public names are resolved on first access so that importing one service
+# (e.g. MarketService) does not pull in langchain, FAISS, matplotlib and
+# pdfkit for all the others.
+_LAZY_IMPORTS = {
+    "Config": "backend.config",
+    "VectorStore": "backend.database.vector_store",
+    "ChatService": "backend.services.chat_service",
+    "ReportService": "backend.services.report_service",
+    "MarketService": "backend.services.market_service",
+    "Portfolio": "backend.models.portfolio",
+    "ingest_book": "backend.models.ingestion",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name):
+    module_path = _LAZY_IMPORTS.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_path), name)
+    globals()[name] = value  # Cache so later lookups bypass __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
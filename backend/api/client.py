@@ -0,0 +1,145 @@
+"""Blocking client for the HTTP API, and service stand-ins that let the Streamlit app run as a thin client.
+
+    services = remote_services("http://api.internal:8000")
+    services['chat_service'].process_message(...)   # same calls as the local services
+
+Set API_BASE_URL and the app talks to the API instead of loading the book,
+the search index and the models itself.
+"""
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+from backend.config import Config
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"API error {status}: {message}")
+        self.status = status
+
+
+class ApiClient:
+    def __init__(self, base_url: str, timeout: float = Config.API_CLIENT_TIMEOUT_SECONDS,
+                 token: Optional[str] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.token = token or Config.API_TOKEN
+
+    def clients(self) -> Dict:
+        return self._request("GET", "/clients")
+
+    def client(self, client_id: str) -> Dict:
+        return self._request("GET", f"/clients/{urllib.parse.quote(client_id, safe='')}")
+
+    def chat(self, message: str, client_id: str, session_id: Optional[str] = None) -> Dict:
+        return self._request("POST", "/chat", {"message": message, "client_id": client_id, "session_id": session_id})
+
+    def reset_chat(self, session_id: str, client_id: Optional[str] = None):
+        query = f"?client_id={urllib.parse.quote(client_id, safe='')}" if client_id else ""
+        self._request("DELETE", f"/chat/{urllib.parse.quote(session_id, safe='')}{query}")
+
+    def search(self, query: str, client_id: Optional[str] = None, k: int = 3) -> List[Dict]:
+        return self._request("POST", "/search", {"query": query, "client_id": client_id, "k": k})["results"]
+
+    def report(self, client_id: str, format: str = "pdf") -> bytes:
+        return self._request("GET", f"/reports/{urllib.parse.quote(client_id, safe='')}?format={format}", raw=True)
+
+    def quote(self, symbol: str) -> Dict:
+        return self._request("GET", f"/market/{urllib.parse.quote(symbol, safe='')}")
+
+    def _request(self, method: str, path: str, payload: Optional[Dict] = None, raw: bool = False):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if data is not None else {}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read()
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise ApiError(e.code, message)
+        return body if raw else json.loads(body)
+
+
+class RemoteClientBook:
+    """Client directory and lookups served by the API (ClientBook's read interface)"""
+
+    def __init__(self, api: ApiClient, directory: List[Dict]):
+        self.api = api
+        self._directory = [(client["id"], client["name"]) for client in directory]
+        self._ids = {client_id for client_id, _ in self._directory}
+
+    def __len__(self) -> int:
+        return len(self._directory)
+
+    def __contains__(self, client_id: str) -> bool:
+        return client_id in self._ids
+
+    def client_directory(self) -> List[Tuple[str, str]]:
+        return list(self._directory)
+
+    def get(self, client_id: str) -> Optional[Dict]:
+        if client_id not in self._ids:
+            return None
+        return self.api.client(client_id)
+
+
+class RemoteChatService:
+    """ChatService.process_message over the API; sessions live in the API's store"""
+
+    def __init__(self, api: ApiClient):
+        self.api = api
+
+    async def process_message(self, message: str, session_id: Optional[str] = None,
+                              client_data: Optional[Dict] = None) -> str:
+        if not client_data:
+            return "Please select a client first."
+        try:
+            return self.api.chat(message, client_data['clientInfo']['id'], session_id)["reply"]
+        except (ApiError, OSError) as e:
+            print(f"Error processing message: {str(e)}")
+            return "I apologize, but I encountered an error processing your request. Please try again."
+
+
+class RemoteReportService:
+    def __init__(self, api: ApiClient):
+        self.api = api
+
+    def generate_report(self, client_data: Dict) -> bytes:
+        return self.api.report(client_data['clientInfo']['id'])
+
+    def render_html(self, client_data: Dict) -> str:
+        return self.api.report(client_data['clientInfo']['id'], format="html").decode("utf-8")
+
+
+class RemoteMarketService:
+    def __init__(self, api: ApiClient):
+        self.api = api
+
+    async def get_stock_data(self, symbol: str) -> Optional[Dict]:
+        try:
+            return self.api.quote(symbol)
+        except ApiError as e:
+            print(f"Market data unavailable for {symbol}: {str(e)}")
+            return None
+
+
+def remote_services(base_url: str) -> Dict:
+    """The same keys as build_services(), backed by the API at ``base_url``"""
+    api = ApiClient(base_url)
+    directory = api.clients()
+    return {
+        'client_book': RemoteClientBook(api, directory["clients"]),
+        'ingestion_errors': directory["ingestion_errors"],
+        'vector_store': None,  # Searches run on the API side
+        'chat_service': RemoteChatService(api),
+        'report_service': RemoteReportService(api),
+        'market_service': RemoteMarketService(api)
+    }
@@ -0,0 +1,303 @@
+"""Async HTTP API for chat, search, reports and market data.
+
+    python -m backend.api.server --port 8000 --workers 4
+
+Endpoints are stateless: every worker process loads the client book and maps
+the persisted search index, and chat history lives in the session store
+(Config.CHAT_SESSION_STORE). With CHAT_SESSION_STORE=sqlite any worker on the
+host can serve any request, so the API scales apart from the Streamlit UI.
+The SQLite store is for one host only (it must not sit on a network
+filesystem): behind a load balancer over several hosts, route each chat
+session_id to the same host.
+
+    GET    /health
+    GET    /clients                  client directory and ingestion errors
+    GET    /clients/{client_id}      one client's portfolio data
+    POST   /chat                     {"client_id", "message", "session_id"?}
+    DELETE /chat/{session_id}        clear history (?client_id= for one client)
+    POST   /search                   {"query", "client_id"?, "k"?}
+    GET    /reports/{client_id}      PDF report (?format=html for the HTML)
+    GET    /market/{symbol}          latest quote
+    GET    /metrics                  Prometheus text
+
+Every endpoint but /health serves client data, so with Config.API_TOKEN set
+requests must carry "Authorization: Bearer <API_TOKEN>"; the server refuses
+to listen beyond localhost without one.
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import multiprocessing
+import signal
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+from backend.config import Config
+from backend.services.bootstrap import build_services, resolve_data_path
+from backend.utils.metrics import metrics
+from backend.utils.resilience import UpstreamUnavailable, resilience
+
+SERVICES = web.AppKey("services", dict)
+DATA_PATH = web.AppKey("data_path", str)
+API_TOKEN = web.AppKey("api_token", str)
+
+# Reachable without the token, e.g. by load balancer health checks
+PUBLIC_PATHS = {"/health"}
+LOCAL_HOSTS = {"127.0.0.1", "localhost", "::1"}
+
+
+def _encode(value):
+    # Holdings tables expose their rows as plain records; numpy scalars their Python value
+    if hasattr(value, "to_records"):
+        return value.to_records()
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _json(data, status: int = 200) -> web.Response:
+    return web.json_response(data, status=status, dumps=lambda obj: json.dumps(obj, default=_encode))
+
+
+def _error(status: int, message: str) -> web.Response:
+    return _json({"error": message}, status=status)
+
+
+def _bad_request(message: str) -> web.HTTPBadRequest:
+    return web.HTTPBadRequest(text=json.dumps({"error": message}), content_type="application/json")
+
+
+def _not_found(message: str) -> web.HTTPNotFound:
+    return web.HTTPNotFound(text=json.dumps({"error": message}), content_type="application/json")
+
+
+@web.middleware
+async def error_middleware(request: web.Request, handler):
+    """JSON errors, plus per-route request counts and latency"""
+    route = request.match_info.route.resource.canonical if request.match_info.route.resource else "unmatched"
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    except UpstreamUnavailable as e:
+        status = 503
+        return _error(503, str(e))
+    except Exception as e:
+        print(f"API error on {request.method} {request.path}: {type(e).__name__}: {str(e)}")
+        return _error(500, "Internal error")
+    finally:
+        metrics.counter("api_requests_total", "HTTP API requests by route and status").inc(
+            method=request.method, route=route, status=status
+        )
+        metrics.histogram("api_request_seconds", "HTTP API latency by route").observe(
+            time.perf_counter() - started, method=request.method, route=route
+        )
+
+
+@web.middleware
+async def auth_middleware(request: web.Request, handler):
+    """Require the shared API token, when one is configured"""
+    token = request.app.get(API_TOKEN)
+    if token and request.path not in PUBLIC_PATHS:
+        scheme, _, supplied = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(supplied.strip().encode(), token.encode()):
+            raise web.HTTPUnauthorized(
+                text=json.dumps({"error": "Missing or invalid API token"}), content_type="application/json",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+    return await handler(request)
+
+
+async def _json_body(request: web.Request, required: List[str]) -> Dict:
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise _bad_request("Request body must be JSON")
+    if not isinstance(body, dict):
+        raise _bad_request("Request body must be a JSON object")
+    missing = [field for field in required if not body.get(field)]
+    if missing:
+        raise _bad_request(f"Missing field(s): {', '.join(missing)}")
+    return body
+
+
+def _client(request: web.Request, client_id: str) -> Dict:
+    client_data = request.app[SERVICES]['client_book'].get(client_id)
+    if client_data is None:
+        raise _not_found(f"Unknown client: {client_id}")
+    return client_data
+
+
+async def _in_executor(fn, *args):
+    """Run blocking work (embedding, FAISS, charts, PDF) off the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+async def health(request: web.Request) -> web.Response:
+    services = request.app[SERVICES]
+    return _json({
+        "status": "ok",
+        "clients": len(services['client_book']),
+        "sessions": await _in_executor(services['chat_service'].sessions.stats),
+        "circuits": resilience.status(),
+    })
+
+
+async def list_clients(request: web.Request) -> web.Response:
+    services = request.app[SERVICES]
+    return _json({
+        "clients": [
+            {"id": client_id, "name": name} for client_id, name in services['client_book'].client_directory()
+        ],
+        "ingestion_errors": services['ingestion_errors'],
+    })
+
+
+async def get_client(request: web.Request) -> web.Response:
+    return _json(_client(request, request.match_info['client_id']))
+
+
+async def chat(request: web.Request) -> web.Response:
+    body = await _json_body(request, ["client_id", "message"])
+    client_data = _client(request, body['client_id'])
+    session_id = body.get('session_id') or uuid.uuid4().hex
+    # Only the model call is awaited on the loop; process_message runs the rest on threads
+    reply = await request.app[SERVICES]['chat_service'].process_message(
+        body['message'], session_id=session_id, client_data=client_data
+    )
+    return _json({"reply": reply, "session_id": session_id, "client_id": body['client_id']})
+
+
+async def reset_chat(request: web.Request) -> web.Response:
+    await _in_executor(
+        request.app[SERVICES]['chat_service'].sessions.reset,
+        request.match_info['session_id'], request.query.get('client_id')
+    )
+    return _json({"status": "ok"})
+
+
+async def search(request: web.Request) -> web.Response:
+    body = await _json_body(request, ["query"])
+    try:
+        k = int(body.get('k', 3))
+    except (TypeError, ValueError):
+        raise _bad_request("k must be an integer")
+    results = await _in_executor(
+        request.app[SERVICES]['vector_store'].search, body['query'], body.get('client_id'), max(1, min(k, 50))
+    )
+    return _json({"results": [
+        {"content": content, "metadata": metadata, "score": score} for content, metadata, score in results
+    ]})
+
+
+async def report(request: web.Request) -> web.Response:
+    client_data = _client(request, request.match_info['client_id'])
+    report_service = request.app[SERVICES]['report_service']
+    if request.query.get('format', 'pdf') == 'html':
+        html = await _in_executor(report_service.render_html, client_data)
+        return web.Response(text=html, content_type="text/html")
+    pdf_content = await _in_executor(report_service.generate_report, client_data)
+    return web.Response(
+        body=pdf_content, content_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="portfolio_report_{client_data["clientInfo"]["id"]}.pdf"'}
+    )
+
+
+async def market_quote(request: web.Request) -> web.Response:
+    symbol = request.match_info['symbol'].upper()
+    quote = await request.app[SERVICES]['market_service'].get_stock_data(symbol)
+    if quote is None:
+        return _error(503, f"Market data unavailable for {symbol}")
+    return _json(quote)
+
+
+async def metrics_text(request: web.Request) -> web.Response:
+    return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+
+async def _load_services(app: web.Application):
+    if SERVICES not in app:
+        # Loading the book and mapping the index blocks, so keep it off the loop
+        app[SERVICES] = await _in_executor(build_services, app[DATA_PATH])
+
+
+def create_app(data_path: Optional[str] = None, services: Optional[Dict] = None,
+               token: Optional[str] = None) -> web.Application:
+    """The API application; ``services`` (as built by build_services) skips loading the book.
+
+    ``token`` defaults to Config.API_TOKEN; without one requests are not authenticated.
+    """
+    app = web.Application(middlewares=[error_middleware, auth_middleware])
+    app[DATA_PATH] = data_path or resolve_data_path(Config.API_DATA_DIR)
+    token = token or Config.API_TOKEN
+    if token:
+        app[API_TOKEN] = token
+    if services is not None:
+        app[SERVICES] = services
+    app.on_startup.append(_load_services)
+    app.add_routes([
+        web.get("/health", health),
+        web.get("/clients", list_clients),
+        web.get("/clients/{client_id}", get_client),
+        web.post("/chat", chat),
+        web.delete("/chat/{session_id}", reset_chat),
+        web.post("/search", search),
+        web.get("/reports/{client_id}", report),
+        web.get("/market/{symbol}", market_quote),
+        web.get("/metrics", metrics_text),
+    ])
+    return app
+
+
+def _serve(host: str, port: int, data_path: Optional[str], reuse_port: bool):
+    web.run_app(create_app(data_path), host=host, port=port, reuse_port=reuse_port, print=None)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=Config.API_HOST)
+    parser.add_argument("--port", type=int, default=Config.API_PORT)
+    parser.add_argument("--workers", type=int, default=1, help="processes sharing the port (SO_REUSEPORT)")
+    parser.add_argument("--data", help="client book (default: the snapshot or clients.json in Config.API_DATA_DIR)")
+    args = parser.parse_args(argv)
+
+    if not Config.API_TOKEN and args.host not in LOCAL_HOSTS:
+        sys.exit(f"Refusing to serve client data on {args.host} without authentication; set API_TOKEN")
+    if args.workers > 1 and Config.CHAT_SESSION_STORE == "memory":
+        print("Warning: CHAT_SESSION_STORE=memory keeps chat history per worker; "
+              "set CHAT_SESSION_STORE=sqlite so every worker sees every session")
+    print(f"Serving the API on http://{args.host}:{args.port} with {args.workers} worker(s)")
+    if args.workers == 1:
+        _serve(args.host, args.port, args.data, reuse_port=False)
+        return
+    workers = [
+        multiprocessing.Process(target=_serve, args=(args.host, args.port, args.data, True), daemon=True)
+        for _ in range(args.workers)
+    ]
+
+    def stop(*_):
+        for worker in workers:
+            worker.terminate()
+    # Workers must not outlive the supervisor when it is stopped
+    signal.signal(signal.SIGTERM, stop)
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -11,25 +11,167 @@ class Config:
             raise ValueError(f"{name} environment variable is not set")
         return value
 
-    # API Keys with validation
+    @classmethod
+    def require(cls, name: str) -> str:
+        """Return a setting that must be present (e.g. an API key), raising if it is unset"""
+        value = getattr(cls, name, None)
+        if not value:
+            raise ValueError(f"{name} environment variable is not set")
+        return value
+
+    # API keys, validated by the services that use them (see Config.require)
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    if not OPENAI_API_KEY:
-        raise ValueError("OPENAI_API_KEY environment variable is not set")
-    
-    # Add Alpha Vantage API Key
     ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY")
-    if not ALPHA_VANTAGE_API_KEY:
-        raise ValueError("ALPHA_VANTAGE_API_KEY environment variable is not set")
+    
+    # API endpoints; override to point at a proxy or the local benchmark stubs
+    OPENAI_API_BASE = os.getenv("OPENAI_API_BASE") or None  # None: api.openai.com
+    ALPHA_VANTAGE_BASE_URL = os.getenv("ALPHA_VANTAGE_BASE_URL", "https://www.alphavantage.co/query")
     
     # Model settings
     MODEL_NAME = "gpt-4-turbo-preview"
+    
+    # Model routing: tiers name models, routes send each request type to a tier.
+    # "slo" is the latency target reported in metrics (seconds); after "timeout"
+    # the call is retried once on the "fallback" tier
+    MODEL_TIERS = {
+        "fast": os.getenv("MODEL_FAST", "gpt-4o-mini"),
+        "standard": os.getenv("MODEL_STANDARD", "gpt-4o"),
+        "heavy": os.getenv("MODEL_HEAVY", MODEL_NAME),
+    }
+    MODEL_ROUTES = {
+        "chat_simple": {"tier": "fast", "slo": 3, "timeout": 10, "fallback": "standard"},
+        "chat_complex": {"tier": "standard", "slo": 8, "timeout": 20, "fallback": "fast"},
+        "chat_summary": {"tier": "fast", "slo": 10, "timeout": 30, "fallback": "standard"},
+        "stock_recommendation": {"tier": "standard", "slo": 10, "timeout": 30, "fallback": "fast"},
+        "report_analysis": {"tier": "heavy", "slo": 20, "timeout": 60, "fallback": "standard"},
+        "default": {"tier": "heavy", "slo": 20, "timeout": 60, "fallback": "standard"},
+    }
+    MODEL_MAX_RETRIES = 2  # Client retries (with backoff) on 429, 5xx and connection errors, within the route timeout
+    MODEL_ROUTER_SIMPLE_MAX_CHARS = 160  # Longer chat questions count as complex
     EMBEDDING_MODEL = "text-embedding-3-small"
     
+    # Embedding backend: "openai", "hashing" (local, offline) or "huggingface"
+    EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")
+    EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "1536"))
+    LOCAL_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+    # Token-chunk long inputs with tiktoken before embedding. Client documents
+    # are far below the model's input limit, so this can be turned off offline
+    EMBEDDING_CHECK_CTX_LENGTH = os.getenv("EMBEDDING_CHECK_CTX_LENGTH", "true").lower() not in ("0", "false", "no")
+    
+    # Chat session settings (per user session and client)
+    CHAT_HISTORY_MAX_MESSAGES = 10
+    CHAT_SESSION_TTL_SECONDS = 30 * 60
+    CHAT_MAX_SESSIONS = 1000
+    CHAT_SESSIONS_MAX_BYTES = 32 * 1024 * 1024
+    # "memory" (per process) or "sqlite" (shared by the worker processes on one host, e.g. the HTTP API)
+    CHAT_SESSION_STORE = os.getenv("CHAT_SESSION_STORE", "memory")
+    CHAT_SESSION_DB_PATH = os.getenv("CHAT_SESSION_DB_PATH", os.path.join("sessions", "chat_sessions.sqlite3"))
+    CHAT_SESSION_EVICT_INTERVAL_SECONDS = 60  # How often each worker sweeps idle and excess sqlite sessions
+    
+    # Chat prompt token budget (retrieved context + history + summary)
+    CHAT_PROMPT_TOKEN_BUDGET = 3000
+    CHAT_CONTEXT_TOKEN_SHARE = 0.4
+    CHAT_SUMMARY_MAX_TOKENS = 250
+    
+    # Semantic response cache for repeated chat questions
+    CHAT_CACHE_ENABLED = True
+    CHAT_CACHE_SIMILARITY_THRESHOLD = 0.95
+    CHAT_CACHE_MAX_ENTRIES_PER_CLIENT = 200
+    
     # Vector store settings
     VECTOR_STORE_PATH = "vector_store"
+    # Checksum the whole index file on every load (a multi-GB read per worker start) instead of
+    # checking its size; the checksum is always written at save time
+    VECTOR_STORE_VERIFY_ON_LOAD = os.getenv("VECTOR_STORE_VERIFY_ON_LOAD", "false").lower() in ("1", "true", "yes")
+    HYBRID_CANDIDATES = 20  # Per-retriever candidates fused by reciprocal rank
+    
+    # FAISS index type: flat, sq8, hnsw, hnsw_sq8, ivfpq, pca_flat or pca_ivfpq
+    FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat")
+    FAISS_HNSW_M = 32
+    FAISS_HNSW_EF_SEARCH = 64
+    FAISS_IVF_MAX_LISTS = 4096
+    FAISS_IVF_NPROBE = 16
+    FAISS_PQ_SUBVECTOR_DIMS = 16
+    FAISS_PCA_DIMENSIONS = 256
+    FAISS_MAX_TRAINING_VECTORS = 100_000
+    # Client-scoped searches over at most this many rows are scored exactly
+    SCOPED_EXACT_SEARCH_MAX_ROWS = 4096
     
     # Report generation settings
     REPORT_TEMPLATE_PATH = "templates/report_template.html"
+    REPORT_SECTION_CONCURRENCY = 7    # Analysis sections requested in parallel
+    REPORT_SECTION_RETRIES = 1        # Extra attempts for a failed or empty section
+    REPORT_SECTION_MAX_HOLDINGS = 15  # Largest holdings sent with a section's data
+    REPORT_TOP_HOLDINGS = 10          # Largest holdings charted and listed in the report
+    # Sections are reused until the client data they read changes
+    REPORT_SECTION_CACHE_ENABLED = True
+    REPORT_SECTION_CACHE_PATH = os.getenv("REPORT_SECTION_CACHE_PATH", os.path.join("cache", "report_sections.sqlite3"))
+    REPORT_SECTION_CACHE_MAX_AGE_SECONDS = 90 * 24 * 60 * 60  # Regenerate at least once a quarter
+    
+    # Debug mode (metrics on by default, per-report timing lines)
+    DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+    
+    # Metrics (spans, histograms, counters); on by default in debug mode
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true" if DEBUG else "false").lower() in ("1", "true", "yes")
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # Prometheus text at /metrics; 0 = off
+    METRICS_FILE = os.getenv("METRICS_FILE") or None    # Periodically written .prom file
+    METRICS_EXPORT_INTERVAL_SECONDS = 15
+    
+    # LLM usage accounting (tokens, latency and estimated cost per call)
+    LLM_USAGE_ENABLED = os.getenv("LLM_USAGE_ENABLED", "true").lower() in ("1", "true", "yes")
+    LLM_USAGE_DB_PATH = os.getenv("LLM_USAGE_DB_PATH", os.path.join("usage", "llm_usage.sqlite3"))
+    # USD per million (prompt, completion) tokens; "default" covers unlisted models
+    LLM_PRICING = {
+        "gpt-4-turbo-preview": (10.00, 30.00),
+        "gpt-4-turbo": (10.00, 30.00),
+        "gpt-4o": (2.50, 10.00),
+        "gpt-4o-mini": (0.15, 0.60),
+        "gpt-3.5-turbo": (0.50, 1.50),
+        "default": (10.00, 30.00),
+    }
+    # Daily (UTC) spend budgets in USD; 0 disables the alert
+    LLM_DAILY_BUDGET_USD = float(os.getenv("LLM_DAILY_BUDGET_USD", "50"))
+    LLM_CLIENT_DAILY_BUDGET_USD = float(os.getenv("LLM_CLIENT_DAILY_BUDGET_USD", "5"))
+    LLM_BUDGET_ALERT_RATIO = 0.8  # Alert once spend reaches this share of a budget
+    
+    # Deadlines, hedging and circuit breakers per upstream (backend/utils/resilience.py).
+    # "llm_<tier>", "embedding" and "market" policies fall back to their prefix's
+    # entry, then to "default". timeout in seconds; hedge_after: re-issue a call
+    # still unanswered after this long (None: never); failure_threshold
+    # consecutive failures open the circuit for reset_seconds
+    RESILIENCE_POLICIES = {
+        "default": {"timeout": 30, "hedge_after": None, "failure_threshold": 5, "reset_seconds": 30},
+        "llm": {"timeout": 60, "hedge_after": None, "failure_threshold": 5, "reset_seconds": 30},
+        "embedding": {"timeout": 10, "hedge_after": 2, "failure_threshold": 5, "reset_seconds": 30},
+        # No hedging: Alpha Vantage allows 5 requests a minute and a duplicate costs one of them
+        "market": {"timeout": 10, "hedge_after": None, "failure_threshold": 3, "reset_seconds": 60},
+    }
+    RESILIENCE_MAX_WORKERS = 32  # Threads running blocking calls that have a deadline
+    EMBEDDING_REQUEST_TIMEOUT_SECONDS = 30  # Per HTTP request, including bulk index builds
+    EMBEDDING_INTERACTIVE_MAX_TEXTS = 32    # Larger embedding batches skip the deadline and hedging
+    
+    # API quotas shared by every worker process on the host (backend/database/quota.py).
+    # Each bucket refills at per_minute and holds at most burst requests; batch
+    # work (bulk index builds) leaves the last QUOTA_BATCH_RESERVE share
+    # of every bucket to interactive chat and searches
+    QUOTA_ENABLED = os.getenv("QUOTA_ENABLED", "true").lower() in ("1", "true", "yes")
+    QUOTA_DB_PATH = os.getenv("QUOTA_DB_PATH", os.path.join("usage", "quota.sqlite3"))
+    QUOTA_LIMITS = {
+        "openai": {"per_minute": float(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500")), "burst": 50},
+        "alpha_vantage": {"per_minute": float(os.getenv("ALPHA_VANTAGE_REQUESTS_PER_MINUTE", "5")), "burst": 5},
+    }
+    QUOTA_BATCH_RESERVE = 0.2
+    QUOTA_MAX_WAIT_SECONDS = 120  # Callers give up (QuotaExceeded) after waiting this long
+    EMBEDDING_BUILD_CHUNK_TEXTS = 500  # Texts per embedding request (and quota unit) in index builds
     
-    # Add debug mode
-    DEBUG = True
\ No newline at end of file
+    # HTTP API (python -m backend.api.server); set API_BASE_URL to make the
+    # Streamlit app a thin client of a running API instead of loading the book itself
+    API_HOST = os.getenv("API_HOST", "127.0.0.1")
+    API_PORT = int(os.getenv("API_PORT", "8000"))
+    API_DATA_DIR = os.getenv("API_DATA_DIR", "data")
+    API_BASE_URL = os.getenv("API_BASE_URL") or None
+    # Shared secret every request but /health must send as "Authorization: Bearer <token>";
+    # required unless the API only listens on localhost
+    API_TOKEN = os.getenv("API_TOKEN") or None
+    API_CLIENT_TIMEOUT_SECONDS = 180  # Covers a full report render
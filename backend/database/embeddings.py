@@ -0,0 +1,148 @@
+import itertools
+import math
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from backend.config import Config
+from backend.database.lexical_index import tokenize
+from backend.database.quota import get_quota_scheduler
+from backend.utils.resilience import resilience
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic feature-hashing embeddings computed locally on CPU.
+
+    Word unigrams and bigrams are hashed (signed) into a fixed number of
+    dimensions and L2-normalized. No network, no model weights, and the same
+    text always maps to the same vector across processes, which makes it
+    suitable for offline index builds, tests and benchmarks.
+    """
+
+    def __init__(self, dimensions: int = Config.EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        tokens = tokenize(text)
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            digest = zlib.crc32(feature.encode("utf-8"))
+            vector[digest % self.dimensions] += 1.0 if digest & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text).tolist() for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text).tolist()
+
+
+class ResilientEmbeddings(Embeddings):
+    """Runs a hosted embedding backend under the "embedding" resilience policy and API quota.
+
+    Queries and small batches get the policy's deadline and hedging; bulk
+    batches (index builds) only go through the circuit breaker and rely on
+    the client's per-request timeout, since they legitimately take minutes.
+    Every call first takes one unit of the ``quota_bucket`` per API request
+    it will make, at the caller's quota priority; a hedged attempt takes its own.
+    """
+
+    def __init__(self, inner: Embeddings, policy: str = "embedding", quota_bucket: Optional[str] = "openai"):
+        self.inner = inner
+        self.policy = resilience.policy(policy)
+        self.quota_bucket = quota_bucket
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # The client sends chunk_size texts per API request
+        chunk_size = getattr(self.inner, "chunk_size", None) or Config.EMBEDDING_BUILD_CHUNK_TEXTS
+        requests = math.ceil(len(texts) / chunk_size)
+        if len(texts) > Config.EMBEDDING_INTERACTIVE_MAX_TEXTS:
+            return self._call(lambda: self.inner.embed_documents(texts), requests, timeout=0, hedge=False)
+        return self._call(lambda: self.inner.embed_documents(texts), requests)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._call(lambda: self.inner.embed_query(text), 1)
+
+    def _call(self, fn, requests: int, **options):
+        """Run ``fn`` under the policy; quota for the first attempt is taken up front"""
+        self._acquire(requests)
+        attempts = itertools.count()
+
+        def attempt():
+            # A hedged attempt is another request against the shared quota
+            if next(attempts):
+                self._acquire(requests)
+            return fn()
+        return self.policy.call(attempt, **options)
+
+    def _acquire(self, requests: int):
+        quota = get_quota_scheduler() if self.quota_bucket else None
+        if quota is not None and requests:
+            quota.acquire(self.quota_bucket, cost=requests)
+
+
+# Backends whose embed_query is embed_documents on one text, so queries can be batched
+SYMMETRIC_BACKENDS = {"OpenAIEmbeddings", "HashingEmbeddings"}
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """Query embeddings for several texts.
+
+    Symmetric backends embed them with one embed_documents request. Others
+    (e.g. instruction-tuned models that embed queries differently from
+    documents) fall back to embed_query per text.
+    """
+    if type(getattr(embeddings, "inner", embeddings)).__name__ in SYMMETRIC_BACKENDS:
+        return embeddings.embed_documents(texts)
+    return [embeddings.embed_query(text) for text in texts]
+
+
+def create_embeddings(provider: Optional[str] = None, dimensions: Optional[int] = None) -> Embeddings:
+    """Build the embedding backend named by ``provider`` (default: Config.EMBEDDING_PROVIDER).
+
+    * ``openai`` - hosted OpenAI embeddings (Config.EMBEDDING_MODEL), behind ResilientEmbeddings
+    * ``hashing`` - local feature hashing, fully offline
+    * ``huggingface`` - small on-box sentence-transformers model (Config.LOCAL_EMBEDDING_MODEL)
+    """
+    provider = (provider or Config.EMBEDDING_PROVIDER).lower()
+    dimensions = dimensions or Config.EMBEDDING_DIMENSIONS
+
+    if provider == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        from backend.utils.compat import ensure_model_rebuilt
+
+        # Force model rebuilding for compatibility (once per process)
+        ensure_model_rebuilt(OpenAIEmbeddings)
+        return ResilientEmbeddings(OpenAIEmbeddings(
+            model=Config.EMBEDDING_MODEL,
+            openai_api_key=Config.require("OPENAI_API_KEY"),
+            base_url=Config.OPENAI_API_BASE,
+            dimensions=dimensions,
+            check_embedding_ctx_length=Config.EMBEDDING_CHECK_CTX_LENGTH,
+            request_timeout=Config.EMBEDDING_REQUEST_TIMEOUT_SECONDS
+        ))
+    if provider == "hashing":
+        return HashingEmbeddings(dimensions=dimensions)
+    if provider == "huggingface":
+        try:
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+        except ImportError as e:
+            raise ImportError(
+                f"Local model embeddings need sentence-transformers: pip install sentence-transformers ({e})"
+            )
+        return HuggingFaceEmbeddings(model_name=Config.LOCAL_EMBEDDING_MODEL)
+    raise ValueError(f"Unknown embedding provider: {provider}")
+
+
+def embedding_signature(embeddings: Embeddings) -> Dict:
+    """Identify an embedding backend, so persisted vectors are only reused with the same one"""
+    embeddings = getattr(embeddings, "inner", embeddings)
+    if isinstance(embeddings, HashingEmbeddings):
+        return {"provider": "hashing", "model": "crc32-unigram-bigram", "dimensions": embeddings.dimensions}
+    model = getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None)
+    provider = "openai" if type(embeddings).__name__ == "OpenAIEmbeddings" else type(embeddings).__name__
+    return {"provider": provider, "model": model, "dimensions": getattr(embeddings, "dimensions", None)}
@@ -0,0 +1,104 @@
+import math
+from typing import Optional
+
+import faiss
+import numpy as np
+
+from backend.config import Config
+
+# Index types selectable through Config.FAISS_INDEX_TYPE
+INDEX_TYPES = ("flat", "sq8", "hnsw", "hnsw_sq8", "ivfpq", "pca_flat", "pca_ivfpq")
+
+# Rough minimum number of training vectors per k-means centroid
+MIN_POINTS_PER_CENTROID = 39
+
+
+def _pq_subquantizers(dimensions: int) -> int:
+    """Largest PQ sub-quantizer count that divides ``dimensions`` with sub-vectors of >= PQ_SUBVECTOR_DIMS"""
+    target = max(1, dimensions // Config.FAISS_PQ_SUBVECTOR_DIMS)
+    for m in range(target, 0, -1):
+        if dimensions % m == 0:
+            return m
+    return 1
+
+
+def _ivf_lists(vector_count: int) -> int:
+    """~4*sqrt(n) inverted lists, capped so each centroid has enough training points"""
+    lists = min(Config.FAISS_IVF_MAX_LISTS, int(4 * math.sqrt(vector_count)),
+                vector_count // MIN_POINTS_PER_CENTROID)
+    return max(1, lists)
+
+
+def factory_string(index_type: str, dimensions: int, vector_count: int) -> str:
+    """faiss.index_factory description for an index type and corpus size"""
+    pca_dimensions = min(Config.FAISS_PCA_DIMENSIONS, dimensions)
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "sq8":
+        return "SQ8"
+    if index_type == "hnsw":
+        return f"HNSW{Config.FAISS_HNSW_M},Flat"
+    if index_type == "hnsw_sq8":
+        return f"HNSW{Config.FAISS_HNSW_M},SQ8"
+    if index_type == "ivfpq":
+        return f"IVF{_ivf_lists(vector_count)},PQ{_pq_subquantizers(dimensions)}x8"
+    if index_type == "pca_flat":
+        return f"PCA{pca_dimensions},Flat"
+    if index_type == "pca_ivfpq":
+        return f"PCA{pca_dimensions},IVF{_ivf_lists(vector_count)},PQ{_pq_subquantizers(pca_dimensions)}x8"
+    raise ValueError(f"Unknown FAISS index type: {index_type} (expected one of {', '.join(INDEX_TYPES)})")
+
+
+def min_training_vectors(index_type: str, dimensions: int, vector_count: int) -> int:
+    """Vectors needed to train an index type reliably (0 when no training is needed)"""
+    needed = 0
+    if "ivf" in index_type:
+        needed = max(needed, _ivf_lists(vector_count) * MIN_POINTS_PER_CENTROID)
+    if "pq" in index_type:
+        needed = max(needed, 256 * MIN_POINTS_PER_CENTROID // 4)  # 8-bit codebooks
+    if "pca" in index_type:
+        needed = max(needed, min(Config.FAISS_PCA_DIMENSIONS, dimensions) * 4)
+    return needed
+
+
+def build_index(vectors: np.ndarray, index_type: Optional[str] = None) -> faiss.Index:
+    """Train (when required) and fill a FAISS index of the configured type.
+
+    Rows keep their insertion order, so row ``i`` is the i-th vector. Corpora
+    too small to train a compressed index fall back to a flat index.
+    """
+    index_type = (index_type or Config.FAISS_INDEX_TYPE).lower()
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    vector_count, dimensions = vectors.shape
+
+    if vector_count < min_training_vectors(index_type, dimensions, vector_count):
+        print(f"Only {vector_count} vectors; too few to train '{index_type}', using a flat index")
+        index_type = "flat"
+
+    index = faiss.index_factory(dimensions, factory_string(index_type, dimensions, vector_count))
+    if not index.is_trained:
+        sample = vectors
+        if vector_count > Config.FAISS_MAX_TRAINING_VECTORS:
+            rng = np.random.default_rng(0)
+            sample = vectors[rng.choice(vector_count, Config.FAISS_MAX_TRAINING_VECTORS, replace=False)]
+        index.train(sample)
+    index.add(vectors)
+    configure_index(index)
+    return index
+
+
+def configure_index(index: faiss.Index):
+    """Apply search-time tuning and allow row reconstruction for scoped search"""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = Config.FAISS_IVF_NPROBE
+        ivf.make_direct_map()  # Enables reconstruct() of individual rows
+    try:
+        faiss.ParameterSpace().set_index_parameter(index, "efSearch", Config.FAISS_HNSW_EF_SEARCH)
+    except RuntimeError:
+        pass  # Not an HNSW index
+
+
+def index_nbytes(index: faiss.Index) -> int:
+    """Serialized size of an index, a close proxy for its resident memory"""
+    return int(faiss.serialize_index(index).nbytes)
@@ -0,0 +1,262 @@
+"""On-disk layout of a persisted vector store.
+
+    <directory>/CURRENT                 name of the live version
+    <directory>/.lock                   held while a store is rebuilt or saved
+    <directory>/versions/<name>/        index.faiss, documents.json, manifest.json
+
+Every save writes a complete new version directory and then swaps CURRENT
+with one atomic rename, so readers see either the previous store or the new
+one. The manifest records the size and checksum of both data files. Loading
+checks the index's size only, so a worker maps a multi-GB index without
+reading it; the full checksum is verified with ``verify=True``
+(Config.VECTOR_STORE_VERIFY_ON_LOAD). The document table is read whole on
+first use anyway, so its checksum is always verified.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import faiss
+
+try:
+    import fcntl
+except ImportError:  # Not on POSIX: saves are not serialized across processes
+    fcntl = None
+
+# Bump when the layout of any file below changes
+FORMAT_VERSION = 4
+
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = ".lock"
+VERSIONS_DIR = "versions"
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "index.faiss"
+DOCUMENTS_FILE = "documents.json"
+# Versions kept besides the live one, for readers that resolved CURRENT just before a swap
+KEEP_PREVIOUS_VERSIONS = 1
+
+# Map the index file instead of reading it: flat/SQ/PQ codes (IFC) and IVF
+# lists stay in the page cache and are shared by every worker process
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+
+
+class StoreFormatError(ValueError):
+    """A persisted store is missing, corrupted or incompatible"""
+
+
+def _replace_atomically(directory: str, name: str, write):
+    """Write via a temp file and rename, so readers never see a partial file"""
+    final_path = os.path.join(directory, name)
+    temp_path = f"{final_path}.tmp.{os.getpid()}"
+    try:
+        write(temp_path)
+        os.replace(temp_path, final_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _write_json(data: Dict) -> Callable[[str], None]:
+    def write(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+    return write
+
+
+def _checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _fsync(path: str):
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+@contextlib.contextmanager
+def store_lock(directory: str):
+    """Hold the store's lock file, so only one process rebuilds or saves it at a time"""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LOCK_FILE), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _to_columns(texts: List[str], metadatas: List[Dict]) -> Dict:
+    keys = sorted({key for metadata in metadatas for key in metadata})
+    return {
+        "texts": texts,
+        "metadata": {key: [metadata.get(key) for metadata in metadatas] for key in keys}
+    }
+
+
+def _from_columns(table: Dict) -> Tuple[List[str], List[Dict]]:
+    texts = table["texts"]
+    columns = table["metadata"]
+    metadatas = []
+    for row in range(len(texts)):
+        metadatas.append({
+            key: values[row] for key, values in columns.items() if values[row] is not None
+        })
+    return texts, metadatas
+
+
+def build_manifest(embedding_signature: Dict, index: faiss.Index, source_hash: Optional[str],
+                   document_count: int) -> Dict:
+    return {
+        "format_version": FORMAT_VERSION,
+        "embedding": embedding_signature,
+        "dimensions": index.d,
+        "index_type": type(faiss.downcast_index(index)).__name__,
+        "source_hash": source_hash,
+        "document_count": document_count,
+        "created_at": datetime.now().isoformat()
+    }
+
+
+def read_manifest(directory: str) -> Optional[Dict]:
+    """Return the live version's manifest, or None when the directory holds no versioned store"""
+    pointer = os.path.join(directory, CURRENT_FILE)
+    if not os.path.exists(pointer):
+        return None
+    try:
+        with open(pointer, "r", encoding="utf-8") as f:
+            version = f.read().strip()
+        path = os.path.join(directory, VERSIONS_DIR, version, MANIFEST_FILE)
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise StoreFormatError(f"Unreadable manifest for the store at {directory}: {e}")
+
+
+def incompatibility(manifest: Optional[Dict], embedding_signature: Dict) -> Optional[str]:
+    """Why a store cannot be used with these embeddings, or None if it can"""
+    if manifest is None:
+        return "no manifest (missing or legacy store)"
+    if manifest.get("format_version") != FORMAT_VERSION:
+        return f"format version {manifest.get('format_version')} != {FORMAT_VERSION}"
+    if manifest.get("embedding") != embedding_signature:
+        return f"built with {manifest.get('embedding')}, current embeddings are {embedding_signature}"
+    return None
+
+
+def save_store(directory: str, index: faiss.Index, texts: List[str], metadatas: List[Dict],
+               manifest: Dict) -> Dict:
+    """Write a new version (index, columnar document table, manifest) and make it live.
+
+    Swapping CURRENT is the commit point: a crash before it leaves the previous
+    version live, and a half-written version directory is never referenced.
+    Call with store_lock(directory) held. Returns the manifest as written,
+    with the version name and file sizes and checksums.
+    """
+    versions = os.path.join(directory, VERSIONS_DIR)
+    os.makedirs(versions, exist_ok=True)
+    version = f"{datetime.now():%Y%m%dT%H%M%S%f}-{os.getpid()}"
+    staging = os.path.join(versions, f".{version}.tmp")
+    os.makedirs(staging)
+    try:
+        index_path = os.path.join(staging, INDEX_FILE)
+        documents_path = os.path.join(staging, DOCUMENTS_FILE)
+        faiss.write_index(index, index_path)
+        _write_json(_to_columns(texts, metadatas))(documents_path)
+        manifest = dict(manifest, version=version, checksums={
+            INDEX_FILE: _checksum(index_path),
+            DOCUMENTS_FILE: _checksum(documents_path),
+        }, sizes={
+            INDEX_FILE: os.path.getsize(index_path),
+            DOCUMENTS_FILE: os.path.getsize(documents_path),
+        })
+        _write_json(manifest)(os.path.join(staging, MANIFEST_FILE))
+        for name in (INDEX_FILE, DOCUMENTS_FILE, MANIFEST_FILE):
+            _fsync(os.path.join(staging, name))
+        os.rename(staging, os.path.join(versions, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    def write_pointer(path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+    _replace_atomically(directory, CURRENT_FILE, write_pointer)
+    _prune_versions(versions, version)
+    return manifest
+
+
+def _prune_versions(versions: str, live: str):
+    """Delete versions older than the live one and its predecessors, and abandoned staging dirs"""
+    names = sorted(name for name in os.listdir(versions) if not name.startswith("."))
+    older = [name for name in names if name < live]
+    stale = older[:max(0, len(older) - KEEP_PREVIOUS_VERSIONS)]
+    stale += [name for name in os.listdir(versions) if name.startswith(".") and name.endswith(".tmp")]
+    for name in stale:
+        shutil.rmtree(os.path.join(versions, name), ignore_errors=True)
+
+
+def load_store(directory: str, manifest: Dict, mmap: bool = True,
+               verify: bool = False) -> Tuple[faiss.Index, Callable[[], Tuple[List[str], List[Dict]]]]:
+    """Load the index (memory-mapped read-only when possible) and a lazy document loader.
+
+    The index is checked against the manifest's size, and with ``verify``
+    also its checksum (which reads the whole file). The document table is
+    checked against its checksum when it is first loaded.
+    """
+    version_dir = os.path.join(directory, VERSIONS_DIR, manifest["version"])
+    index_path = os.path.join(version_dir, INDEX_FILE)
+    documents_path = os.path.join(version_dir, DOCUMENTS_FILE)
+    if not os.path.exists(index_path) or not os.path.exists(documents_path):
+        raise StoreFormatError(f"Incomplete vector store at {version_dir}")
+    if os.path.getsize(index_path) != manifest["sizes"][INDEX_FILE]:
+        raise StoreFormatError(f"Index at {index_path} does not match its manifest size")
+    if verify and _checksum(index_path) != manifest["checksums"][INDEX_FILE]:
+        raise StoreFormatError(f"Index at {index_path} does not match its manifest checksum")
+
+    index = None
+    if mmap:
+        try:
+            index = faiss.read_index(index_path, MMAP_FLAGS)
+        except RuntimeError as e:
+            print(f"Memory-mapped load unavailable for {index_path}, reading into memory: {e}")
+    if index is None:
+        try:
+            index = faiss.read_index(index_path)
+        except RuntimeError as e:
+            raise StoreFormatError(f"Corrupted index at {index_path}: {e}")
+
+    if index.ntotal != manifest["document_count"] or index.d != manifest["dimensions"]:
+        raise StoreFormatError(
+            f"Index at {index_path} has {index.ntotal}x{index.d} vectors, "
+            f"manifest expects {manifest['document_count']}x{manifest['dimensions']}"
+        )
+    # Opened now, so the table stays readable if this version is pruned before first use
+    documents_file = open(documents_path, "rb")
+
+    def load_documents() -> Tuple[List[str], List[Dict]]:
+        try:
+            with documents_file:
+                payload = documents_file.read()
+            if hashlib.sha256(payload).hexdigest() != manifest["checksums"][DOCUMENTS_FILE]:
+                raise ValueError("checksum does not match the manifest")
+            texts, metadatas = _from_columns(json.loads(payload))
+        except (OSError, ValueError, KeyError) as e:
+            raise StoreFormatError(f"Corrupted document table at {documents_path}: {e}")
+        if len(texts) != manifest["document_count"]:
+            raise StoreFormatError(
+                f"Document table has {len(texts)} rows, manifest expects {manifest['document_count']}"
+            )
+        return texts, metadatas
+
+    return index, load_documents
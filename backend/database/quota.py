@@ -0,0 +1,214 @@
+"""Token-bucket quotas for the OpenAI and Alpha Vantage APIs, shared by every worker process.
+
+    quota = get_quota_scheduler()
+    quota.acquire("openai")              # blocks until one request may be sent
+    with quota_priority("batch"):
+        build_index()                    # acquisitions in here yield to live work
+
+Buckets (Config.QUOTA_LIMITS) live in one SQLite file; each acquisition is a
+short IMMEDIATE transaction, so every process on the host draws from the same
+bucket. There are two priority classes:
+
+* interactive (the default): advisor chat, searches and reports
+* batch: bulk index builds. A batch caller never takes the last
+  Config.QUOTA_BATCH_RESERVE share of a bucket and stands aside while an
+  interactive caller is waiting on it
+"""
+import asyncio
+import contextlib
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from backend.config import Config
+from backend.utils.metrics import metrics
+from backend.utils.resilience import UpstreamUnavailable
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    interactive_until REAL NOT NULL DEFAULT 0
+);
+"""
+
+INTERACTIVE, BATCH = "interactive", "batch"
+PRIORITIES = (INTERACTIVE, BATCH)
+
+# How long batch callers keep standing aside after an interactive caller had to wait
+INTERACTIVE_GRACE_SECONDS = 0.5
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar("quota_priority", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def quota_priority(priority: str):
+    """Run the block's quota acquisitions (in this thread or task) at ``priority``"""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown quota priority: {priority}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+class QuotaExceeded(UpstreamUnavailable):
+    """No capacity was granted within the caller's maximum wait"""
+
+    def __init__(self, bucket: str, waited: float):
+        super().__init__(bucket, f"quota exhausted, gave up after waiting {waited:.1f}s")
+        self.waited = waited
+
+
+class QuotaScheduler:
+    """Priority token buckets in SQLite, refilled continuously at each bucket's rate"""
+
+    def __init__(self, path: Optional[str] = None, limits: Optional[Dict[str, Dict]] = None,
+                 batch_reserve: Optional[float] = None):
+        self.path = path or Config.QUOTA_DB_PATH
+        self.limits = limits if limits is not None else Config.QUOTA_LIMITS
+        self.batch_reserve = Config.QUOTA_BATCH_RESERVE if batch_reserve is None else batch_reserve
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+
+    def acquire(self, bucket: str, cost: float = 1.0, priority: Optional[str] = None,
+                max_wait: Optional[float] = None) -> float:
+        """Block until ``cost`` units of ``bucket`` are granted and return the seconds waited.
+
+        Buckets without a configured limit are granted immediately. Raises
+        QuotaExceeded after ``max_wait`` seconds (default Config.QUOTA_MAX_WAIT_SECONDS).
+        """
+        priority = priority or current_priority()
+        max_wait = Config.QUOTA_MAX_WAIT_SECONDS if max_wait is None else max_wait
+        started = time.monotonic()
+        waited = 0.0
+        while True:
+            retry_in = self._take(bucket, cost, priority)
+            if retry_in <= 0:
+                return self._granted(bucket, priority, waited)
+            if waited + retry_in > max_wait:
+                self._refused(bucket, priority)
+                raise QuotaExceeded(bucket, waited)
+            time.sleep(retry_in)
+            waited = time.monotonic() - started
+
+    async def aacquire(self, bucket: str, cost: float = 1.0, priority: Optional[str] = None,
+                       max_wait: Optional[float] = None) -> float:
+        """acquire() for coroutines: waits with asyncio.sleep instead of blocking the loop"""
+        # Resolved here: the executor thread does not see this task's context
+        priority = priority or current_priority()
+        max_wait = Config.QUOTA_MAX_WAIT_SECONDS if max_wait is None else max_wait
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        waited = 0.0
+        while True:
+            # The SQLite transaction can wait on other processes' locks, so keep it off the loop
+            retry_in = await loop.run_in_executor(None, self._take, bucket, cost, priority)
+            if retry_in <= 0:
+                return self._granted(bucket, priority, waited)
+            if waited + retry_in > max_wait:
+                self._refused(bucket, priority)
+                raise QuotaExceeded(bucket, waited)
+            await asyncio.sleep(retry_in)
+            waited = time.monotonic() - started
+
+    def _take(self, bucket: str, cost: float, priority: str) -> float:
+        """Take ``cost`` units now and return 0, or return how long to wait before trying again"""
+        limit = self.limits.get(bucket)
+        if not limit:
+            return 0.0
+        rate = limit["per_minute"] / 60.0
+        burst = float(limit["burst"])
+        floor = burst * self.batch_reserve if priority == BATCH else 0.0
+        # A request larger than the caller's share of the bucket waits for a full one
+        cost = min(cost, burst - floor)
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                tokens, interactive_until = self._refilled(bucket, now, rate, burst)
+                if priority == BATCH:
+                    retry_in = max(interactive_until - now, (cost + floor - tokens) / rate)
+                else:
+                    retry_in = (cost - tokens) / rate
+                if retry_in <= 0:
+                    tokens -= cost
+                elif priority == INTERACTIVE:
+                    interactive_until = max(interactive_until, now + retry_in + INTERACTIVE_GRACE_SECONDS)
+                self._connection.execute(
+                    "UPDATE buckets SET tokens = ?, updated = ?, interactive_until = ? WHERE name = ?",
+                    (tokens, now, interactive_until, bucket)
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        return max(retry_in, 0.0)
+
+    def _refilled(self, bucket: str, now: float, rate: float, burst: float) -> Tuple[float, float]:
+        """The bucket's level at ``now`` (created full on first use) and its interactive hold"""
+        row = self._connection.execute(
+            "SELECT tokens, updated, interactive_until FROM buckets WHERE name = ?", (bucket,)
+        ).fetchone()
+        if row is None:
+            self._connection.execute(
+                "INSERT INTO buckets (name, tokens, updated, interactive_until) VALUES (?, ?, ?, 0)",
+                (bucket, burst, now)
+            )
+            return burst, 0.0
+        tokens, updated, interactive_until = row
+        return min(burst, tokens + max(0.0, now - updated) * rate), interactive_until
+
+    @staticmethod
+    def _granted(bucket: str, priority: str, waited: float) -> float:
+        metrics.counter("quota_acquisitions_total", "Quota acquisitions by bucket, priority and result").inc(
+            bucket=bucket, priority=priority, result="waited" if waited > 0 else "immediate"
+        )
+        metrics.histogram("quota_wait_seconds", "Time spent waiting for quota").observe(
+            waited, bucket=bucket, priority=priority
+        )
+        return waited
+
+    @staticmethod
+    def _refused(bucket: str, priority: str):
+        metrics.counter("quota_acquisitions_total", "Quota acquisitions by bucket, priority and result").inc(
+            bucket=bucket, priority=priority, result="refused"
+        )
+
+    def levels(self) -> Dict[str, float]:
+        """Units currently available per bucket (as last written, before refill)"""
+        with self._lock:
+            rows = self._connection.execute("SELECT name, tokens FROM buckets ORDER BY name").fetchall()
+        return {name: round(tokens, 2) for name, tokens in rows}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+_default_scheduler: Optional[QuotaScheduler] = None
+_default_lock = threading.Lock()
+
+
+def get_quota_scheduler() -> Optional[QuotaScheduler]:
+    """The process-wide scheduler at Config.QUOTA_DB_PATH, or None when quotas are off"""
+    global _default_scheduler
+    if not Config.QUOTA_ENABLED:
+        return None
+    if _default_scheduler is None:
+        with _default_lock:
+            if _default_scheduler is None:
+                _default_scheduler = QuotaScheduler()
+    return _default_scheduler
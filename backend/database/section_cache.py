@@ -0,0 +1,78 @@
+"""SQLite cache of generated report sections, keyed by the data each one was written from.
+
+Each (client, section) pair keeps its latest text together with a fingerprint
+of the section's input: its data slice, prompt and model. A report reuses a
+section only while that fingerprint is unchanged, so a refresh after, say, a
+holdings update regenerates just the sections that read holdings.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from backend.config import Config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS report_sections (
+    client_id TEXT NOT NULL,
+    section TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (client_id, section)
+);
+"""
+
+
+class SectionCache:
+    """Latest text per (client, section), valid while its input fingerprint matches"""
+
+    def __init__(self, path: Optional[str] = None, max_age_seconds: Optional[float] = None):
+        self.path = path or Config.REPORT_SECTION_CACHE_PATH
+        self.max_age_seconds = (
+            Config.REPORT_SECTION_CACHE_MAX_AGE_SECONDS if max_age_seconds is None else max_age_seconds
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+
+    def get(self, client_id: str, section: str, fingerprint: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content, created FROM report_sections WHERE client_id = ? AND section = ? AND fingerprint = ?",
+                (client_id, section, fingerprint)
+            ).fetchone()
+        if row is None:
+            return None
+        content, created = row
+        if self.max_age_seconds and time.time() - created > self.max_age_seconds:
+            return None
+        return content
+
+    def put(self, client_id: str, section: str, fingerprint: str, content: str):
+        """Replace the client's previous text for this section"""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO report_sections (client_id, section, fingerprint, content, created) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (client_id, section, fingerprint, content, time.time())
+            )
+
+    def invalidate(self, client_id: Optional[str] = None):
+        """Forget one client's sections, or every client's"""
+        with self._lock:
+            if client_id is None:
+                self._connection.execute("DELETE FROM report_sections")
+            else:
+                self._connection.execute("DELETE FROM report_sections WHERE client_id = ?", (client_id,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM report_sections").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,205 @@
+"""SQLite chat session store shared by every worker process on the host.
+
+A drop-in for ChatSessionManager (see create_session_store): history and the
+rolling summary are written through to one SQLite file, so any worker behind
+the HTTP API can continue a conversation another one started. The file must
+be on a local disk: WAL mode relies on shared memory between the processes
+and is not safe on a network filesystem, so the store is never shared
+between hosts.
+
+Every ``Config.CHAT_SESSION_EVICT_INTERVAL_SECONDS`` each worker deletes
+sessions idle longer than the TTL and then the least recently used ones
+beyond ``max_sessions`` (a soft limit between sweeps).
+"""
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+from backend.config import Config
+from backend.services.session_manager import ChatSession
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_sessions (
+    session_id TEXT NOT NULL,
+    client_id TEXT NOT NULL,
+    summary TEXT,
+    generation INTEGER NOT NULL DEFAULT 0,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (session_id, client_id)
+);
+CREATE INDEX IF NOT EXISTS chat_sessions_last_access ON chat_sessions (last_access);
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    client_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chat_messages_session ON chat_messages (session_id, client_id, id);
+"""
+
+
+class SQLiteSessionStore:
+    """Chat sessions keyed by (session_id, client_id), persisted in SQLite"""
+
+    def __init__(self, path: Optional[str] = None,
+                 max_sessions: int = Config.CHAT_MAX_SESSIONS,
+                 ttl_seconds: float = Config.CHAT_SESSION_TTL_SECONDS,
+                 max_messages: int = Config.CHAT_HISTORY_MAX_MESSAGES,
+                 evict_interval_seconds: float = Config.CHAT_SESSION_EVICT_INTERVAL_SECONDS):
+        self.path = path or Config.CHAT_SESSION_DB_PATH
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.evict_interval_seconds = evict_interval_seconds
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+        self._migrate()
+        # Sessions still referenced in this process (e.g. by a summary worker) keep
+        # their in-flight summary state; everything else is reloaded from disk
+        self._live = weakref.WeakValueDictionary()
+        self._evictions = 0
+        self._next_evict = 0.0  # time.monotonic() of the next sweep
+
+    def get_session(self, session_id: str, client_data: Dict) -> ChatSession:
+        """Load (or create) the session for this user and client with its latest history"""
+        key = (session_id, client_data['clientInfo']['id'])
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO chat_sessions (session_id, client_id, summary, last_access) VALUES (?, ?, NULL, ?) "
+                "ON CONFLICT (session_id, client_id) DO UPDATE SET last_access = excluded.last_access",
+                (*key, now)
+            )
+            if time.monotonic() >= self._next_evict:
+                self._evict(now, keep=key)
+                self._next_evict = time.monotonic() + self.evict_interval_seconds
+            summary, generation = self._connection.execute(
+                "SELECT summary, generation FROM chat_sessions WHERE session_id = ? AND client_id = ?", key
+            ).fetchone()
+            rows = self._connection.execute(
+                "SELECT role, content FROM (SELECT id, role, content FROM chat_messages "
+                "WHERE session_id = ? AND client_id = ? ORDER BY id DESC LIMIT ?) ORDER BY id",
+                (*key, self.max_messages)
+            ).fetchall()
+
+            session = self._live.get(key)
+            if session is None:
+                session = ChatSession(session_id, client_data, self.max_messages)
+                self._live[key] = session
+            if session.generation != generation:
+                # Reset by another worker: drop the old conversation's pending summary
+                session.clear()
+                session.generation = generation
+            session.client_data = client_data
+            session.history.clear()
+            session.history.extend(rows)
+            session.size_bytes = sum(len(content) for _, content in rows)
+            session.summary = summary
+            session.last_access = time.monotonic()
+            return session
+
+    def append(self, session: ChatSession, role: str, content: str) -> List[Tuple[str, str]]:
+        """Append to a session's history and return the oldest messages dropped"""
+        with self._lock:
+            dropped = session.append(role, content)
+            self._connection.execute(
+                "INSERT INTO chat_messages (session_id, client_id, role, content) VALUES (?, ?, ?, ?)",
+                (*session.key, role, content)
+            )
+            if dropped:
+                self._delete_oldest(session, len(dropped))
+            return dropped
+
+    def drop_oldest(self, session: ChatSession, count: int) -> List[Tuple[str, str]]:
+        """Remove the oldest messages from a session's history"""
+        with self._lock:
+            dropped = session.pop_oldest(count)
+            if dropped:
+                self._delete_oldest(session, len(dropped))
+            return dropped
+
+    def set_summary(self, session: ChatSession, summary: str, generation: int) -> bool:
+        """Replace the session's rolling summary, unless it was cleared since ``generation``"""
+        with self._lock:
+            updated = self._connection.execute(
+                "UPDATE chat_sessions SET summary = ? WHERE session_id = ? AND client_id = ? AND generation = ?",
+                (summary, *session.key, generation)
+            ).rowcount
+            if not updated or session.generation != generation:
+                return False
+            session.summary = summary
+            return True
+
+    def reset(self, session_id: str, client_id: Optional[str] = None):
+        """Clear history for one client of a user session, or all of its clients"""
+        where, params = "session_id = ?", (session_id,)
+        if client_id is not None:
+            where, params = "session_id = ? AND client_id = ?", (session_id, client_id)
+        with self._lock:
+            self._connection.execute(f"DELETE FROM chat_messages WHERE {where}", params)
+            self._connection.execute(
+                f"UPDATE chat_sessions SET summary = NULL, generation = generation + 1 WHERE {where}", params
+            )
+            for key, session in list(self._live.items()):
+                if key[0] == session_id and (client_id is None or key[1] == client_id):
+                    session.clear()
+                    row = self._connection.execute(
+                        "SELECT generation FROM chat_sessions WHERE session_id = ? AND client_id = ?", key
+                    ).fetchone()
+                    if row is not None:
+                        session.generation = row[0]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            sessions = self._connection.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+            history_bytes = self._connection.execute(
+                "SELECT COALESCE(SUM(LENGTH(content)), 0) FROM chat_messages"
+            ).fetchone()[0]
+        return {"sessions": sessions, "history_bytes": history_bytes, "evictions": self._evictions}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _migrate(self):
+        """Add columns introduced after a store file was created"""
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(chat_sessions)")}
+        if "generation" not in columns:
+            try:
+                self._connection.execute(
+                    "ALTER TABLE chat_sessions ADD COLUMN generation INTEGER NOT NULL DEFAULT 0"
+                )
+            except sqlite3.OperationalError:
+                pass  # Another worker added it first
+
+    def _delete_oldest(self, session: ChatSession, count: int):
+        self._connection.execute(
+            "DELETE FROM chat_messages WHERE id IN (SELECT id FROM chat_messages "
+            "WHERE session_id = ? AND client_id = ? ORDER BY id LIMIT ?)",
+            (*session.key, count)
+        )
+
+    def _evict(self, now: float, keep: Tuple[str, str]):
+        """Drop idle sessions, then the least recently used beyond max_sessions (never ``keep``)"""
+        expired = self._connection.execute(
+            "SELECT session_id, client_id FROM chat_sessions WHERE last_access < ?", (now - self.ttl_seconds,)
+        ).fetchall()
+        total = self._connection.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+        excess = total - len(expired) - self.max_sessions
+        if excess > 0:
+            expired += self._connection.execute(
+                "SELECT session_id, client_id FROM chat_sessions WHERE last_access >= ? "
+                "AND NOT (session_id = ? AND client_id = ?) ORDER BY last_access LIMIT ?",
+                (now - self.ttl_seconds, *keep, excess)
+            ).fetchall()
+        for key in expired:
+            self._connection.execute("DELETE FROM chat_messages WHERE session_id = ? AND client_id = ?", key)
+            self._connection.execute("DELETE FROM chat_sessions WHERE session_id = ? AND client_id = ?", key)
+            self._evictions += 1
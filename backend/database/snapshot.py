@@ -0,0 +1,276 @@
+"""Compiled, memory-mapped snapshot of the client book.
+
+Compile once from clients.json:
+
+    python -m backend.database.snapshot data/clients.json data/clients.snapshot
+
+File layout (little-endian, sections 8-byte aligned):
+
+    magic "CBSNAP01" | u32 format version | u32 header length | header JSON
+    ids       fixed-width byte strings, sorted, for binary search by client id
+    offsets   u64[count + 1] byte offsets of each record in ``records``
+    records   one compact JSON object per client, in id order
+    directory JSON list of [id, name] in book order (for client pickers)
+    metadata  JSON of the book's non-client keys (e.g. reportMetadata)
+    errors    JSON list of the client records rejected at compile time
+
+Opening a snapshot reads only the header; a client is located with a binary
+search over the mapped id column and only its own record is parsed, so cold
+start and per-client access do not grow with the size of the book.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from backend.database.persistence import _replace_atomically
+from backend.models.holdings import HoldingsTable, StringTables
+from backend.utils.fingerprint import data_fingerprint
+
+MAGIC = b"CBSNAP01"
+FORMAT_VERSION = 2
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGN = 8
+
+
+class SnapshotError(ValueError):
+    """A snapshot file is missing, truncated or of an unknown format"""
+
+
+def _encode_client(client: Dict) -> bytes:
+    return json.dumps(client, separators=(",", ":"), default=lambda value: value.to_records()).encode("utf-8")
+
+
+def compile_snapshot(source, output_path: str, strict: bool = False) -> Dict:
+    """Validate a client book (path or dict) and write it as a snapshot; returns the header"""
+    # Validation pulls in pydantic; readers of a compiled snapshot never need it
+    from backend.models.ingestion import ingest_book
+
+    ingestion = ingest_book(source, strict=strict)
+    book = ingestion.book
+    clients = book["clients"]
+
+    ids = [client["clientInfo"]["id"] for client in clients]
+    if len(set(ids)) != len(ids):
+        raise SnapshotError("Client ids must be unique to build a snapshot")
+    order = sorted(range(len(clients)), key=lambda position: ids[position])
+
+    records = [_encode_client(clients[position]) for position in order]
+    offsets = np.zeros(len(records) + 1, dtype="<u8")
+    np.cumsum([len(record) for record in records], out=offsets[1:])
+    id_width = max([len(client_id.encode("utf-8")) for client_id in ids] or [1])
+    id_column = np.array([ids[position].encode("utf-8") for position in order], dtype=f"S{id_width}")
+
+    sections = [
+        ("ids", id_column.tobytes()),
+        ("offsets", offsets.tobytes()),
+        ("records", b"".join(records)),
+        ("directory", json.dumps(
+            [[client["clientInfo"]["id"], client["clientInfo"]["name"]] for client in clients],
+            separators=(",", ":")
+        ).encode("utf-8")),
+        ("metadata", json.dumps(
+            {key: value for key, value in book.items() if key != "clients"}, separators=(",", ":")
+        ).encode("utf-8")),
+        ("errors", json.dumps(
+            [str(error) for error in ingestion.errors], separators=(",", ":")
+        ).encode("utf-8")),
+    ]
+
+    # Section offsets depend on the header length, which depends on the offsets:
+    # reserve a fixed-size header so they can be computed in one pass
+    header = {
+        "count": len(clients),
+        "id_width": id_width,
+        "content_hash": data_fingerprint(book),
+        "rejected": len(ingestion.errors),
+        "sections": {},
+    }
+    header_size = _aligned(len(json.dumps(header)) + 64 * len(sections) + 64)
+    position = _aligned(_PREAMBLE.size + header_size)
+    for name, payload in sections:
+        header["sections"][name] = [position, len(payload)]
+        position = _aligned(position + len(payload))
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8").ljust(header_size)
+
+    def write(path):
+        with open(path, "wb") as f:
+            f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, header_size))
+            f.write(header_bytes)
+            for name, payload in sections:
+                f.seek(header["sections"][name][0])
+                f.write(payload)
+            f.truncate(position)
+
+    directory = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(directory, exist_ok=True)
+    _replace_atomically(directory, os.path.basename(output_path), write)
+    return header
+
+
+def _aligned(position: int) -> int:
+    return (position + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class ClientBook:
+    """An already-loaded client book behind the same interface as ``ClientBookSnapshot``"""
+
+    def __init__(self, book: Dict):
+        self._book = book
+        self._by_id = {client["clientInfo"]["id"]: client for client in book.get("clients", [])}
+        self._content_hash = None
+
+    @property
+    def content_hash(self) -> str:
+        if self._content_hash is None:
+            self._content_hash = data_fingerprint(self._book)
+        return self._content_hash
+
+    @property
+    def metadata(self) -> Dict:
+        return {key: value for key, value in self._book.items() if key != "clients"}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, client_id: str) -> bool:
+        return client_id in self._by_id
+
+    def get(self, client_id: str) -> Optional[Dict]:
+        return self._by_id.get(client_id)
+
+    def client_directory(self) -> List[Tuple[str, str]]:
+        return [(client_id, client["clientInfo"]["name"]) for client_id, client in self._by_id.items()]
+
+    def iter_clients(self) -> Iterator[Dict]:
+        return iter(self._book.get("clients", []))
+
+    def to_book(self) -> Dict:
+        return self._book
+
+
+class ClientBookSnapshot:
+    """Read-only, lazily decoded view of a compiled client book"""
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, "rb") as f:
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Cannot open snapshot {path}: {e}")
+
+        try:
+            magic, version, header_size = _PREAMBLE.unpack_from(self._buffer, 0)
+            if magic != MAGIC:
+                raise SnapshotError(f"{path} is not a client book snapshot")
+            if version != FORMAT_VERSION:
+                raise SnapshotError(f"Snapshot format {version} is not supported (expected {FORMAT_VERSION})")
+            header = json.loads(self._buffer[_PREAMBLE.size:_PREAMBLE.size + header_size])
+            self.count = header["count"]
+            self.content_hash = header["content_hash"]
+            self._sections = header["sections"]
+            self._ids = np.frombuffer(self._buffer, dtype=f"S{header['id_width']}",
+                                      count=self.count, offset=self._sections["ids"][0])
+            self._offsets = np.frombuffer(self._buffer, dtype="<u8",
+                                          count=self.count + 1, offset=self._sections["offsets"][0])
+        except SnapshotError:
+            raise
+        except (struct.error, KeyError, ValueError) as e:
+            raise SnapshotError(f"Snapshot {path} is corrupted: {e}")
+        self._directory = None
+        self._metadata = None
+        self._errors = None
+        self._strings = StringTables()  # Holdings symbols and names decoded from this snapshot
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, client_id: str) -> bool:
+        return self._position(client_id) is not None
+
+    def get(self, client_id: str) -> Optional[Dict]:
+        """Decode one client's record, or None if the id is not in the book"""
+        position = self._position(client_id)
+        if position is None:
+            return None
+        return self._decode(position)
+
+    def client_directory(self) -> List[Tuple[str, str]]:
+        """(id, name) pairs in book order, without decoding any client records"""
+        if self._directory is None:
+            self._directory = [tuple(entry) for entry in json.loads(self._section("directory"))]
+        return self._directory
+
+    @property
+    def metadata(self) -> Dict:
+        if self._metadata is None:
+            self._metadata = json.loads(self._section("metadata"))
+        return self._metadata
+
+    @property
+    def ingestion_errors(self) -> List[str]:
+        """Client records rejected when the snapshot was compiled, as ingestion reported them"""
+        if self._errors is None:
+            self._errors = json.loads(self._section("errors"))
+        return self._errors
+
+    def iter_clients(self) -> Iterator[Dict]:
+        """Every client in book order (used when the whole book is needed, e.g. indexing)"""
+        for client_id, _ in self.client_directory():
+            yield self.get(client_id)
+
+    def to_book(self) -> Dict:
+        """Materialize the full clients.json-style book"""
+        book = dict(self.metadata)
+        book["clients"] = list(self.iter_clients())
+        return book
+
+    def close(self):
+        self._ids = self._offsets = None
+        self._buffer.close()
+
+    def _position(self, client_id: str) -> Optional[int]:
+        key = client_id.encode("utf-8")
+        position = int(np.searchsorted(self._ids, key))
+        if position < self.count and self._ids[position] == key:
+            return position
+        return None
+
+    def _decode(self, position: int) -> Dict:
+        start = self._sections["records"][0]
+        client = json.loads(self._buffer[start + int(self._offsets[position]):start + int(self._offsets[position + 1])])
+        client["topHoldings"] = HoldingsTable.from_records(client.get("topHoldings", []), self._strings)
+        return client
+
+    def _section(self, name: str) -> bytes:
+        start, length = self._sections[name]
+        return self._buffer[start:start + length]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compile clients.json into a memory-mapped snapshot")
+    parser.add_argument("source", nargs="?", default=os.path.join("data", "clients.json"))
+    parser.add_argument("output", nargs="?", default=os.path.join("data", "clients.snapshot"))
+    parser.add_argument("--strict", action="store_true", help="fail instead of skipping invalid clients")
+    args = parser.parse_args(argv)
+
+    try:
+        header = compile_snapshot(args.source, args.output, strict=args.strict)
+    except (OSError, ValueError) as e:
+        print(f"Snapshot failed: {e}")
+        return 1
+    print(
+        f"Wrote {args.output}: {header['count']} clients "
+        f"({header['rejected']} rejected), content hash {header['content_hash']}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
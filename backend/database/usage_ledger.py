@@ -0,0 +1,269 @@
+"""SQLite ledger of LLM calls: tokens, latency, model, caller, client and cost.
+
+    python -m backend.database.usage_ledger --by caller --since 7d
+    python -m backend.database.usage_ledger --by client_id --since 1d --limit 20
+
+Every call made through ChatService is recorded here, so spend and latency
+can be broken down by feature (caller), client, model or day.
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from backend.config import Config
+from backend.utils.metrics import metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_calls (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    model TEXT NOT NULL,
+    caller TEXT NOT NULL,
+    client_id TEXT,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    latency_seconds REAL NOT NULL,
+    cost_usd REAL NOT NULL,
+    success INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_calls_ts ON llm_calls (ts);
+CREATE INDEX IF NOT EXISTS llm_calls_client_ts ON llm_calls (client_id, ts);
+CREATE TABLE IF NOT EXISTS budget_alerts (
+    scope TEXT NOT NULL,
+    day TEXT NOT NULL,
+    spent_usd REAL NOT NULL,
+    ts REAL NOT NULL,
+    PRIMARY KEY (scope, day)
+);
+"""
+
+# Daily spend is tracked in memory and re-read from the ledger (which every
+# worker writes) at most this often per budget
+SPEND_REFRESH_SECONDS = 60
+
+# Columns aggregate() may group by (never interpolate anything else into SQL)
+GROUP_COLUMNS = {
+    "caller": "caller",
+    "client_id": "client_id",
+    "model": "model",
+    "day": "date(ts, 'unixepoch')",
+}
+
+
+def model_price(model: str) -> Tuple[float, float]:
+    """(prompt, completion) USD per million tokens from Config.LLM_PRICING.
+
+    Providers answer with dated snapshot names (e.g. "gpt-4o-mini-2024-07-18"),
+    so a model without its own entry is priced by the longest entry it starts with.
+    """
+    pricing = Config.LLM_PRICING
+    if model in pricing:
+        return pricing[model]
+    prefixes = [name for name in pricing if name != "default" and (model or "").startswith(f"{name}-")]
+    if prefixes:
+        return pricing[max(prefixes, key=len)]
+    return pricing.get("default", (0.0, 0.0))
+
+
+def call_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """USD cost from Config.LLM_PRICING (per million prompt / completion tokens)"""
+    prompt_price, completion_price = model_price(model)
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def _start_of_day(now: float) -> float:
+    day = datetime.fromtimestamp(now, tz=timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return day.timestamp()
+
+
+class UsageLedger:
+    """Append-only store of LLM calls with aggregation queries and daily budget alerts"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or Config.LLM_USAGE_DB_PATH
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+        # Today's spend per budget: (client_id or None, day start) -> [USD, monotonic time read]
+        self._daily_spend: Dict[Tuple[Optional[str], float], List[float]] = {}
+        self._alerted = set()  # Budgets already alerted today, by this or another worker
+        self._budget_lock = threading.Lock()
+        self.alert_handlers: List[Callable[[Dict], None]] = []
+
+    def record(self, model: str, caller: str, client_id: Optional[str], prompt_tokens: int,
+               completion_tokens: int, latency_seconds: float, success: bool = True,
+               timestamp: Optional[float] = None) -> float:
+        """Store one call and return its cost; checks the daily budgets afterwards"""
+        timestamp = time.time() if timestamp is None else timestamp
+        cost = call_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO llm_calls (ts, model, caller, client_id, prompt_tokens, completion_tokens, "
+                "latency_seconds, cost_usd, success) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (timestamp, model, caller, client_id, prompt_tokens, completion_tokens,
+                 latency_seconds, cost, int(success))
+            )
+        metrics.counter("llm_tokens_total", "LLM tokens by caller and kind").inc(
+            prompt_tokens, caller=caller, kind="prompt"
+        )
+        metrics.counter("llm_tokens_total", "LLM tokens by caller and kind").inc(
+            completion_tokens, caller=caller, kind="completion"
+        )
+        metrics.counter("llm_cost_usd_total", "Estimated LLM spend by caller").inc(cost, caller=caller)
+        self._check_budgets(client_id, timestamp, cost)
+        return cost
+
+    def aggregate(self, group_by: Sequence[str] = ("caller",), since: Optional[float] = None,
+                  until: Optional[float] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Calls, tokens, latency and cost grouped by any of caller, client_id, model and day"""
+        unknown = [column for column in group_by if column not in GROUP_COLUMNS]
+        if unknown:
+            raise ValueError(f"Cannot group by {unknown}; choose from {sorted(GROUP_COLUMNS)}")
+        selected = [f"{GROUP_COLUMNS[column]} AS {column}" for column in group_by]
+        sql = (
+            "SELECT " + ", ".join(selected + [
+                "COUNT(*) AS calls",
+                "SUM(1 - success) AS failures",
+                "SUM(prompt_tokens) AS prompt_tokens",
+                "SUM(completion_tokens) AS completion_tokens",
+                "AVG(latency_seconds) AS avg_latency_seconds",
+                "MAX(latency_seconds) AS max_latency_seconds",
+                "SUM(cost_usd) AS cost_usd",
+            ]) + " FROM llm_calls WHERE ts >= ? AND ts < ?"
+        )
+        if group_by:
+            sql += " GROUP BY " + ", ".join(GROUP_COLUMNS[column] for column in group_by)
+        sql += " ORDER BY cost_usd DESC"
+        params = [since or 0.0, until or float("inf")]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            cursor = self._connection.execute(sql, params)
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def spend(self, since: float, client_id: Optional[str] = None) -> float:
+        sql = "SELECT COALESCE(SUM(cost_usd), 0) FROM llm_calls WHERE ts >= ?"
+        params = [since]
+        if client_id is not None:
+            sql += " AND client_id = ?"
+            params.append(client_id)
+        with self._lock:
+            return self._connection.execute(sql, params).fetchone()[0]
+
+    def _check_budgets(self, client_id: Optional[str], now: float, cost: float):
+        day_start = _start_of_day(now)
+        checks = [("total", None, Config.LLM_DAILY_BUDGET_USD)]
+        if client_id is not None:
+            checks.append(("client", client_id, Config.LLM_CLIENT_DAILY_BUDGET_USD))
+        for scope, scope_client, budget in checks:
+            if not budget:
+                continue
+            key = (scope, scope_client, day_start)
+            if key in self._alerted:
+                continue
+            spent = self._spent_today(scope_client, day_start, cost)
+            if spent >= budget * Config.LLM_BUDGET_ALERT_RATIO:
+                self._alerted.add(key)
+                day = datetime.fromtimestamp(day_start, tz=timezone.utc).date().isoformat()
+                if self._claim_alert(scope if scope_client is None else f"client:{scope_client}", day, spent):
+                    self._alert({
+                        "scope": scope, "client_id": scope_client, "spent_usd": round(spent, 4),
+                        "budget_usd": budget, "day": day,
+                    })
+
+    def _spent_today(self, client_id: Optional[str], day_start: float, cost: float) -> float:
+        """Today's spend for one budget: the running total, refreshed from the ledger now and then"""
+        key = (client_id, day_start)
+        with self._budget_lock:
+            entry = self._daily_spend.get(key)
+            if entry is not None and time.monotonic() - entry[1] < SPEND_REFRESH_SECONDS:
+                entry[0] += cost
+                return entry[0]
+        # First call of the day for this budget, or a stale total: re-read (includes this call)
+        spent = self.spend(day_start, client_id)
+        with self._budget_lock:
+            if entry is None:
+                # New day: drop the previous days' totals
+                for old in [old for old in self._daily_spend if old[1] != day_start]:
+                    del self._daily_spend[old]
+            self._daily_spend[key] = [spent, time.monotonic()]
+        return spent
+
+    def _claim_alert(self, scope: str, day: str, spent: float) -> bool:
+        """Record the alert for (scope, day); False if another worker already raised it"""
+        with self._lock:
+            return self._connection.execute(
+                "INSERT OR IGNORE INTO budget_alerts (scope, day, spent_usd, ts) VALUES (?, ?, ?, ?)",
+                (scope, day, spent, time.time())
+            ).rowcount == 1
+
+    def _alert(self, alert: Dict):
+        label = "LLM spend" if alert["scope"] == "total" else f"LLM spend for client {alert['client_id']}"
+        print(f"Budget alert: {label} is ${alert['spent_usd']:.2f} of ${alert['budget_usd']:.2f} on {alert['day']}")
+        metrics.counter("llm_budget_alerts_total", "Daily LLM budget alerts raised").inc(scope=alert["scope"])
+        for handler in self.alert_handlers:
+            try:
+                handler(alert)
+            except Exception as e:
+                print(f"Budget alert handler failed: {e}")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+_default_ledger = None
+_default_lock = threading.Lock()
+
+
+def get_usage_ledger() -> Optional[UsageLedger]:
+    """The process-wide ledger at Config.LLM_USAGE_DB_PATH, or None when accounting is off"""
+    global _default_ledger
+    if not Config.LLM_USAGE_ENABLED:
+        return None
+    if _default_ledger is None:
+        with _default_lock:
+            if _default_ledger is None:
+                _default_ledger = UsageLedger()
+    return _default_ledger
+
+
+def _parse_since(value: str) -> float:
+    """'7d', '12h', '30m' or an ISO date"""
+    units = {"d": 86400, "h": 3600, "m": 60}
+    if value[-1:] in units and value[:-1].isdigit():
+        return time.time() - int(value[:-1]) * units[value[-1]]
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Summarize recorded LLM usage")
+    parser.add_argument("--db", default=None, help="ledger path (default: Config.LLM_USAGE_DB_PATH)")
+    parser.add_argument("--by", nargs="+", default=["caller"], choices=sorted(GROUP_COLUMNS))
+    parser.add_argument("--since", default="7d", help="e.g. 1d, 12h or 2024-06-01")
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    ledger = UsageLedger(args.db)
+    rows = ledger.aggregate(args.by, since=_parse_since(args.since), limit=args.limit)
+    header = "".join(f"{column:<22}" for column in args.by)
+    print(f"{header}{'calls':>8}{'fail':>6}{'prompt tok':>12}{'compl tok':>11}{'avg s':>8}{'max s':>8}{'cost $':>10}")
+    for row in rows:
+        keys = "".join(f"{str(row[column]):<22}" for column in args.by)
+        print(
+            f"{keys}{row['calls']:>8}{row['failures']:>6}{row['prompt_tokens']:>12,}{row['completion_tokens']:>11,}"
+            f"{row['avg_latency_seconds']:>8.2f}{row['max_latency_seconds']:>8.2f}{row['cost_usd']:>10.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
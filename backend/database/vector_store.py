@@ -4,115 +4,156 @@ try:
 except ImportError:
     raise ImportError("LangChain not installed! Run 'pip install langchain==0.3.18'")
 
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
 import json
 import os
+import re
+
+import numpy as np
 
 # Import with proper error handling for Pydantic compatibility
 try:
+    from langchain_community.docstore.in_memory import InMemoryDocstore
     from langchain_community.vectorstores import FAISS
-    from langchain_openai import OpenAIEmbeddings
-    from langchain_core.caches import BaseCache
-    
-    # Force model rebuilding for compatibility
-    try:
-        OpenAIEmbeddings.model_rebuild()
-    except Exception as e:
-        print(f"OpenAIEmbeddings model rebuild warning: {e}")
-        
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import Embeddings
 except ImportError as e:
     raise ImportError(f"Required LangChain components not available: {e}")
 
 from backend.config import Config
-from backend.services.market_service import MarketService
+from backend.database.embeddings import create_embeddings, embed_queries, embedding_signature
+from backend.database.index_factory import build_index, configure_index
+from backend.database.lexical_index import BM25Index, reciprocal_rank_fusion
+from backend.database.quota import BATCH, current_priority, quota_priority
+from backend.database.persistence import (
+    StoreFormatError, build_manifest, incompatibility, load_store, read_manifest, save_store, store_lock
+)
+from backend.models.holdings import HoldingsTable
+from backend.utils.fingerprint import data_fingerprint
+from backend.utils.metrics import metrics
+
+# Candidate ticker symbols as typed by the user (e.g. "AAPL", "US10Y", "BRK.B")
+SYMBOL_PATTERN = re.compile(r"\b[A-Z][A-Z0-9]*(?:\.[A-Z0-9]+)?\b")
 
 class VectorStore:
-    def __init__(self):
+    def __init__(self, embeddings: Optional[Embeddings] = None):
         try:
-            # Initialize embeddings with correct parameter name and error handling
-            self.embeddings = OpenAIEmbeddings(
-                model=Config.EMBEDDING_MODEL,
-                openai_api_key=Config.OPENAI_API_KEY,
-                dimensions=1536  # Move dimensions to top-level parameter
-            )
-            self.vector_store = None
+            # Pluggable embedding backend (OpenAI by default, local for offline use)
+            self.embeddings = embeddings or create_embeddings()
+            self.index = None  # Raw FAISS index; row i is document i
+            self._langchain_store = None
             
-            # Try to load existing vector store with security override
+            self.manifest = None  # Manifest of the persisted store this index came from
+            self.source_hash = None  # Fingerprint of the client book the index was built from
+            
+            # Row-aligned document table plus lexical and lookup indexes.
+            # Loaded stores fill these lazily on first use.
+            self._texts: List[str] = []
+            self._metadatas: List[Dict] = []
+            self._documents_loader = None
+            self.lexical_index = BM25Index()
+            self._client_rows: Dict[str, List[int]] = {}
+            self._symbol_rows: Dict[str, List[int]] = {}
+            
+            # Try to load an existing vector store (memory-mapped when possible)
             if os.path.exists(Config.VECTOR_STORE_PATH):
-                self.load_from_disk(Config.VECTOR_STORE_PATH)
+                try:
+                    self.load_from_disk(Config.VECTOR_STORE_PATH)
+                except StoreFormatError as e:
+                    print(f"Ignoring persisted vector store: {e}")
                 
         except Exception as e:
             print(f"Vector store initialization error: {str(e)}")
-            raise ValueError(f"Failed to initialize OpenAIEmbeddings: {str(e)}")
+            raise ValueError(f"Failed to initialize embeddings: {str(e)}")
 
-    def initialize_from_json(self, json_data: Dict):
-        """Initialize vector store from client data with detailed financial information"""
-        try:
-            texts = []
-            metadatas = []
+    @staticmethod
+    def build_documents(json_data: Dict) -> Tuple[List[str], List[Dict]]:
+        """Generate the client, financial, allocation and holding texts for indexing"""
+        texts = []
+        metadatas = []
+        
+        for client in json_data.get("clients", []):
+            client_info = client.get("clientInfo", {})
+            portfolio = client.get("portfolioSummary", {})
+            holdings = HoldingsTable.coerce(client.get("topHoldings"))
+            asset_allocation = client.get("assetAllocation", {})
             
-            for client in json_data.get("clients", []):
-                client_info = client.get("clientInfo", {})
-                portfolio = client.get("portfolioSummary", {})
-                holdings = client.get("topHoldings", [])
-                asset_allocation = client.get("assetAllocation", {})
-                
-                # Basic client information
-                client_text = (
-                    f"Client {client_info.get('name')} (ID: {client_info.get('id')}) "
-                    f"has a {client_info.get('accountType')} with a {client_info.get('riskProfile')} "
-                    f"risk profile. Their portfolio value is ${portfolio.get('totalValue', 0):,.2f}."
-                )
-                texts.append(client_text)
-                metadatas.append({"client_id": client_info.get('id')})
-                
-                # Detailed financial information
-                financial_text = (
-                    f"Financial details for {client_info.get('name')}: "
-                    f"Total Value: ${portfolio.get('totalValue', 0):,.2f}, "
-                    f"Beginning Balance: ${portfolio.get('beginningBalance', 0):,.2f}, "
-                    f"Realized Gains: ${portfolio.get('realizedGains', 0):,.2f}, "
-                    f"Unrealized Gains: ${portfolio.get('unrealizedGains', 0):,.2f}, "
-                    f"Income Earned: ${portfolio.get('incomeEarned', 0):,.2f}, "
-                    f"Total Gains: ${portfolio.get('realizedGains', 0) + portfolio.get('unrealizedGains', 0):,.2f}"
-                )
-                texts.append(financial_text)
-                metadatas.append({"client_id": client_info.get('id'), "type": "financial"})
-                
-                # Asset allocation details
-                allocation_text = (
-                    f"Asset allocation for {client_info.get('name')}: "
-                    f"Equities {asset_allocation.get('equities', {}).get('percentage', 0)}% "
-                    f"(${asset_allocation.get('equities', {}).get('value', 0):,.2f}), "
-                    f"Fixed Income {asset_allocation.get('fixedIncome', {}).get('percentage', 0)}% "
-                    f"(${asset_allocation.get('fixedIncome', {}).get('value', 0):,.2f}), "
-                    f"Alternatives {asset_allocation.get('alternatives', {}).get('percentage', 0)}%, "
-                    f"Cash {asset_allocation.get('cash', {}).get('percentage', 0)}%"
+            # Basic client information
+            client_text = (
+                f"Client {client_info.get('name')} (ID: {client_info.get('id')}) "
+                f"has a {client_info.get('accountType')} with a {client_info.get('riskProfile')} "
+                f"risk profile. Their portfolio value is ${portfolio.get('totalValue', 0):,.2f}."
+            )
+            texts.append(client_text)
+            metadatas.append({"client_id": client_info.get('id')})
+            
+            # Detailed financial information
+            financial_text = (
+                f"Financial details for {client_info.get('name')}: "
+                f"Total Value: ${portfolio.get('totalValue', 0):,.2f}, "
+                f"Beginning Balance: ${portfolio.get('beginningBalance', 0):,.2f}, "
+                f"Realized Gains: ${portfolio.get('realizedGains', 0):,.2f}, "
+                f"Unrealized Gains: ${portfolio.get('unrealizedGains', 0):,.2f}, "
+                f"Income Earned: ${portfolio.get('incomeEarned', 0):,.2f}, "
+                f"Total Gains: ${portfolio.get('realizedGains', 0) + portfolio.get('unrealizedGains', 0):,.2f}"
+            )
+            texts.append(financial_text)
+            metadatas.append({"client_id": client_info.get('id'), "type": "financial"})
+            
+            # Asset allocation details
+            allocation_text = (
+                f"Asset allocation for {client_info.get('name')}: "
+                f"Equities {asset_allocation.get('equities', {}).get('percentage', 0)}% "
+                f"(${asset_allocation.get('equities', {}).get('value', 0):,.2f}), "
+                f"Fixed Income {asset_allocation.get('fixedIncome', {}).get('percentage', 0)}% "
+                f"(${asset_allocation.get('fixedIncome', {}).get('value', 0):,.2f}), "
+                f"Alternatives {asset_allocation.get('alternatives', {}).get('percentage', 0)}%, "
+                f"Cash {asset_allocation.get('cash', {}).get('percentage', 0)}%"
+            )
+            texts.append(allocation_text)
+            metadatas.append({"client_id": client_info.get('id'), "type": "allocation"})
+            
+            # Holdings information  
+            for name, security, value, weight, gain in zip(
+                holdings.names, holdings.securities,
+                holdings.value.tolist(), holdings.weight.tolist(), holdings.gain.tolist()
+            ):
+                holding_text = (
+                    f"Top holding for {client_info.get('name')}: "
+                    f"{name} ({security}) "
+                    f"worth ${value:,.2f} "
+                    f"({weight}% of portfolio), "
+                    f"gain: ${gain:,.2f}"
                 )
-                texts.append(allocation_text)
-                metadatas.append({"client_id": client_info.get('id'), "type": "allocation"})
-                
-                # Holdings information  
-                for holding in holdings:
-                    holding_text = (
-                        f"Top holding for {client_info.get('name')}: "
-                        f"{holding.get('name')} ({holding.get('security')}) "
-                        f"worth ${holding.get('value', 0):,.2f} "
-                        f"({holding.get('weight', 0)}% of portfolio), "
-                        f"gain: ${holding.get('gain', 0):,.2f}"
-                    )
-                    texts.append(holding_text)
-                    metadatas.append({"client_id": client_info.get('id'), "type": "holding"})
+                texts.append(holding_text)
+                metadatas.append({
+                    "client_id": client_info.get('id'),
+                    "type": "holding",
+                    "security": security
+                })
+        
+        return texts, metadatas
+
+    def initialize_from_json(self, json_data: Dict, reuse_existing: bool = False):
+        """Initialize vector store from client data with detailed financial information.
+
+        With ``reuse_existing`` the vectors of documents whose text is unchanged
+        are taken from the current index, so only new or edited documents are embedded.
+        """
+        try:
+            texts, metadatas = self.build_documents(json_data)
             
             if texts:
                 # Create vector store with error handling
                 try:
-                    self.vector_store = FAISS.from_texts(
-                        texts=texts,
-                        embedding=self.embeddings,
-                        metadatas=metadatas
-                    )
-                    print(f"Successfully created vector store with {len(texts)} documents")
+                    vectors = self._embed_documents(texts, reuse_existing)
+                    with metrics.span("index_build", index_type=Config.FAISS_INDEX_TYPE):
+                        index = build_index(vectors, Config.FAISS_INDEX_TYPE)
+                    self._set_documents(texts, metadatas)
+                    self.index = index
+                    self.manifest = None
+                    self.source_hash = data_fingerprint(json_data)
+                    print(f"Successfully created {type(index).__name__} vector store with {len(texts)} documents")
                 except Exception as e:
                     print(f"Error creating FAISS vector store: {e}")
                     raise
@@ -121,55 +162,292 @@ class VectorStore:
             print(f"Error in initialize_from_json: {str(e)}")
             raise ValueError(f"Failed to initialize vector store from JSON: {str(e)}")
 
-    def search(self, query: str, client_id: str = None, k: int = 3) -> List[Dict]:
-        """Search the vector store with optional client filtering"""
-        if not self.vector_store:
+    def _embed_documents(self, texts: List[str], reuse_existing: bool) -> np.ndarray:
+        previous_rows = {}
+        if reuse_existing and self.index is not None:
+            previous_rows = {text: row for row, text in enumerate(self.texts)}
+        reused = [(position, previous_rows[text]) for position, text in enumerate(texts) if text in previous_rows]
+        missing = [position for position, text in enumerate(texts) if text not in previous_rows]
+
+        dimensions = self.index.d if reused else None
+        embedded = None
+        if missing:
+            embedded = self._embed_for_index([texts[position] for position in missing])
+            dimensions = embedded.shape[1]
+
+        vectors = np.empty((len(texts), dimensions), dtype=np.float32)
+        if reused:
+            positions, rows = zip(*reused)
+            vectors[list(positions)] = self.index.reconstruct_batch(np.asarray(rows, dtype=np.int64))
+        if missing:
+            vectors[missing] = embedded
+        if reuse_existing:
+            print(f"Incremental rebuild: reused {len(reused)} vectors, embedded {len(missing)} documents")
+        return vectors
+
+    def _embed_for_index(self, texts: List[str]) -> np.ndarray:
+        """Embed documents in chunks of Config.EMBEDDING_BUILD_CHUNK_TEXTS.
+
+        Builds larger than an interactive batch run at batch quota priority,
+        so live searches and chat get API capacity between chunks.
+        """
+        bulk = len(texts) > Config.EMBEDDING_INTERACTIVE_MAX_TEXTS
+        chunk = Config.EMBEDDING_BUILD_CHUNK_TEXTS
+        embedded = []
+        with quota_priority(BATCH if bulk else current_priority()):
+            for start in range(0, len(texts), chunk):
+                with metrics.span("embedding", purpose="index"):
+                    embedded.extend(self.embeddings.embed_documents(texts[start:start + chunk]))
+        return np.asarray(embedded, dtype=np.float32)
+
+    def load_or_build(self, json_data: Union[Dict, Callable[[], Dict]],
+                      directory: str = Config.VECTOR_STORE_PATH, source_hash: Optional[str] = None):
+        """Use the persisted store when it matches ``json_data``, otherwise rebuild and persist it.
+
+        Compatibility is checked from the manifest alone. A store built from an
+        older version of the book is rebuilt incrementally (only changed
+        documents are re-embedded); an incompatible or corrupted one is
+        rebuilt from scratch. ``json_data`` may be a callable that loads the
+        book; together with a known ``source_hash`` (e.g. a snapshot's content
+        hash) the book is then only materialized when a rebuild is needed.
+        Rebuilds hold the store's lock, so concurrent workers build it once.
+        """
+        if source_hash is None:
+            if callable(json_data):
+                json_data = json_data()
+            source_hash = data_fingerprint(json_data)
+        reason = self._load_persisted(directory)
+        if reason is None and self.source_hash == source_hash:
+            print(f"Reusing persisted vector store with {self.manifest['document_count']} documents")
+            return
+
+        with store_lock(directory):
+            # Another worker may have rebuilt the store while this one waited
+            reason = self._load_persisted(directory)
+            if reason is None and self.source_hash == source_hash:
+                print(f"Reusing vector store rebuilt by another worker ({self.manifest['document_count']} documents)")
+                return
+            if callable(json_data):
+                json_data = json_data()
+            if reason is None:
+                print(f"Vector store at {directory} is stale; rebuilding changed documents")
+                try:
+                    self.initialize_from_json(json_data, reuse_existing=True)
+                except ValueError as e:
+                    print(f"Incremental rebuild failed, rebuilding from scratch: {e}")
+                    self.index = None
+                    self.initialize_from_json(json_data)
+            else:
+                print(f"Rebuilding vector store at {directory}: {reason}")
+                self.index = None
+                self.initialize_from_json(json_data)
+            if self.index is not None:
+                self._save(directory)
+
+    def _load_persisted(self, directory: str) -> Optional[str]:
+        """Load the live persisted store unless already loaded; return why it is unusable, or None"""
+        try:
+            manifest = read_manifest(directory)
+            reason = incompatibility(manifest, embedding_signature(self.embeddings))
+            if reason is None and self.manifest != manifest:
+                self.load_from_disk(directory)
+            return reason
+        except StoreFormatError as e:
+            return str(e)
+
+    @property
+    def texts(self) -> List[str]:
+        self._ensure_documents()
+        return self._texts
+
+    @property
+    def metadatas(self) -> List[Dict]:
+        self._ensure_documents()
+        return self._metadatas
+
+    def _ensure_documents(self):
+        """Load the persisted document table on first use"""
+        if self._documents_loader is not None:
+            loader, self._documents_loader = self._documents_loader, None
+            self._set_documents(*loader())
+
+    @property
+    def vector_store(self) -> Optional[FAISS]:
+        """LangChain FAISS view over the index, built on first access"""
+        if self.index is None:
+            return None
+        if self._langchain_store is None or self._langchain_store.index is not self.index:
+            self._langchain_store = self._wrap_index(self.index, self.texts, self.metadatas)
+        return self._langchain_store
+
+    def _wrap_index(self, index, texts: List[str], metadatas: List[Dict]) -> FAISS:
+        """Wrap a raw FAISS index in LangChain's FAISS store (docstore id == index row)"""
+        ids = [str(row) for row in range(len(texts))]
+        docstore = InMemoryDocstore({
+            doc_id: Document(id=doc_id, page_content=text, metadata=metadata)
+            for doc_id, text, metadata in zip(ids, texts, metadatas)
+        })
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=dict(enumerate(ids))
+        )
+
+    def _set_documents(self, texts: List[str], metadatas: List[Dict]):
+        """Index the row-aligned documents for lexical, per-client and symbol lookup"""
+        self._texts = texts
+        self._metadatas = metadatas
+        self.lexical_index = BM25Index()
+        self.lexical_index.add(texts)
+        self._client_rows = {}
+        self._symbol_rows = {}
+        for row, metadata in enumerate(metadatas):
+            self._client_rows.setdefault(metadata.get('client_id'), []).append(row)
+            if metadata.get('security'):
+                self._symbol_rows.setdefault(metadata['security'].upper(), []).append(row)
+
+    def search(self, query: str, client_id: str = None, k: int = 3,
+               query_vector: Optional[np.ndarray] = None) -> List[Tuple[str, Dict, float]]:
+        """Hybrid lexical + vector search with optional client filtering.
+
+        Returns ``(content, metadata, score)`` tuples, best first, where score
+        is the fused relevance (higher is better). Questions naming a held
+        ticker symbol are answered from the symbol index without embedding.
+        Pass ``query_vector`` when the query's embedding is already known.
+        """
+        query_vectors = [query_vector] if query_vector is not None else None
+        return self.search_many([query], client_id=client_id, k=k, query_vectors=query_vectors)[0]
+
+    def search_many(self, queries: List[str], client_id: str = None, k: int = 3,
+                    query_vectors: Optional[List[Optional[np.ndarray]]] = None) -> List[List[Tuple[str, Dict, float]]]:
+        """Run several searches with one FAISS call.
+
+        Results are grouped per query, in the order of ``queries``, each in
+        the same form as ``search``. ``query_vectors`` optionally holds known
+        embeddings per query (None where unknown); only the rest are embedded.
+        """
+        if self.index is None:
             print("Vector store not initialized")
-            return []
+            return [[] for _ in queries]
             
         try:
-            # Clean and prepare the query
-            query = query.lower().strip()
+            self._ensure_documents()
             
-            # Get search results
-            results = self.vector_store.similarity_search_with_score(query, k=k)
+            # Keep the original case: "AAPL" is a symbol, "aapl" is just a word
+            queries = [query.strip() for query in queries]
+            candidates = max(k, Config.HYBRID_CANDIDATES)
             
-            # Filter results by client_id if provided
+            # Restrict every stage to this client's rows so other clients never leak in
+            allowed = None
             if client_id:
-                filtered_results = [
-                    (doc, score) for doc, score in results
-                    if doc.metadata.get('client_id') == client_id
-                ]
-                results = filtered_results if filtered_results else results[:1]
+                allowed = set(self._client_rows.get(client_id, []))
+                if not allowed:
+                    return [[] for _ in queries]
             
-            return [(doc.page_content, doc.metadata, score) for doc, score in results]
+            # Exact-symbol questions resolve locally; only the rest need embeddings
+            symbol_rows = [self._match_symbols(query, allowed) for query in queries]
+            to_embed = [i for i, rows in enumerate(symbol_rows) if not rows]
+            dense_rows = {}
+            if to_embed:
+                vectors = self._embed_queries(queries, to_embed, query_vectors)
+                with metrics.span("faiss_search"):
+                    dense_rows = dict(zip(to_embed, self._dense_search(vectors, candidates, allowed)))
+            
+            results = []
+            for i, query in enumerate(queries):
+                with metrics.span("lexical_search"):
+                    lexical_rows = [row for row, _ in self.lexical_index.search(query, k=candidates, allowed=allowed)]
+                # Symbol hits are padded with lexical matches; others fuse dense + lexical
+                primary = symbol_rows[i] or dense_rows.get(i, [])
+                ranked = reciprocal_rank_fusion([primary, lexical_rows])
+                results.append([(self.texts[row], self.metadatas[row], score) for row, score in ranked[:k]])
+            return results
             
         except Exception as e:
             print(f"Search error: {str(e)}")
-            return []
+            return [[] for _ in queries]
+
+    def _embed_queries(self, queries: List[str], positions: List[int],
+                       query_vectors: Optional[List[Optional[np.ndarray]]]) -> np.ndarray:
+        """Embeddings for ``queries`` at ``positions``, reusing the vectors the caller passed.
+
+        The rest are embedded in one request where the backend allows it (see embed_queries).
+        """
+        known = query_vectors or [None] * len(queries)
+        missing = [i for i in positions if known[i] is None]
+        embedded = {}
+        if missing:
+            with metrics.span("embedding", purpose="query"):
+                embedded = dict(zip(missing, embed_queries(self.embeddings, [queries[i] for i in missing])))
+        return np.asarray(
+            [known[i] if known[i] is not None else embedded[i] for i in positions], dtype=np.float32
+        )
+
+    def _match_symbols(self, query: str, allowed: Optional[Set[int]]) -> List[int]:
+        rows = []
+        for symbol in SYMBOL_PATTERN.findall(query):
+            for row in self._symbol_rows.get(symbol, []):
+                if (allowed is None or row in allowed) and row not in rows:
+                    rows.append(row)
+        return rows
+
+    def _dense_search(self, vectors: np.ndarray, k: int, allowed: Optional[Set[int]]) -> List[List[int]]:
+        """Nearest rows per query vector, optionally restricted to ``allowed``"""
+        index = self.index
+        if allowed is not None and len(allowed) <= Config.SCOPED_EXACT_SEARCH_MAX_ROWS:
+            # A client's rows are few: score them exactly. Filtered ANN search
+            # (HNSW, IVF) misses most results under such a tight filter.
+            rows = np.fromiter(allowed, dtype=np.int64, count=len(allowed))
+            candidates = index.reconstruct_batch(rows)
+            distances = (
+                (vectors ** 2).sum(axis=1)[:, None]
+                - 2 * vectors @ candidates.T
+                + (candidates ** 2).sum(axis=1)[None, :]
+            )
+            order = np.argsort(distances, axis=1)[:, :k]
+            return [[int(rows[i]) for i in query_order] for query_order in order]
+        fetch = k if allowed is None else k * 10
+        _, ids = index.search(vectors, min(fetch, index.ntotal))
+        return [
+            [int(row) for row in query_ids if row != -1 and (allowed is None or int(row) in allowed)][:k]
+            for query_ids in ids
+        ]
 
     def save_to_disk(self, directory: str = "vector_store"):
-        """Save the vector store to disk"""
-        if not self.vector_store:
+        """Save index bytes, the columnar document table and a versioned manifest"""
+        if self.index is None:
             raise ValueError("Vector store not initialized")
-        
+        with store_lock(directory):
+            self._save(directory)
+
+    def _save(self, directory: str):
+        """save_to_disk() for callers already holding the store's lock"""
         try:
-            os.makedirs(directory, exist_ok=True)
-            self.vector_store.save_local(directory)
+            manifest = build_manifest(
+                embedding_signature(self.embeddings), self.index, self.source_hash, len(self.texts)
+            )
+            self.manifest = save_store(directory, self.index, self.texts, self.metadatas, manifest)
             print(f"Vector store saved to {directory}")
         except Exception as e:
             print(f"Error saving vector store: {e}")
             raise
         
     def load_from_disk(self, path: str):
-        """Load vector store with explicit deserialization permission"""
-        try:
-            self.vector_store = FAISS.load_local(
-                folder_path=path,
-                embeddings=self.embeddings,
-                allow_dangerous_deserialization=True  # Security override
-            )
-            print(f"Vector store loaded from {path}")
-        except Exception as e:
-            print(f"Error loading vector store from {path}: {e}")
-            # Don't raise error here, just log it 
\ No newline at end of file
+        """Load a versioned store: index memory-mapped read-only, documents on first use.
+
+        Raises StoreFormatError when the store is missing, corrupted or was
+        built with different embeddings.
+        """
+        manifest = read_manifest(path)
+        reason = incompatibility(manifest, embedding_signature(self.embeddings))
+        if reason is not None:
+            raise StoreFormatError(f"Cannot use vector store at {path}: {reason}")
+        
+        index, load_documents = load_store(path, manifest, mmap=True, verify=Config.VECTOR_STORE_VERIFY_ON_LOAD)
+        configure_index(index)
+        self.index = index
+        self.manifest = manifest
+        self.source_hash = manifest.get("source_hash")
+        self._documents_loader = load_documents
+        print(f"Vector store loaded from {path}")
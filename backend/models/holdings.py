@@ -0,0 +1,149 @@
+import sys
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+NUMERIC_FIELDS = ('value', 'weight', 'gain')
+
+
+class _Interner:
+    """String table: each distinct symbol/name is stored once and referenced by code"""
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self._strings: List[str] = []
+        self._lock = threading.Lock()
+
+    def encode(self, values: Iterable[str]) -> np.ndarray:
+        codes = self._codes
+        strings = self._strings
+        out = []
+        with self._lock:
+            for value in values:
+                value = '' if value is None else str(value)
+                code = codes.get(value)
+                if code is None:
+                    code = len(strings)
+                    value = sys.intern(value)
+                    codes[value] = code
+                    strings.append(value)
+                out.append(code)
+        return np.asarray(out, dtype=np.int32)
+
+    def decode(self, codes: np.ndarray) -> List[str]:
+        strings = self._strings
+        return [strings[code] for code in codes.tolist()]
+
+
+class StringTables:
+    """Security and name tables shared by the holdings of one book.
+
+    Scoped to the book (or snapshot) that owns them, so reloading the book
+    releases the strings of the previous version with it.
+    """
+    __slots__ = ('securities', 'names')
+
+    def __init__(self):
+        self.securities = _Interner()
+        self.names = _Interner()
+
+
+class HoldingsTable:
+    """Column-oriented holdings: interned security/name codes plus float64 value, weight and gain.
+
+    Replaces a list of per-holding dicts. Iterating still yields plain dict
+    rows, so templates and code written against ``topHoldings`` keep working,
+    while sorting, top-N and weight maths run as numpy operations.
+    """
+    __slots__ = ('security_codes', 'name_codes', 'value', 'weight', 'gain', 'strings')
+
+    def __init__(self, security_codes: np.ndarray, name_codes: np.ndarray,
+                 value: np.ndarray, weight: np.ndarray, gain: np.ndarray, strings: StringTables):
+        self.security_codes = security_codes
+        self.name_codes = name_codes
+        self.value = value
+        self.weight = weight
+        self.gain = gain
+        self.strings = strings
+
+    @classmethod
+    def from_records(cls, records: List[Dict], strings: Optional[StringTables] = None) -> 'HoldingsTable':
+        """Build a table; pass the book's ``strings`` so its clients share one copy of each symbol"""
+        strings = strings or StringTables()
+        return cls(
+            strings.securities.encode(record.get('security') for record in records),
+            strings.names.encode(record.get('name') for record in records),
+            *(np.fromiter((record.get(field) or 0.0 for record in records), dtype=np.float64, count=len(records))
+              for field in NUMERIC_FIELDS),
+            strings
+        )
+
+    @classmethod
+    def coerce(cls, holdings: Union['HoldingsTable', List[Dict], None]) -> 'HoldingsTable':
+        """Accept either a table or the raw ``topHoldings`` list"""
+        if isinstance(holdings, cls):
+            return holdings
+        return cls.from_records(holdings or [])
+
+    def __repr__(self) -> str:
+        return f"HoldingsTable({len(self)} holdings)"
+
+    def __len__(self) -> int:
+        return len(self.value)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.to_records())
+
+    def __getitem__(self, position: Union[int, slice]) -> Union[Dict, 'HoldingsTable']:
+        """A row as a dict, or a table of the rows for a slice"""
+        if isinstance(position, slice):
+            return self._take(position)
+        return self._take(np.asarray([position])).to_records()[0]
+
+    @property
+    def securities(self) -> List[str]:
+        return self.strings.securities.decode(self.security_codes)
+
+    @property
+    def names(self) -> List[str]:
+        return self.strings.names.decode(self.name_codes)
+
+    def to_records(self) -> List[Dict]:
+        """Rows as plain dicts, in the clients.json ``topHoldings`` layout"""
+        return [
+            {'security': security, 'name': name, 'value': value, 'weight': weight, 'gain': gain}
+            for security, name, value, weight, gain in zip(
+                self.securities, self.names, self.value.tolist(), self.weight.tolist(), self.gain.tolist()
+            )
+        ]
+
+    def sorted_by(self, field: str = 'value', descending: bool = True) -> 'HoldingsTable':
+        column = getattr(self, field)
+        order = np.argsort(-column if descending else column, kind='stable')
+        return self._take(order)
+
+    def top(self, n: int, field: str = 'value') -> 'HoldingsTable':
+        """The ``n`` largest holdings by ``field``, largest first"""
+        column = getattr(self, field)
+        if n >= len(column):
+            return self.sorted_by(field)
+        # Partition first so only the n winners are sorted
+        winners = np.argpartition(-column, n)[:n]
+        return self._take(winners[np.argsort(-column[winners], kind='stable')])
+
+    def largest(self, field: str = 'value') -> Dict:
+        return self[int(np.argmax(getattr(self, field)))]
+
+    def normalized_weights(self) -> np.ndarray:
+        """Weights (%) recomputed from market value so they sum to 100 across these holdings"""
+        total = self.value.sum()
+        if total == 0:
+            return np.zeros_like(self.value)
+        return self.value / total * 100.0
+
+    def _take(self, positions: Union[np.ndarray, slice]) -> 'HoldingsTable':
+        return HoldingsTable(
+            self.security_codes[positions], self.name_codes[positions],
+            self.value[positions], self.weight[positions], self.gain[positions], self.strings
+        )
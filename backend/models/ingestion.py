@@ -0,0 +1,112 @@
+import json
+from typing import Dict, List, Optional, Union
+
+from pydantic import TypeAdapter, ValidationError
+
+from backend.models.holdings import HoldingsTable, StringTables
+from backend.models.portfolio import Portfolio
+
+# One adapter validates the whole book in a single pass through pydantic-core
+_book_adapter = TypeAdapter(List[Portfolio])
+
+# Fields we add on load and never write back into the client dicts
+_DERIVED_FIELDS = {'last_updated'}
+
+MAX_REPORTED_ERRORS = 10
+
+
+class ClientIngestionError:
+    """Every problem found in one client record, with JSON-style field paths"""
+    __slots__ = ('index', 'client_id', 'problems')
+
+    def __init__(self, index: int, client_id: Optional[str], problems: List[str]):
+        self.index = index
+        self.client_id = client_id
+        self.problems = problems
+
+    def __str__(self):
+        label = self.client_id or f"#{self.index}"
+        return f"Client {label}: " + "; ".join(self.problems)
+
+
+class IngestionResult:
+    """Validated clients plus the records that were rejected"""
+    __slots__ = ('portfolios', 'book', 'errors')
+
+    def __init__(self, portfolios: List[Portfolio], book: Dict, errors: List[ClientIngestionError]):
+        self.portfolios = portfolios
+        # Same layout as clients.json, holding only the normalized valid clients
+        self.book = book
+        self.errors = errors
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def validate_clients(records: List[Dict]) -> tuple:
+    """Validate client records in one batch, returning (portfolios, kept_indices, errors).
+
+    The whole list goes through pydantic in one call. If anything fails,
+    errors are grouped per client and the clean records are re-validated
+    together, so one bad record never costs a per-record Python loop.
+    """
+    try:
+        return _book_adapter.validate_python(records), list(range(len(records))), []
+    except ValidationError as e:
+        problems = {}
+        for error in e.errors(include_url=False):
+            index, *path = error['loc']
+            location = '.'.join(str(part) for part in path) or '<record>'
+            problems.setdefault(index, []).append(f"{location}: {error['msg']}")
+
+    errors = [
+        ClientIngestionError(index, _client_id(records[index]), messages)
+        for index, messages in sorted(problems.items())
+    ]
+    kept = [i for i in range(len(records)) if i not in problems]
+    portfolios = _book_adapter.validate_python([records[i] for i in kept]) if kept else []
+    return portfolios, kept, errors
+
+
+def ingest_book(source: Union[str, Dict], strict: bool = False) -> IngestionResult:
+    """Load clients.json (path or parsed dict) into validated, normalized clients.
+
+    Invalid clients are reported in ``errors`` and left out of ``book``; with
+    ``strict`` the first failure raises ``ValueError`` listing every problem.
+    """
+    if isinstance(source, str):
+        with open(source, 'r', encoding='utf-8') as f:
+            source = json.load(f)
+
+    records = source.get('clients', [])
+    if not isinstance(records, list):
+        raise ValueError("'clients' must be a list of client records")
+
+    portfolios, kept, errors = validate_clients(records)
+    if errors:
+        print(f"Rejected {len(errors)} of {len(records)} client records")
+        for error in errors[:MAX_REPORTED_ERRORS]:
+            print(f"  {error}")
+        if len(errors) > MAX_REPORTED_ERRORS:
+            print(f"  ... and {len(errors) - MAX_REPORTED_ERRORS} more")
+        if strict:
+            raise ValueError("Invalid client data:\n" + "\n".join(str(error) for error in errors))
+
+    # Services read the camelCase dict layout; dump validated (coerced) values back into it
+    clients = _book_adapter.dump_python(portfolios, by_alias=True, exclude={'__all__': _DERIVED_FIELDS})
+    strings = StringTables()
+    for client in clients:
+        # Holdings are the bulk of a large book: keep them column-oriented
+        client['topHoldings'] = HoldingsTable.from_records(client['topHoldings'], strings)
+    book = {key: value for key, value in source.items() if key != 'clients'}
+    book['clients'] = clients
+    return IngestionResult(portfolios, book, errors)
+
+
+def _client_id(record) -> Optional[str]:
+    if isinstance(record, dict):
+        info = record.get('clientInfo')
+        if isinstance(info, dict):
+            return info.get('id')
+    return None
@@ -1,8 +1,16 @@
-from pydantic import BaseModel
-from typing import Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from pydantic.alias_generators import to_camel
+from typing import Dict, List, Optional, Union
 from datetime import datetime
 
-class ClientInfo(BaseModel):
+# Percentages are rendered as given ("55%", not "55.0%"), so keep ints as ints
+Number = Union[int, float]
+
+class ClientDataModel(BaseModel):
+    """Base for models read from clients.json: camelCase keys in, snake_case fields out"""
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+class ClientInfo(ClientDataModel):
     id: str
     name: str
     account_type: str
@@ -11,7 +19,7 @@ class ClientInfo(BaseModel):
     relationship_manager: str
     account_open_date: str
 
-class PortfolioSummary(BaseModel):
+class PortfolioSummary(ClientDataModel):
     total_value: float
     period_start: str
     period_end: str
@@ -23,37 +31,36 @@ class PortfolioSummary(BaseModel):
     income_earned: float
     fees: float
 
-class AssetAllocationItem(BaseModel):
-    percentage: float
+class AssetAllocationItem(ClientDataModel):
+    percentage: Number
     value: float
-    target: float
-    variance: float
+    target: Number
+    variance: Number
 
-class AssetAllocation(BaseModel):
+class AssetAllocation(ClientDataModel):
     equities: AssetAllocationItem
     fixed_income: AssetAllocationItem
     alternatives: AssetAllocationItem
     cash: AssetAllocationItem
 
-class Performance(BaseModel):
-    ytd: float
-    one_year: float
-    three_year: Optional[float]
-    five_year: Optional[float]
-    since_inception: float
+class Performance(ClientDataModel):
+    ytd: Number
+    one_year: Number = Field(alias='1year')
+    three_year: Optional[Number] = Field(None, alias='3year')
+    five_year: Optional[Number] = Field(None, alias='5year')
+    since_inception: Number
 
-class Holding(BaseModel):
+class Holding(ClientDataModel):
     security: str
     name: str
     value: float
     weight: float
     gain: float
 
-class Portfolio(BaseModel):
+class Portfolio(ClientDataModel):
     client_info: ClientInfo
     portfolio_summary: PortfolioSummary
     asset_allocation: AssetAllocation
     performance: Performance
     top_holdings: List[Holding]
-    last_updated: datetime = datetime.now() 
-    
\ No newline at end of file
+    last_updated: datetime = Field(default_factory=datetime.now)
@@ -0,0 +1,60 @@
+"""Build the shared services from the client book, for the Streamlit app and the HTTP API"""
+import os
+from typing import Dict
+
+from backend.database.snapshot import ClientBook, ClientBookSnapshot, SnapshotError
+from backend.database.vector_store import VectorStore
+from backend.models.ingestion import ingest_book
+from backend.services.chat_service import ChatService
+from backend.services.market_service import MarketService
+from backend.services.report_service import ReportService
+
+
+def resolve_data_path(data_dir: str) -> str:
+    """Prefer the compiled snapshot unless clients.json has been edited since it was built"""
+    json_path = os.path.join(data_dir, 'clients.json')
+    snapshot_path = os.path.join(data_dir, 'clients.snapshot')
+    if os.path.exists(snapshot_path):
+        if not os.path.exists(json_path) or os.stat(snapshot_path).st_mtime_ns >= os.stat(json_path).st_mtime_ns:
+            return snapshot_path
+        print(f"{snapshot_path} is older than {json_path}; loading the JSON book")
+    return json_path
+
+
+def data_file_signature(data_path: str) -> tuple:
+    """Cheap change signature (mtime, size) used to invalidate cached services"""
+    stat = os.stat(data_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def build_services(data_path: str) -> Dict:
+    """Load the client book and build the services that share its search index"""
+    ingestion_errors = []
+    client_book = None
+    if data_path.endswith('.snapshot'):
+        # Compiled book: clients are decoded on demand, nothing is parsed up front
+        try:
+            client_book = ClientBookSnapshot(data_path)
+            ingestion_errors = client_book.ingestion_errors
+        except SnapshotError as e:
+            print(f"Ignoring snapshot, loading the JSON book instead: {e}")
+            data_path = os.path.join(os.path.dirname(data_path), 'clients.json')
+    if client_book is None:
+        # Validate the whole book up front; malformed clients are reported, not rendered
+        ingestion = ingest_book(data_path)
+        client_book = ClientBook(ingestion.book)
+        ingestion_errors = [str(error) for error in ingestion.errors]
+
+    # Map the persisted index (shared across worker processes) or embed the book once;
+    # the content hash decides, so the full book is only materialized for a rebuild
+    vector_store = VectorStore()
+    vector_store.load_or_build(client_book.to_book, source_hash=client_book.content_hash)
+
+    return {
+        'client_book': client_book,
+        'ingestion_errors': ingestion_errors,
+        'vector_store': vector_store,
+        'chat_service': ChatService(vector_store),
+        'report_service': ReportService(vector_store=vector_store),
+        'market_service': MarketService()
+    }
@@ -1,49 +1,89 @@
-from typing import Dict, List
-from dotenv import load_dotenv
-
-# Load environment variables first
-load_dotenv()
-
-# Import Pydantic and ensure proper initialization
-import pydantic
-from pydantic import BaseModel
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
 
 # Import LangChain components with proper order
+import openai
 from langchain_core.caches import BaseCache
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.runnables.history import RunnableWithMessageHistory
 from backend.config import Config
+from backend.database.quota import QuotaScheduler, get_quota_scheduler
+from backend.database.usage_ledger import UsageLedger, get_usage_ledger
 from backend.database.vector_store import VectorStore
 from datetime import datetime
 from backend.services.market_service import MarketService
+from backend.services.context_builder import ContextBuilder
+from backend.services.intent_router import IntentRouter
+from backend.services.model_router import ModelRoute, ModelRouter
+from backend.services.response_cache import SemanticResponseCache
+from backend.services.session_manager import ChatSession, ChatSessionManager, create_session_store
+from backend.utils.compat import ensure_model_rebuilt
+from backend.utils.fingerprint import data_fingerprint
+from backend.utils.metrics import metrics
+from backend.utils.resilience import CircuitOpenError, UpstreamUnavailable, resilience
+
+# Ensure ChatOpenAI is properly initialized with BaseCache (once per process)
+ensure_model_rebuilt(ChatOpenAI)
+
+TIMEOUT_ERRORS = (asyncio.TimeoutError, TimeoutError, openai.APITimeoutError)
+# Errors that make a routed call fall back to its route's fallback tier
+FALLBACK_ERRORS = TIMEOUT_ERRORS + (CircuitOpenError,)
+
+class ChatTurn:
+    """A chat message on its way to the model: its session, prompt and response cache keys"""
+
+    def __init__(self, session: ChatSession, messages: List, question_vector, data_version: str, started: float):
+        self.session = session
+        self.messages = messages
+        self.question_vector = question_vector
+        self.data_version = data_version
+        self.started = started
 
-# Ensure ChatOpenAI is properly initialized with BaseCache
-try:
-    # Force Pydantic model rebuilding for compatibility
-    ChatOpenAI.model_rebuild()
-except Exception as e:
-    print(f"Model rebuild warning: {e}")
 
 class ChatService:
-    def __init__(self, vector_store: VectorStore):
+    # Session used by callers that rely on set_current_client()
+    DEFAULT_SESSION_ID = "default"
+
+    def __init__(self, vector_store: VectorStore, sessions: Optional[ChatSessionManager] = None,
+                 usage_ledger: Optional[UsageLedger] = None, quota: Optional[QuotaScheduler] = None):
         self.vector_store = vector_store
+        # Every LLM call is recorded with its tokens, latency and cost
+        self.usage_ledger = usage_ledger or get_usage_ledger()
+        # ...and first takes its share of the OpenAI quota all workers draw from
+        self.quota = quota or get_quota_scheduler()
+        
+        # Each request type is routed to a model tier (fast, standard, heavy)
+        self.router = ModelRouter()
         
         # Initialize ChatOpenAI with proper error handling
         try:
-            self.model = ChatOpenAI(
-                model=Config.MODEL_NAME,
-                openai_api_key=Config.OPENAI_API_KEY,
-                temperature=0.7
-            )
+            self.model = self.router.model(self.router.routes["default"].tier)
         except Exception as e:
             print(f"Error initializing ChatOpenAI: {e}")
             print("Please ensure your OpenAI API key is correctly set.")
             raise ValueError(f"Failed to initialize ChatOpenAI: {str(e)}")
             
         self.current_client = None
-        self.message_history = []
+        # Per (user session, client) history, safe to share across advisors
+        self.sessions = sessions or create_session_store()
+        
+        # Token-budgeted prompt assembly; older turns fold into a rolling summary
+        self.context_builder = ContextBuilder()
+        self._summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-summary")
+        self._summary_lock = threading.Lock()
+        
+        # Field lookups and simple aggregations are answered without the LLM
+        self.intent_router = IntentRouter()
+        
+        # Near-duplicate questions per client and data version reuse earlier answers
+        self.response_cache = (
+            SemanticResponseCache(vector_store.embeddings) if Config.CHAT_CACHE_ENABLED else None
+        )
+        self._data_versions: Dict[str, Tuple[Dict, str]] = {}  # client_id -> (client dict, fingerprint)
         
         # Create a chat prompt template with client context
         self.prompt = ChatPromptTemplate.from_messages([
@@ -60,68 +100,189 @@ class ChatService:
         self.chain = self.prompt | self.model
 
     def set_current_client(self, client_data: Dict):
-        """Set the current client context"""
+        """Set the current client context for the default session"""
         self.current_client = client_data
-        self.message_history = []  # Reset history when switching clients
+        self.sessions.reset(self.DEFAULT_SESSION_ID, client_data['clientInfo']['id'])  # Reset history when switching clients
+
+    @property
+    def message_history(self) -> List:
+        """History of the default session for the current client"""
+        if not self.current_client:
+            return []
+        session = self.sessions.get_session(self.DEFAULT_SESSION_ID, self.current_client)
+        return self._to_messages(session)
+
+    @staticmethod
+    def _to_messages(session: ChatSession) -> List:
+        message_types = {"user": HumanMessage, "assistant": AIMessage}
+        return [message_types[role](content=content) for role, content in session.history]
         
-    async def process_message(self, message: str) -> str:
-        """Process user message with client context"""
+    async def process_message(self, message: str, session_id: Optional[str] = None,
+                              client_data: Optional[Dict] = None) -> str:
+        """Process user message with client context.
+
+        ``session_id`` identifies the advisor's session and ``client_data`` the
+        client being discussed; both default to the set_current_client() state.
+        """
         try:
-            if not self.current_client:
+            client_data = client_data or self.current_client
+            if not client_data:
                 return "Please select a client first."
 
-            # Search vector store with client-specific context
-            context_results = self.vector_store.search(
-                query=message,
-                client_id=self.current_client['clientInfo']['id'],
-                k=3
+            # Session storage, the router, embedding (and any wait for quota), FAISS and
+            # prompt assembly all block, so everything but the model call runs off the event loop
+            answer, turn = await asyncio.to_thread(
+                self._prepare_turn, message, session_id or self.DEFAULT_SESSION_ID, client_data
             )
-            
-            # Combine context with priority for financial data
-            financial_context = []
-            general_context = []
-            
-            for content, metadata, score in context_results:
-                if metadata.get('type') == 'financial':
-                    financial_context.append(content)
-                else:
-                    general_context.append(content)
-            
-            # Construct enhanced message with client context
-            enhanced_message = f"""
-            Context: You are discussing the portfolio of {self.current_client['clientInfo']['name']}.
-            
-            Question: {message}
-            
-            Financial Information:
-            {' '.join(financial_context)}
-            
-            Additional Context:
-            {' '.join(general_context)}
-            """
-            
+            if answer is not None:
+                return answer
+
             # Get response with client context
-            response = await self.model.ainvoke([
-                SystemMessage(content=f"""You are assisting with {self.current_client['clientInfo']['name']}'s portfolio.
-                Only provide information about this specific client."""),
-                *self.message_history,
-                HumanMessage(content=enhanced_message)
-            ])
-            
-            # Update message history
-            self.message_history.append(HumanMessage(content=message))
-            self.message_history.append(AIMessage(content=response.content))
-            
-            # Limit history length to prevent token limits
-            if len(self.message_history) > 10:
-                self.message_history = self.message_history[-10:]
-            
+            response = await self.ainvoke(turn.messages, "chat", turn.session.client_id, question=message)
+            metrics.counter("chat_messages_total", "Chat messages by answer path").inc(path="llm")
+            await asyncio.to_thread(self._complete_turn, turn, message, response.content)
             return response.content
-            
+
+        except UpstreamUnavailable as e:
+            print(f"Error processing message: {str(e)}")
+            return "I apologize, but the AI service is temporarily unavailable. Please try again in a minute."
         except Exception as e:
             print(f"Error processing message: {str(e)}")
             return f"I apologize, but I encountered an error processing your request. Please try again."
 
+    def _prepare_turn(self, message: str, session_id: str,
+                      client_data: Dict) -> Tuple[Optional[str], Optional[ChatTurn]]:
+        """Answer from the router or the response cache, else build the prompt for the model.
+
+        Returns ``(answer, None)`` when no model call is needed and ``(None, turn)`` otherwise.
+        """
+        session = self.sessions.get_session(session_id, client_data)
+
+        # Fast path: answer numeric lookups straight from the portfolio data
+        routed = self.intent_router.route(message, client_data)
+        if routed is not None:
+            intent, answer = routed
+            self._record_turn(session, message, answer)
+            metrics.counter("chat_messages_total", "Chat messages by answer path").inc(path="router")
+            return answer, None
+
+        data_version = self._data_version(client_data)
+        question_vector = None
+        # Cached answers are keyed on the question alone, so only a conversation's opening
+        # question may use (or fill) the cache; a follow-up depends on what came before it
+        if self.response_cache is not None and not session.history and not session.summary:
+            cached, question_vector = self.response_cache.lookup(message, session.client_id, data_version)
+            if cached is not None:
+                self._record_turn(session, message, cached)
+                metrics.counter("chat_messages_total", "Chat messages by answer path").inc(path="cache")
+                return cached, None
+        started = time.perf_counter()
+
+        # Search vector store with client-specific context
+        context_results = self.vector_store.search(
+            query=message,
+            client_id=session.client_id,
+            k=3,
+            query_vector=question_vector
+        )
+
+        # Financial data goes first so it is the last to be cut from the budget
+        financial_context = []
+        general_context = []
+
+        for content, metadata, score in context_results:
+            if metadata.get('type') == 'financial':
+                financial_context.append(content)
+            else:
+                general_context.append(content)
+
+        client_name = client_data['clientInfo']['name']
+        # Count tokens with the encoding of the tier this question is routed to
+        route = self.router.select("chat", None, question=message)
+        context = self.context_builder.build(
+            system_prompt=f"""You are assisting with {client_name}'s portfolio.
+            Only provide information about this specific client.""",
+            question=message,
+            client_name=client_name,
+            context_chunks=financial_context + general_context,
+            history=session.history,
+            summary=session.summary,
+            model_name=self.router.tiers[route.tier]
+        )
+
+        # Turns that no longer fit the budget are summarized instead of resent
+        if context.overflow_history:
+            self._schedule_summary(
+                session, self.sessions.drop_oldest(session, len(context.overflow_history))
+            )
+        return None, ChatTurn(session, context.messages, question_vector, data_version, started)
+
+    def _complete_turn(self, turn: ChatTurn, message: str, reply: str):
+        """Record the model's reply in the session and, for an opening question, the response cache"""
+        self._record_turn(turn.session, message, reply)
+        if self.response_cache is not None:
+            self.response_cache.store(
+                message, turn.question_vector, reply,
+                turn.session.client_id, turn.data_version, time.perf_counter() - turn.started
+            )
+
+    def _data_version(self, client_data: Dict) -> str:
+        """Fingerprint of the client's data, hashed again only when a different dict is passed.
+
+        Loaded books hand out the same dict per client until they are reloaded,
+        so the whole portfolio is not re-serialized on every message.
+        """
+        client_id = client_data['clientInfo']['id']
+        cached = self._data_versions.get(client_id)
+        if cached is None or cached[0] is not client_data:
+            cached = (client_data, data_fingerprint(client_data))
+            self._data_versions[client_id] = cached
+        return cached[1]
+
+    def _record_turn(self, session: ChatSession, message: str, reply: str):
+        """Update message history (bounded by the session manager)"""
+        dropped = self.sessions.append(session, "user", message)
+        dropped += self.sessions.append(session, "assistant", reply)
+        self._schedule_summary(session, dropped)
+
+    def _schedule_summary(self, session: ChatSession, turns: List[Tuple[str, str]]):
+        """Queue turns for folding into the session summary off the request path"""
+        if not turns:
+            return
+        with self._summary_lock:
+            session.pending_summary.extend(turns)
+            if session.summarizing:
+                return  # The running worker picks these up
+            session.summarizing = True
+        self._summary_executor.submit(self._fold_summary, session)
+
+    def _fold_summary(self, session: ChatSession):
+        """Fold pending turns into the session's rolling summary"""
+        with self._summary_lock:
+            generation = session.generation
+        while True:
+            with self._summary_lock:
+                if session.generation != generation:
+                    return  # Cleared meanwhile; the next turns start a new worker
+                pending = session.pending_summary
+                session.pending_summary = []
+                if not pending:
+                    session.summarizing = False
+                    return
+            transcript = "\n".join(f"{role}: {content}" for role, content in pending)
+            try:
+                response = self.invoke([
+                    SystemMessage(content=f"""You maintain a running summary of a conversation
+                    between an investment advisor and an assistant about {session.client_data['clientInfo']['name']}'s portfolio.
+                    Merge the new turns into the existing summary. Keep figures, decisions and open questions.
+                    Stay under {Config.CHAT_SUMMARY_MAX_TOKENS} tokens."""),
+                    HumanMessage(content=f"Existing summary:\n{session.summary or '(none)'}\n\nNew turns:\n{transcript}")
+                ], "chat_summary", session.client_id)
+                if not self.sessions.set_summary(session, response.content, generation):
+                    return  # Folded from a conversation that has since been cleared
+            except Exception as e:
+                print(f"Error updating conversation summary: {str(e)}")
+
     async def get_stock_recommendation(self, symbol: str) -> Dict:
         """Generate stock recommendation with market data"""
         market_data = await MarketService().get_stock_data(symbol)
@@ -133,7 +294,7 @@ class ChatService:
         4. Market sentiment
         Provide buy/hold/sell recommendation with rationale.
         """
-        response = await self.model.ainvoke(prompt)
+        response = await self.ainvoke(prompt, "stock_recommendation")
         return {
             "symbol": symbol,
             "recommendation": response.content,
@@ -141,92 +302,124 @@ class ChatService:
             "timestamp": datetime.now().isoformat()
         }
 
-    @classmethod
-    def generate_analysis(cls, prompt: str, vector_store: VectorStore) -> Dict:
-        """Generate investment analysis using OpenAI"""
+    def invoke(self, messages, caller: str, client_id: Optional[str] = None, question: Optional[str] = None):
+        """Call the routed model for ``caller`` (chat, report_analysis, ...).
+
+        Falls back once to the route's fallback tier when the call times out
+        or the tier's circuit breaker is open.
+        """
+        route = self.router.select(caller, messages, question)
         try:
-            instance = cls(vector_store=vector_store)
-            
-            # Create a system message to guide the analysis
-            system_msg = SystemMessage(content="""
-            You are a professional investment analyst. Analyze the portfolio data and provide 
-            a detailed report with the following sections:
-            1. Executive Summary
-            2. Performance Analysis
-            3. Asset Allocation Analysis
-            4. Key Observations
-            5. Recommendations
-            6. Holdings Analysis
-            7. Historical Analysis
-            
-            Use clear section headers and provide detailed, data-driven insights.
-            Each section must start with its exact title (e.g., "Executive Summary").
-            """)
-            
-            # Create the human message with the prompt
-            human_msg = HumanMessage(content=prompt)
-            
-            # Get response from the model
-            response = instance.model.invoke([system_msg, human_msg])
-            content = response.content
-            
-            print("Raw AI Response:", content)  # Debug log
-            
-            # Parse sections with improved logic
-            sections = {}
-            current_section = None
-            current_content = []
-            
-            # Define section markers with exact matches
-            section_markers = {
-                'executive summary': 'executive_summary',
-                'performance analysis': 'performance_analysis',
-                'asset allocation analysis': 'allocation_analysis',
-                'key observations': 'key_observations',
-                'recommendations': 'recommendations',
-                'holdings analysis': 'holdings_analysis',
-                'historical analysis': 'historical_analysis'
+            return self._invoke_tier(route, route.tier, messages, caller, client_id)
+        except FALLBACK_ERRORS as e:
+            if not route.fallback_tier:
+                raise
+            self._count_fallback(route, e)
+            return self._invoke_tier(route, route.fallback_tier, messages, caller, client_id)
+
+    async def ainvoke(self, messages, caller: str, client_id: Optional[str] = None,
+                      question: Optional[str] = None):
+        route = self.router.select(caller, messages, question)
+        try:
+            return await self._ainvoke_tier(route, route.tier, messages, caller, client_id)
+        except FALLBACK_ERRORS as e:
+            if not route.fallback_tier:
+                raise
+            self._count_fallback(route, e)
+            return await self._ainvoke_tier(route, route.fallback_tier, messages, caller, client_id)
+
+    def _invoke_tier(self, route: ModelRoute, tier: str, messages, caller: str, client_id: Optional[str]):
+        if self.quota is not None:
+            self.quota.acquire("openai")
+        started = time.perf_counter()
+        response = None
+        outcome = "error"
+        try:
+            model = self.router.model(tier)
+            with metrics.span("llm_call", caller=caller):
+                response = resilience.policy(f"llm_{tier}").call(
+                    lambda: model.invoke(messages, timeout=route.timeout), timeout=route.timeout
+                )
+            response.response_metadata["model_tier"] = tier  # Which tier answered, after any fallback
+            outcome = "ok"
+            return response
+        except CircuitOpenError:
+            outcome = "rejected"
+            raise
+        except TIMEOUT_ERRORS:
+            outcome = "timeout"
+            raise
+        finally:
+            self._finish_call(route, tier, outcome, response, caller, client_id, time.perf_counter() - started)
+
+    async def _ainvoke_tier(self, route: ModelRoute, tier: str, messages, caller: str, client_id: Optional[str]):
+        if self.quota is not None:
+            await self.quota.aacquire("openai")
+        started = time.perf_counter()
+        response = None
+        outcome = "error"
+        try:
+            model = self.router.model(tier)
+            with metrics.span("llm_call", caller=caller):
+                response = await resilience.policy(f"llm_{tier}").acall(
+                    lambda: model.ainvoke(messages, timeout=route.timeout), timeout=route.timeout
+                )
+            response.response_metadata["model_tier"] = tier  # Which tier answered, after any fallback
+            outcome = "ok"
+            return response
+        except CircuitOpenError:
+            outcome = "rejected"
+            raise
+        except TIMEOUT_ERRORS:
+            outcome = "timeout"
+            raise
+        finally:
+            self._finish_call(route, tier, outcome, response, caller, client_id, time.perf_counter() - started)
+
+    def _finish_call(self, route: ModelRoute, tier: str, outcome: str, response, caller: str,
+                     client_id: Optional[str], latency: float):
+        """Per-route latency and SLO metrics, then the usage ledger entry"""
+        metrics.histogram("model_route_latency_seconds", "LLM latency by route, tier and outcome").observe(
+            latency, route=route.name, tier=tier, outcome=outcome
+        )
+        if latency > route.slo:
+            metrics.counter("model_route_slo_misses_total", "LLM calls slower than their route's SLO").inc(
+                route=route.name, tier=tier
+            )
+        if outcome != "rejected":  # Never sent, nothing to bill
+            self._record_usage(response, caller, client_id, latency, model=self.router.tiers[tier])
+
+    @staticmethod
+    def _count_fallback(route: ModelRoute, error: Exception):
+        reason = "circuit is open" if isinstance(error, CircuitOpenError) else f"timed out after {route.timeout}s"
+        print(f"Model route {route.name}: {route.tier} {reason}, falling back to {route.fallback_tier}")
+        metrics.counter("model_route_fallbacks_total", "Routed LLM calls retried on the fallback tier").inc(
+            route=route.name, tier=route.tier, fallback=route.fallback_tier
+        )
+
+    def _record_usage(self, response, caller: str, client_id: Optional[str], latency: float,
+                      model: Optional[str] = None):
+        """Write one ledger entry; failed calls (no response) are kept with zero tokens"""
+        if self.usage_ledger is None:
+            return
+        usage = getattr(response, "usage_metadata", None) or {}
+        metadata = getattr(response, "response_metadata", None) or {}
+        if not usage and metadata.get("token_usage"):
+            token_usage = metadata["token_usage"]
+            usage = {
+                "input_tokens": token_usage.get("prompt_tokens", 0),
+                "output_tokens": token_usage.get("completion_tokens", 0),
             }
-            
-            # Split content by ### to separate sections
-            raw_sections = content.split('###')
-            
-            for section in raw_sections:
-                if not section.strip():
-                    continue
-                    
-                # Get the first line as the section title
-                lines = section.strip().split('\n')
-                title = lines[0].strip().lower()
-                content = '\n'.join(lines[1:]).strip()
-                
-                # Match section title to our markers
-                for marker, section_name in section_markers.items():
-                    if marker in title:
-                        sections[section_name] = content
-                        break
-            
-            # Ensure all sections exist
-            required_sections = [
-                'executive_summary', 'performance_analysis', 'allocation_analysis',
-                'key_observations', 'recommendations', 'holdings_analysis', 'historical_analysis'
-            ]
-            
-            for section in required_sections:
-                if section not in sections or not sections[section]:
-                    sections[section] = "Analysis for this section is being generated..."
-            
-            print("Generated sections:", sections)  # Debug log
-            return sections
-            
+        try:
+            self.usage_ledger.record(
+                model=metadata.get("model_name") or model or Config.MODEL_NAME,
+                caller=caller,
+                client_id=client_id,
+                prompt_tokens=usage.get("input_tokens", 0),
+                completion_tokens=usage.get("output_tokens", 0),
+                latency_seconds=latency,
+                success=response is not None
+            )
         except Exception as e:
-            print(f"Analysis generation error: {str(e)}")
-            return {
-                'executive_summary': f"Error generating analysis: {str(e)}",
-                'performance_analysis': "Unable to generate performance analysis",
-                'allocation_analysis': "Unable to generate allocation analysis", 
-                'key_observations': "Unable to generate key observations",
-                'recommendations': "Unable to generate recommendations",
-                'holdings_analysis': "Unable to generate holdings analysis",
-                'historical_analysis': "Unable to generate historical analysis"
-            } 
\ No newline at end of file
+            # Accounting must never fail the call it is accounting for
+            print(f"Error recording LLM usage: {str(e)}")
@@ -0,0 +1,134 @@
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from backend.config import Config
+
+try:
+    import tiktoken
+except ImportError:  # Installed with langchain-openai; fall back to an estimate
+    tiktoken = None
+
+# Per-message framing tokens added by the chat completions format
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class TokenCounter:
+    """Count tokens locally with the model's tiktoken encoding"""
+
+    def __init__(self, model_name: str = Config.MODEL_NAME):
+        self.model_name = model_name
+        self._encoding = None
+        self._loaded = False
+
+    def _get_encoding(self):
+        if not self._loaded:
+            self._loaded = True
+            if tiktoken is not None:
+                try:
+                    self._encoding = tiktoken.encoding_for_model(self.model_name)
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    # The BPE file is fetched once on first use; offline hosts estimate
+                    print(f"Tokenizer unavailable, estimating token counts: {e}")
+        return self._encoding
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        encoding = self._get_encoding()
+        if encoding is None:
+            return len(text) // 4 + 1
+        return len(encoding.encode(text))
+
+    def count_message(self, text: str) -> int:
+        return self.count(text) + MESSAGE_OVERHEAD_TOKENS
+
+
+class BuiltContext:
+    """Prompt messages packed into the token budget, plus what was left out"""
+
+    def __init__(self, messages: List, prompt_tokens: int,
+                 overflow_history: List[Tuple[str, str]], context_chunks_used: int):
+        self.messages = messages
+        self.prompt_tokens = prompt_tokens
+        self.overflow_history = overflow_history
+        self.context_chunks_used = context_chunks_used
+
+
+class ContextBuilder:
+    """Pack system prompt, summary, retrieved context and history into a budget.
+
+    The question, system prompt and rolling summary are always included.
+    Retrieved chunks get up to ``context_share`` of the budget in priority
+    order, and the remaining tokens go to history, newest turns first.
+    History that does not fit is returned as overflow for summarization.
+    Tokens are counted with the encoding of ``model_name`` (the model the
+    prompt is routed to), else with ``counter``.
+    """
+
+    def __init__(self, counter: Optional[TokenCounter] = None,
+                 max_prompt_tokens: int = Config.CHAT_PROMPT_TOKEN_BUDGET,
+                 context_share: float = Config.CHAT_CONTEXT_TOKEN_SHARE):
+        self.counter = counter or TokenCounter()
+        self.max_prompt_tokens = max_prompt_tokens
+        self.context_share = context_share
+        self._counters: Dict[str, TokenCounter] = {self.counter.model_name: self.counter}
+
+    def counter_for(self, model_name: Optional[str] = None) -> TokenCounter:
+        """One counter per model, created on first use"""
+        if not model_name:
+            return self.counter
+        counter = self._counters.get(model_name)
+        if counter is None:
+            counter = self._counters.setdefault(model_name, TokenCounter(model_name))
+        return counter
+
+    def build(self, system_prompt: str, question: str, client_name: str,
+              context_chunks: List[str], history: List[Tuple[str, str]],
+              summary: Optional[str] = None, model_name: Optional[str] = None) -> BuiltContext:
+        counter = self.counter_for(model_name)
+        count = counter.count
+        budget = self.max_prompt_tokens
+
+        system_text = system_prompt
+        if summary:
+            system_text += f"\n\nSummary of the earlier conversation:\n{summary}"
+        envelope = (
+            f"Context: You are discussing the portfolio of {client_name}.\n\n"
+            f"Question: {question}\n\nPortfolio data:\n"
+        )
+        used = counter.count_message(system_text) + counter.count_message(envelope)
+
+        # Retrieved context, in the caller's priority order
+        context_budget = min(budget - used, int(budget * self.context_share))
+        packed_chunks = []
+        for chunk in context_chunks:
+            chunk_tokens = count(chunk) + 1  # Newline separator
+            if chunk_tokens > context_budget:
+                break
+            packed_chunks.append(chunk)
+            context_budget -= chunk_tokens
+            used += chunk_tokens
+
+        # History fills whatever is left, newest first
+        kept = []
+        history = list(history)
+        for index in range(len(history) - 1, -1, -1):
+            role, content = history[index]
+            message_tokens = counter.count_message(content)
+            if used + message_tokens > budget:
+                break
+            kept.append((role, content))
+            used += message_tokens
+        kept.reverse()
+        overflow = history[:len(history) - len(kept)]
+
+        message_types = {"user": HumanMessage, "assistant": AIMessage}
+        messages = [
+            SystemMessage(content=system_text),
+            *[message_types[role](content=content) for role, content in kept],
+            HumanMessage(content=envelope + "\n".join(packed_chunks))
+        ]
+        return BuiltContext(messages, used, overflow, len(packed_chunks))
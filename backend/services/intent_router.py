@@ -0,0 +1,253 @@
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend.models.holdings import HoldingsTable
+
+# Questions asking for judgement rather than a figure always go to the LLM
+OPEN_ENDED_PATTERN = re.compile(
+    r"\b(why|how come|should|recommend|suggest|explain|compare|improve|analy[sz]e|"
+    r"what if|could|would|outlook|risk of|opinion|think)\b",
+    re.IGNORECASE
+)
+MAX_ROUTABLE_WORDS = 20
+
+# Comparisons, benchmarks and points in time other than the current period ask
+# for a figure the client data does not hold directly
+QUALIFIER_PATTERN = re.compile(
+    r"\b(vs\.?|versus|compared?|comparison|relative to|than|benchmarks?|index|s&p|peers?|"
+    r"(start|beginning|end|middle) of|as of|ago|before|after|previous|prior|next|"
+    r"(last|this) (month|quarter|week)|quarter(ly)?|month(ly)?|(19|20)\d\d|over time|trend|histor(y|ical))\b",
+    re.IGNORECASE
+)
+
+# Ticker symbols as typed (e.g. "AAPL", "BRK.B"); questions naming a held
+# security are about that holding, not the portfolio, and go to the LLM
+SYMBOL_PATTERN = re.compile(r"\b[A-Z][A-Z0-9]*(?:\.[A-Z0-9]+)?\b")
+NAME_SUFFIX_PATTERN = re.compile(
+    r"\s+(inc|corp|corporation|co|company|ltd|plc|sa|ag|nv|class [a-c]|etf|fund|trust)$"
+)
+
+PERFORMANCE_PERIODS = [
+    ("ytd", "year-to-date", r"ytd|year[\s-]to[\s-]date"),
+    ("1year", "1-year", r"(1|one)[\s-]?(year|yr)|12[\s-]?month|last year|annual"),
+    ("3year", "3-year", r"(3|three)[\s-]?(year|yr)"),
+    ("5year", "5-year", r"(5|five)[\s-]?(year|yr)"),
+    ("sinceInception", "since-inception", r"since inception|inception"),
+]
+
+ASSET_CLASSES = [
+    ("equities", "Equities", r"equit(y|ies)|stocks?"),
+    ("fixedIncome", "Fixed Income", r"fixed income|bonds?"),
+    ("alternatives", "Alternatives", r"alternatives?"),
+    ("cash", "Cash", r"cash"),
+]
+
+SUMMARY_FIELDS = [
+    ("unrealizedGains", "unrealized gains", r"unrealized gains?"),
+    ("realizedGains", "realized gains", r"realized gains?"),
+    ("incomeEarned", "income earned", r"(?<!fixed )(?<!fixed-)income( earned)?|dividends?"),
+    ("fees", "fees", r"fees?"),
+    ("contributions", "contributions", r"contributions?|deposits?"),
+    ("withdrawals", "withdrawals", r"withdrawals?"),
+    ("beginningBalance", "beginning balance", r"beginning balance|starting balance|opening balance"),
+]
+
+CLIENT_FIELDS = [
+    ("riskProfile", "risk profile", r"risk (profile|tolerance|level)"),
+    ("investmentStrategy", "investment strategy",
+     r"investment strategy|(portfolio|account|client'?s?|their|his|her|my) strategy"),
+    ("relationshipManager", "relationship manager", r"relationship manager|advisor|adviser"),
+    ("accountType", "account type", r"account type|type of account"),
+    ("accountOpenDate", "account open date", r"(account )?open(ed)? date|when .* open"),
+]
+
+
+def _money(value) -> str:
+    return f"-${abs(value):,.2f}" if value < 0 else f"${value:,.2f}"
+
+
+def _words(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9&]+", text.lower()))
+
+
+def _name_key(name: str) -> str:
+    """A holding's name without corporate suffixes, e.g. "Apple Inc." -> "apple" """
+    key, previous = _words(name), None
+    while key != previous:
+        previous, key = key, NAME_SUFFIX_PATTERN.sub("", key)
+    return key
+
+
+class IntentRouter:
+    """Answer simple lookups and aggregations straight from a client's data.
+
+    Each intent is a regex plus a handler over the client dict. ``route``
+    returns ``(intent, answer)`` when exactly one intent matches and ``None``
+    for anything that should go through retrieval and the LLM. General
+    intents (the whole allocation, the total value) only answer when no
+    specific one matches, e.g. "total value of equities" is the equities
+    allocation; two specific matches ("5 year vs 3 year return") are
+    ambiguous and go to the LLM.
+    """
+
+    def __init__(self):
+        # (name, pattern, handler, general), most specific first
+        self._intents: List[Tuple[str, re.Pattern, Callable[[Dict], str], bool]] = []
+        self._register_intents()
+
+    def route(self, message: str, client_data: Dict) -> Optional[Tuple[str, str]]:
+        text = message.strip()
+        if not text or len(text.split()) > MAX_ROUTABLE_WORDS or OPEN_ENDED_PATTERN.search(text):
+            return None
+        if QUALIFIER_PATTERN.search(text) or self._names_holding(text, client_data):
+            return None
+        matches = [intent for intent in self._intents if intent[1].search(text)]
+        specific = [intent for intent in matches if not intent[3]]
+        candidates = specific or matches
+        if len(candidates) != 1:
+            return None
+        name, _, handler, _ = candidates[0]
+        try:
+            return name, handler(client_data)
+        except (KeyError, TypeError, ValueError):
+            return None  # Missing or malformed field; let the LLM handle it
+
+    @staticmethod
+    def _names_holding(text: str, client_data: Dict) -> bool:
+        """Whether the question names one of the client's holdings, by symbol or name"""
+        try:
+            holdings = HoldingsTable.coerce(client_data.get('topHoldings'))
+        except (TypeError, ValueError):
+            return False
+        symbols = set(SYMBOL_PATTERN.findall(text))
+        words = f" {_words(text)} "
+        for security, name in zip(holdings.securities, holdings.names):
+            if security and security.upper() in symbols:
+                return True
+            key = _name_key(name or "")
+            if key and f" {key} " in words:
+                return True
+        return False
+
+    def _add(self, name: str, pattern: str, handler: Callable[[Dict], str], general: bool = False):
+        self._intents.append((name, re.compile(pattern, re.IGNORECASE), handler, general))
+
+    def _register_intents(self):
+        # Holdings: the most specific phrasings first
+        self._add("largest_holding",
+                  r"\b(largest|biggest|top|main|number one)\s+(single\s+)?(holding|position|investment)\b",
+                  self._largest_holding)
+        self._add("holding_count", r"\bhow many (holdings|positions|securities)\b", self._holding_count)
+        self._add("top_holdings",
+                  r"\b(top|all|list|current)\s+(holdings|positions)\b|\bwhat (do|does) \w+ (hold|own)\b",
+                  self._top_holdings)
+
+        for key, label, period in PERFORMANCE_PERIODS:
+            self._add(f"performance_{key}",
+                      rf"\b({period})\b.*\b(return|performance|perform(ed)?|gain)|"
+                      rf"\b(return|performance|perform(ed)?)\b.*\b({period})\b",
+                      self._performance(key, label))
+
+        self._add("total_gains", r"\btotal gains?\b", self._total_gains)
+        for key, label, field in SUMMARY_FIELDS:
+            self._add(f"summary_{key}", rf"\b({field})\b", self._summary_field(key, label))
+
+        for key, label, asset_class in ASSET_CLASSES:
+            self._add(f"allocation_{key}",
+                      rf"\b({asset_class})\b.*\b(allocation|allocated|percent(age)?|weight|how much|target|value|worth)\b|"
+                      rf"\b(allocation|allocated|percent(age)?|weight|how much|value|worth)\b.*\b({asset_class})\b",
+                      self._allocation_class(key, label))
+
+        for key, label, field in CLIENT_FIELDS:
+            self._add(f"client_{key}", rf"\b({field})\b", self._client_field(key, label))
+
+        # Whole-portfolio answers, only when nothing more specific matched
+        self._add("asset_allocation", r"\b(asset )?allocation\b|\basset mix\b", self._asset_allocation,
+                  general=True)
+        self._add("total_value",
+                  r"\b(total|portfolio|account)\s+(value|worth|balance|size)\b|"
+                  r"\bhow much is (the |my |their |his |her )?(portfolio|account) worth\b|"
+                  r"\bwhat is (the |my |their |his |her )?(portfolio|account) worth\b",
+                  self._total_value, general=True)
+
+    # Handlers
+
+    @staticmethod
+    def _name(client_data: Dict) -> str:
+        return client_data['clientInfo']['name']
+
+    def _total_value(self, client_data: Dict) -> str:
+        value = client_data['portfolioSummary']['totalValue']
+        return f"{self._name(client_data)}'s total portfolio value is {_money(value)}."
+
+    def _total_gains(self, client_data: Dict) -> str:
+        summary = client_data['portfolioSummary']
+        realized, unrealized = summary['realizedGains'], summary['unrealizedGains']
+        return (
+            f"{self._name(client_data)}'s total gains are {_money(realized + unrealized)} "
+            f"({_money(realized)} realized, {_money(unrealized)} unrealized)."
+        )
+
+    def _summary_field(self, key: str, label: str) -> Callable[[Dict], str]:
+        def handler(client_data: Dict) -> str:
+            value = client_data['portfolioSummary'][key]
+            return f"{self._name(client_data)}'s {label} for the period: {_money(value)}."
+        return handler
+
+    def _performance(self, key: str, label: str) -> Callable[[Dict], str]:
+        def handler(client_data: Dict) -> str:
+            value = client_data['performance'].get(key)
+            if value is None:
+                return f"A {label} return is not available for {self._name(client_data)}'s portfolio."
+            return f"{self._name(client_data)}'s {label} return is {value}%."
+        return handler
+
+    def _allocation_class(self, key: str, label: str) -> Callable[[Dict], str]:
+        def handler(client_data: Dict) -> str:
+            item = client_data['assetAllocation'][key]
+            return (
+                f"The {label.lower()} allocation is {item['percentage']}% of {self._name(client_data)}'s portfolio "
+                f"({_money(item['value'])}), against a target of {item['target']}% "
+                f"(variance {item['variance']:+}%)."
+            )
+        return handler
+
+    def _asset_allocation(self, client_data: Dict) -> str:
+        lines = [f"{self._name(client_data)}'s asset allocation:"]
+        for key, label, _ in ASSET_CLASSES:
+            item = client_data['assetAllocation'][key]
+            lines.append(
+                f"- {label}: {item['percentage']}% ({_money(item['value'])}), target {item['target']}%"
+            )
+        return "\n".join(lines)
+
+    def _largest_holding(self, client_data: Dict) -> str:
+        holdings = HoldingsTable.coerce(client_data['topHoldings'])
+        if not holdings:
+            return f"No holdings are on record for {self._name(client_data)}."
+        largest = holdings.largest('value')
+        return (
+            f"{self._name(client_data)}'s largest holding is {largest['name']} ({largest['security']}), "
+            f"worth {_money(largest['value'])} ({largest['weight']}% of the portfolio) "
+            f"with a gain of {_money(largest['gain'])}."
+        )
+
+    def _holding_count(self, client_data: Dict) -> str:
+        return f"{self._name(client_data)} has {len(client_data['topHoldings'])} holdings on record."
+
+    def _top_holdings(self, client_data: Dict) -> str:
+        holdings = HoldingsTable.coerce(client_data['topHoldings']).sorted_by('value')
+        if not holdings:
+            return f"No holdings are on record for {self._name(client_data)}."
+        lines = [f"{self._name(client_data)}'s top holdings:"]
+        for holding in holdings:
+            lines.append(
+                f"- {holding['name']} ({holding['security']}): {_money(holding['value'])}, "
+                f"{holding['weight']}% of portfolio, gain {_money(holding['gain'])}"
+            )
+        return "\n".join(lines)
+
+    def _client_field(self, key: str, label: str) -> Callable[[Dict], str]:
+        def handler(client_data: Dict) -> str:
+            return f"{self._name(client_data)}'s {label} is {client_data['clientInfo'][key]}."
+        return handler
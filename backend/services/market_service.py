@@ -1,23 +1,49 @@
+import asyncio
+import itertools
 import aiohttp
 from typing import Dict, Optional
 from datetime import datetime
 from backend.config import Config
+from backend.database.quota import get_quota_scheduler
+from backend.utils.resilience import UpstreamUnavailable, resilience
 
 class MarketService:
     def __init__(self):
+        # Checked on the first quote request: the canned summaries need no key
         self.api_key = Config.ALPHA_VANTAGE_API_KEY
-        self.base_url = "https://www.alphavantage.co/query"
+        self.base_url = Config.ALPHA_VANTAGE_BASE_URL
+        # Alpha Vantage's per-minute quota is shared by every worker process
+        self.quota = get_quota_scheduler()
 
     async def get_stock_data(self, symbol: str) -> Optional[Dict]:
         """Fetch real-time stock data"""
         params = {
             "function": "GLOBAL_QUOTE",
             "symbol": symbol,
-            "apikey": self.api_key
+            "apikey": self.api_key or Config.require("ALPHA_VANTAGE_API_KEY")
         }
-        
-        async with aiohttp.ClientSession() as session:
+        policy = resilience.policy("market")
+        try:
+            if self.quota is not None:
+                await self.quota.aacquire("alpha_vantage")
+            attempts = itertools.count()
+
+            async def attempt():
+                # A hedged attempt is another request against the shared quota
+                if next(attempts) and self.quota is not None:
+                    await self.quota.aacquire("alpha_vantage")
+                return await self._fetch_quote(params, policy.timeout)
+            return await policy.acall(attempt)
+        except (UpstreamUnavailable, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Market data unavailable for {symbol}: {str(e)}")
+            return None
+
+    async def _fetch_quote(self, params: Dict, timeout: Optional[float]) -> Optional[Dict]:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout or None)) as session:
             async with session.get(self.base_url, params=params) as response:
+                if response.status == 429 or response.status >= 500:
+                    # Raise so the failure counts against the circuit breaker
+                    response.raise_for_status()
                 if response.status == 200:
                     data = await response.json()
                     return self._parse_stock_data(data)
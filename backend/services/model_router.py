@@ -0,0 +1,91 @@
+import re
+from typing import Dict, Optional
+
+from langchain_openai import ChatOpenAI
+
+from backend.config import Config
+from backend.utils.compat import ensure_model_rebuilt
+
+ensure_model_rebuilt(ChatOpenAI)
+
+# Chat questions that ask for reasoning rather than a lookup go to the larger model
+_ANALYTICAL = re.compile(
+    r"\b(why|explain|compare|recommend|should|strategy|rebalanc\w*|risk|outlook|scenario|impact|versus|vs)\b",
+    re.IGNORECASE
+)
+
+
+class ModelRoute:
+    """Where one kind of request goes: a model tier, its latency SLO, a hard timeout and the tier to fall back to"""
+
+    def __init__(self, name: str, tier: str, slo: float, timeout: float, fallback_tier: Optional[str] = None):
+        self.name = name
+        self.tier = tier
+        self.slo = slo
+        self.timeout = timeout
+        self.fallback_tier = fallback_tier
+
+    def __repr__(self) -> str:
+        return (f"ModelRoute({self.name!r}, tier={self.tier!r}, slo={self.slo}, "
+                f"timeout={self.timeout}, fallback={self.fallback_tier!r})")
+
+
+class ModelRouter:
+    """Picks a model tier per request type and complexity.
+
+    Tiers (Config.MODEL_TIERS) map to model names and routes
+    (Config.MODEL_ROUTES) map a request type to a tier, a latency SLO that is
+    tracked in metrics, and a timeout after which the call is retried once on
+    the route's fallback tier.
+    """
+
+    def __init__(self, tiers: Optional[Dict[str, str]] = None, routes: Optional[Dict[str, Dict]] = None,
+                 temperature: float = 0.7):
+        self.tiers = tiers or Config.MODEL_TIERS
+        self.routes = {
+            name: ModelRoute(name, spec["tier"], spec["slo"], spec["timeout"], spec.get("fallback"))
+            for name, spec in (routes or Config.MODEL_ROUTES).items()
+        }
+        self.temperature = temperature
+        self._models: Dict[str, ChatOpenAI] = {}
+
+    def select(self, caller: str, messages, question: Optional[str] = None) -> ModelRoute:
+        """The route for a call from ``caller`` (chat, chat_summary, stock_recommendation, report_analysis).
+
+        Chat turns are split by the complexity of ``question`` (default: the
+        last human message).
+        """
+        name = caller
+        if caller == "chat":
+            question = question if question is not None else _last_human_text(messages)
+            name = "chat_complex" if self._is_complex(question) else "chat_simple"
+        return self.routes.get(name) or self.routes["default"]
+
+    def model(self, tier: str) -> ChatOpenAI:
+        """One client per tier, created on first use"""
+        model = self._models.get(tier)
+        if model is None:
+            model = self._models.setdefault(tier, ChatOpenAI(
+                model=self.tiers[tier],
+                openai_api_key=Config.require("OPENAI_API_KEY"),
+                base_url=Config.OPENAI_API_BASE,
+                temperature=self.temperature,
+                max_retries=Config.MODEL_MAX_RETRIES
+            ))
+        return model
+
+    @staticmethod
+    def _is_complex(question: str) -> bool:
+        return (
+            len(question) > Config.MODEL_ROUTER_SIMPLE_MAX_CHARS
+            or bool(_ANALYTICAL.search(question))
+        )
+
+
+def _last_human_text(messages) -> str:
+    if isinstance(messages, str):
+        return messages
+    for message in reversed(list(messages)):
+        if getattr(message, "type", None) == "human":
+            return str(message.content)
+    return ""
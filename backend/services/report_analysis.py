@@ -0,0 +1,220 @@
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from backend.config import Config
+from backend.database.section_cache import SectionCache
+from backend.models.holdings import HoldingsTable
+from backend.utils.fingerprint import data_fingerprint
+from backend.utils.metrics import metrics
+
+
+class ReportSection:
+    """One analysis section: its prompt and the slice of client data it is written from"""
+
+    def __init__(self, key: str, title: str, instructions: str, selector: Callable[[Dict], Dict]):
+        self.key = key
+        self.title = title
+        self.instructions = instructions
+        self.selector = selector
+
+    def select(self, client_data: Dict) -> Dict:
+        return self.selector(client_data)
+
+
+def _profile(client_data: Dict) -> Dict:
+    info = client_data['clientInfo']
+    return {
+        'name': info['name'],
+        'accountType': info['accountType'],
+        'riskProfile': info['riskProfile'],
+        'investmentStrategy': info['investmentStrategy'],
+    }
+
+
+def _allocation(client_data: Dict) -> Dict:
+    return {
+        asset_class: {key: data[key] for key in ('percentage', 'target', 'variance') if key in data}
+        for asset_class, data in client_data['assetAllocation'].items()
+    }
+
+
+def _top_holdings(client_data: Dict) -> List[Dict]:
+    holdings = HoldingsTable.coerce(client_data['topHoldings'])
+    return holdings.top(Config.REPORT_SECTION_MAX_HOLDINGS).to_records()
+
+
+SECTIONS = [
+    ReportSection(
+        'executive_summary', 'Executive Summary',
+        "Summarize the portfolio's value, return and positioning in a few sentences for the client.",
+        lambda client_data: {
+            'client': _profile(client_data),
+            'portfolioSummary': client_data['portfolioSummary'],
+            'performance': client_data['performance'],
+            'assetAllocation': _allocation(client_data),
+        }
+    ),
+    ReportSection(
+        'performance_analysis', 'Performance Analysis',
+        "Analyze returns across periods and the drivers of this period's change in value "
+        "(gains, income, contributions, withdrawals and fees).",
+        lambda client_data: {
+            'performance': client_data['performance'],
+            'portfolioSummary': client_data['portfolioSummary'],
+        }
+    ),
+    ReportSection(
+        'allocation_analysis', 'Asset Allocation Analysis',
+        "Analyze the allocation against its targets, including the variance of each asset class, "
+        "in light of the risk profile and strategy.",
+        lambda client_data: {
+            'riskProfile': client_data['clientInfo']['riskProfile'],
+            'investmentStrategy': client_data['clientInfo']['investmentStrategy'],
+            'assetAllocation': _allocation(client_data),
+        }
+    ),
+    ReportSection(
+        'key_observations', 'Key Observations',
+        "List the most important observations as '- ' bullet points.",
+        lambda client_data: {
+            'portfolioSummary': client_data['portfolioSummary'],
+            'performance': client_data['performance'],
+            'assetAllocation': _allocation(client_data),
+            'topHoldings': _top_holdings(client_data),
+        }
+    ),
+    ReportSection(
+        'recommendations', 'Recommendations',
+        "Give specific, numbered recommendations consistent with the risk profile and strategy.",
+        lambda client_data: {
+            'client': _profile(client_data),
+            'performance': client_data['performance'],
+            'assetAllocation': _allocation(client_data),
+            'topHoldings': _top_holdings(client_data),
+        }
+    ),
+    ReportSection(
+        'holdings_analysis', 'Holdings Analysis',
+        "Analyze the largest holdings: concentration, weights and gains.",
+        lambda client_data: {
+            'totalValue': client_data['portfolioSummary']['totalValue'],
+            'topHoldings': _top_holdings(client_data),
+        }
+    ),
+    ReportSection(
+        'historical_analysis', 'Historical Analysis',
+        "Describe the longer-term record of the account since it was opened.",
+        lambda client_data: {
+            'accountOpenDate': client_data['clientInfo']['accountOpenDate'],
+            'performance': client_data['performance'],
+            'beginningBalance': client_data['portfolioSummary']['beginningBalance'],
+            'totalValue': client_data['portfolioSummary']['totalValue'],
+        }
+    ),
+]
+
+SYSTEM_PROMPT = """You are a professional investment analyst writing one section of a client portfolio report.
+Use only the data provided and make specific, data-driven points.
+Write only the body of the section: no heading, no preamble, short paragraphs or '- ' bullet points."""
+
+
+class ReportAnalyzer:
+    """Writes every report section with its own concurrent request.
+
+    Each request carries only the data its section needs, so wall-clock time
+    follows the slowest section rather than one long completion. A section
+    whose request fails or comes back empty is retried, and if it still has
+    no text it gets an explicit "unavailable" note instead of disappearing.
+    Sections whose data slice is unchanged since the client's last report are
+    reused from the section cache instead of regenerated.
+    """
+
+    def __init__(self, chat_service, sections: Optional[List[ReportSection]] = None,
+                 cache: Optional[SectionCache] = None):
+        self.chat_service = chat_service
+        self.sections = sections or SECTIONS
+        if cache is None and Config.REPORT_SECTION_CACHE_ENABLED:
+            cache = SectionCache()
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(
+            max_workers=Config.REPORT_SECTION_CONCURRENCY, thread_name_prefix="report-section"
+        )
+
+    def analyze(self, client_data: Dict) -> Dict[str, str]:
+        """Section key -> text for every section"""
+        # Worker threads do not inherit the caller's context, so run each section in a
+        # copy of it: the quota priority and any collect_spans() block carry over
+        futures = {
+            section.key: self._executor.submit(
+                contextvars.copy_context().run, self.write_section, section, client_data
+            )
+            for section in self.sections
+        }
+        return {key: future.result() for key, future in futures.items()}
+
+    def write_section(self, section: ReportSection, client_data: Dict) -> str:
+        client_id = client_data['clientInfo']['id']
+        prompt = self.section_prompt(section, client_data)
+        # The prompt embeds the section's data slice and instructions
+        router = self.chat_service.router
+        tier = router.select("report_analysis", None).tier
+        fingerprint = data_fingerprint([router.tiers[tier], SYSTEM_PROMPT, prompt])
+        if self.cache is not None:
+            cached = self.cache.get(client_id, section.key, fingerprint)
+            metrics.counter("report_section_cache_total", "Report section cache lookups").inc(
+                result="miss" if cached is None else "hit"
+            )
+            if cached is not None:
+                return cached
+
+        messages = [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=prompt)]
+        error = "empty response"
+        for attempt in range(1 + Config.REPORT_SECTION_RETRIES):
+            try:
+                with metrics.span("report_section", section=section.key):
+                    response = self.chat_service.invoke(messages, "report_analysis", client_id)
+                text = self._strip_heading(response.content, section.title)
+                if text:
+                    metrics.counter("report_sections_total", "Report sections by outcome").inc(
+                        section=section.key, status="ok" if attempt == 0 else "retried"
+                    )
+                    # The fingerprint names the route's model: text from the fallback tier is not cached
+                    answered_by = response.response_metadata.get("model_tier", tier)
+                    if self.cache is not None and answered_by == tier:
+                        self.cache.put(client_id, section.key, fingerprint, text)
+                    return text
+                error = "empty response"
+            except Exception as e:
+                error = str(e)
+        print(f"Report section {section.key} for {client_id} failed: {error}")
+        metrics.counter("report_sections_total", "Report sections by outcome").inc(
+            section=section.key, status="failed"
+        )
+        return self._unavailable_text(section, error)
+
+    @classmethod
+    def unavailable(cls, error: str, sections: Optional[List[ReportSection]] = None) -> Dict[str, str]:
+        """Placeholder text for every section when no analysis could be generated"""
+        return {section.key: cls._unavailable_text(section, error) for section in sections or SECTIONS}
+
+    @staticmethod
+    def _unavailable_text(section: ReportSection, error: str) -> str:
+        return f"{section.title} is unavailable for this report ({error})."
+
+    @staticmethod
+    def section_prompt(section: ReportSection, client_data: Dict) -> str:
+        data = json.dumps(section.select(client_data), separators=(",", ":"))
+        return f"Section: {section.title}\n\nData:\n{data}\n\n{section.instructions}"
+
+    @staticmethod
+    def _strip_heading(content: str, title: str) -> str:
+        """Drop a repeated section title if the model added one anyway"""
+        text = (content or "").strip()
+        first_line, _, rest = text.partition('\n')
+        if title.lower() in first_line.lower() and len(first_line) <= len(title) + 12:
+            text = rest.strip()
+        return text
@@ -1,22 +1,35 @@
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional
 import jinja2
 import pdfkit
 import platform
 from pathlib import Path
 from backend.utils.visualization import PortfolioVisualizer
+from backend.models.holdings import HoldingsTable
 from backend.services.chat_service import ChatService
 from backend.services.market_service import MarketService
+from backend.services.report_analysis import ReportAnalyzer
 from backend.database.vector_store import VectorStore
+from backend.config import Config
+from backend.utils.metrics import metrics
 import os
 
 class ReportService:
-    def __init__(self):
+    def __init__(self, vector_store: Optional[VectorStore] = None):
         self.visualizer = PortfolioVisualizer()
         self.template_loader = jinja2.FileSystemLoader(searchpath="./templates")
         self.template_env = jinja2.Environment(loader=self.template_loader)
-        self.vector_store = VectorStore()  # Initialize VectorStore
+        # Reuse a shared, already-populated store when given; otherwise own one
+        self._owns_vector_store = vector_store is None
+        self.vector_store = vector_store if vector_store is not None else VectorStore()
         self.wkhtmltopdf_path = self._get_wkhtmltopdf_path()
+        self._analyzer = None
+
+    def _get_analyzer(self) -> ReportAnalyzer:
+        """Created with the first report rather than with the service"""
+        if self._analyzer is None:
+            self._analyzer = ReportAnalyzer(ChatService(vector_store=self.vector_store))
+        return self._analyzer
 
     def _get_wkhtmltopdf_path(self):
         """Get correct wkhtmltopdf executable path based on OS"""
@@ -25,138 +38,32 @@ class ReportService:
             custom_path = r'C:\Users\mdfar\Downloads\wkhtmltox-0.12.6-1.mxe-cross-win64\wkhtmltox\bin\wkhtmltopdf.exe'
             if Path(custom_path).exists():
                 return custom_path
-        return pdfkit.configuration(wkhtmltopdf=pdfkit.configuration().wkhtmltopdf.decode('utf-8'))
+        try:
+            return pdfkit.configuration(wkhtmltopdf=pdfkit.configuration().wkhtmltopdf.decode('utf-8'))
+        except OSError as e:
+            # HTML rendering still works; only generate_report() needs the binary
+            print(f"wkhtmltopdf not available, PDF export disabled: {e}")
+            return None
 
     def generate_report(self, client_data: Dict) -> bytes:
         """Generate a comprehensive PDF report for a client"""
+        with metrics.collect_spans() as spans, metrics.span("report_total"):
+            try:
+                pdf_content = self._generate_pdf(client_data)
+                metrics.counter("reports_total", "Reports generated").inc(status="ok")
+            except Exception:
+                metrics.counter("reports_total", "Reports generated").inc(status="error")
+                raise
+        if Config.DEBUG:
+            # One line per report instead of dumping prompts and template data
+            print(f"Report for {client_data['clientInfo']['id']}: " + ", ".join(
+                f"{name} {seconds:.2f}s" for name, seconds in spans
+            ))
+        return pdf_content
+
+    def _generate_pdf(self, client_data: Dict) -> bytes:
         try:
-            # Initialize vector store with enhanced data
-            self.vector_store.initialize_from_json({"clients": [client_data]})
-            
-            # Generate AI analysis with more detailed prompt
-            analysis_prompt = f"""
-            Please provide a detailed investment portfolio analysis with clear sections.
-            Use the following comprehensive data:
-
-            Client: {client_data['clientInfo']['name']}
-            Account Type: {client_data['clientInfo']['accountType']}
-            Risk Profile: {client_data['clientInfo']['riskProfile']}
-            Investment Strategy: {client_data['clientInfo']['investmentStrategy']}
-            Account Open Date: {client_data['clientInfo']['accountOpenDate']}
-            Relationship Manager: {client_data['clientInfo']['relationshipManager']}
-
-            Portfolio Summary:
-            - Total Value: ${client_data['portfolioSummary']['totalValue']:,.2f}
-            - Beginning Balance: ${client_data['portfolioSummary']['beginningBalance']:,.2f}
-            - Contributions: ${client_data['portfolioSummary']['contributions']:,.2f}
-            - Withdrawals: ${client_data['portfolioSummary']['withdrawals']:,.2f}
-            - Realized Gains: ${client_data['portfolioSummary']['realizedGains']:,.2f}
-            - Unrealized Gains: ${client_data['portfolioSummary']['unrealizedGains']:,.2f}
-            - Income Earned: ${client_data['portfolioSummary']['incomeEarned']:,.2f}
-            - Fees: ${client_data['portfolioSummary']['fees']:,.2f}
-
-            Performance Metrics:
-            - YTD Return: {client_data['performance']['ytd']}%
-            - 1 Year Return: {client_data['performance']['1year']}%
-            - 3 Year Return: {client_data['performance']['3year']}%
-            - 5 Year Return: {client_data['performance']['5year']}%
-            - Since Inception: {client_data['performance']['sinceInception']}%
-
-            Asset Allocation:
-            - Equities: {client_data['assetAllocation']['equities']['percentage']}% (Target: {client_data['assetAllocation']['equities']['target']}%)
-            - Fixed Income: {client_data['assetAllocation']['fixedIncome']['percentage']}% (Target: {client_data['assetAllocation']['fixedIncome']['target']}%)
-            - Alternatives: {client_data['assetAllocation']['alternatives']['percentage']}% (Target: {client_data['assetAllocation']['alternatives']['target']}%)
-            - Cash: {client_data['assetAllocation']['cash']['percentage']}% (Target: {client_data['assetAllocation']['cash']['target']}%)
-
-            Please analyze and provide specific recommendations in these sections:
-            1. Executive Summary
-            2. Performance Analysis
-            3. Asset Allocation Analysis
-            4. Key Observations
-            5. Recommendations
-            6. Holdings Analysis
-            7. Historical Analysis
-
-            Use the provided data to make specific, data-driven observations and recommendations.
-            Include variance analysis for asset allocation targets and performance benchmarks.
-            """
-
-            print("Sending prompt to AI:", analysis_prompt)  # Debug log
-            ai_analysis = ChatService.generate_analysis(analysis_prompt, self.vector_store)
-            print("Received AI analysis:", ai_analysis)  # Debug log
-            
-            # Clean up AI analysis before template rendering
-            if isinstance(ai_analysis, dict):
-                # Clean up recommendations formatting
-                if 'recommendations' in ai_analysis:
-                    recommendations = ai_analysis['recommendations']
-                    # Remove markdown formatting and clean up numbering
-                    recommendations = recommendations.replace('**', '')
-                    recommendations = recommendations.replace('1.', '•')
-                    recommendations = recommendations.replace('2.', '•')
-                    recommendations = recommendations.replace('3.', '•')
-                    recommendations = recommendations.replace('4.', '•')
-                    ai_analysis['recommendations'] = recommendations
-
-                # Clean up key observations formatting
-                if 'key_observations' in ai_analysis:
-                    observations = ai_analysis['key_observations']
-                    # Remove markdown formatting and standardize bullet points
-                    observations = observations.replace('**', '')
-                    observations = observations.replace('- ', '• ')
-                    ai_analysis['key_observations'] = observations
-            
-            # Generate visualizations
-            asset_allocation_chart = self.visualizer.create_asset_allocation_pie(
-                client_data['assetAllocation']
-            )
-            performance_chart = self.visualizer.create_performance_chart(
-                client_data['performance']
-            )
-            holdings_chart = self.visualizer.create_holdings_chart(
-                client_data['topHoldings']
-            )
-
-            # Prepare enhanced template data
-            template_data = {
-                'client': client_data['clientInfo'],
-                'portfolio': {
-                    **client_data['portfolioSummary'],
-                    'ytd': client_data['performance']['ytd'],
-                    'performance_metrics': client_data['performance'],
-                    'asset_allocation': client_data['assetAllocation']
-                },
-                'charts': {
-                    'asset_allocation': asset_allocation_chart,
-                    'performance': performance_chart,
-                    'holdings': holdings_chart
-                },
-                'generated_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'ai_analysis': ai_analysis,
-                'market_context': MarketService.get_market_summary(),
-                'report_metadata': {
-                    'generatedDate': datetime.now().strftime("%Y-%m-%d"),
-                    'reportPeriod': "Q4 2024",
-                    'disclaimer': "This report is for demonstration purposes only. Past performance does not guarantee future results. All data presented is AI-generated. For personalized investment advice, please consult a financial advisor.",
-                    'firmName': "Sample Asset Management FARID DEMO COMPANY ",
-                    'firmContact': {
-                        'phone': "+1 (555) 123--demo-number",
-                        'email': "faridmarketing@gmail.com",
-                        'address': "123 Financial District, New York, demo address"
-                    }
-                },
-                'top_holdings': client_data['topHoldings']
-            }
-
-            # Debug logging
-            print("Template data prepared:", {
-                k: v for k, v in template_data.items() 
-                if k not in ['charts']  # Exclude binary chart data from log
-            })
-
-            # Render HTML template
-            template = self.template_env.get_template('report_template.html')
-            html_content = template.render(**template_data)
+            html_content = self.render_html(client_data)
 
             # Configure pdfkit options based on environment
             pdf_options = {
@@ -178,16 +85,102 @@ class ReportService:
                 config = pdfkit.configuration()
 
             # Generate PDF
-            pdf_content = pdfkit.from_string(
-                html_content,
-                False,
-                options=pdf_options,
-                configuration=config
-            )
+            with metrics.span("pdf_conversion"):
+                pdf_content = pdfkit.from_string(
+                    html_content,
+                    False,
+                    options=pdf_options,
+                    configuration=config
+                )
 
             return pdf_content
         except Exception as e:
             print(f"Report generation error: {str(e)}")
             print(f"Error type: {type(e)}")
             print(f"Error details: {e.__class__.__name__}")
-            raise 
\ No newline at end of file
+            raise 
+
+    def render_html(self, client_data: Dict) -> str:
+        """Run the AI analysis, draw the charts and render the report HTML (everything but the PDF step)"""
+        # A shared store already holds the whole book; only a private one needs this client
+        if self._owns_vector_store:
+            self.vector_store.initialize_from_json({"clients": [client_data]})
+
+        # Each section is written by its own concurrent request
+        try:
+            with metrics.span("report_analysis"):
+                ai_analysis = self._get_analyzer().analyze(client_data)
+        except ValueError as e:
+            # No model (e.g. the API key is missing): still render the data and charts
+            print(f"Analysis generation error: {str(e)}")
+            ai_analysis = ReportAnalyzer.unavailable(str(e))
+
+        # Clean up AI analysis before template rendering
+        if isinstance(ai_analysis, dict):
+            # Clean up recommendations formatting
+            if 'recommendations' in ai_analysis:
+                recommendations = ai_analysis['recommendations']
+                # Remove markdown formatting and clean up numbering
+                recommendations = recommendations.replace('**', '')
+                recommendations = recommendations.replace('1.', '•')
+                recommendations = recommendations.replace('2.', '•')
+                recommendations = recommendations.replace('3.', '•')
+                recommendations = recommendations.replace('4.', '•')
+                ai_analysis['recommendations'] = recommendations
+
+            # Clean up key observations formatting
+            if 'key_observations' in ai_analysis:
+                observations = ai_analysis['key_observations']
+                # Remove markdown formatting and standardize bullet points
+                observations = observations.replace('**', '')
+                observations = observations.replace('- ', '• ')
+                ai_analysis['key_observations'] = observations
+
+        # Generate visualizations
+        with metrics.span("chart", chart="asset_allocation"):
+            asset_allocation_chart = self.visualizer.create_asset_allocation_pie(
+                client_data['assetAllocation']
+            )
+        with metrics.span("chart", chart="performance"):
+            performance_chart = self.visualizer.create_performance_chart(
+                client_data['performance']
+            )
+        top_holdings = HoldingsTable.coerce(client_data['topHoldings']).top(Config.REPORT_TOP_HOLDINGS)
+        with metrics.span("chart", chart="holdings"):
+            holdings_chart = self.visualizer.create_holdings_chart(top_holdings, top_n=None)
+
+        # Prepare enhanced template data
+        template_data = {
+            'client': client_data['clientInfo'],
+            'portfolio': {
+                **client_data['portfolioSummary'],
+                'ytd': client_data['performance']['ytd'],
+                'performance_metrics': client_data['performance'],
+                'asset_allocation': client_data['assetAllocation']
+            },
+            'charts': {
+                'asset_allocation': asset_allocation_chart,
+                'performance': performance_chart,
+                'holdings': holdings_chart
+            },
+            'generated_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'ai_analysis': ai_analysis,
+            'market_context': MarketService.get_market_summary(),
+            'report_metadata': {
+                'generatedDate': datetime.now().strftime("%Y-%m-%d"),
+                'reportPeriod': "Q4 2024",
+                'disclaimer': "This report is for demonstration purposes only. Past performance does not guarantee future results. All data presented is AI-generated. For personalized investment advice, please consult a financial advisor.",
+                'firmName': "Sample Asset Management FARID DEMO COMPANY ",
+                'firmContact': {
+                    'phone': "+1 (555) 123--demo-number",
+                    'email': "faridmarketing@gmail.com",
+                    'address': "123 Financial District, New York, demo address"
+                }
+            },
+            'top_holdings': top_holdings
+        }
+
+        # Render HTML template
+        with metrics.span("template_render"):
+            template = self.template_env.get_template('report_template.html')
+            return template.render(**template_data)
@@ -0,0 +1,132 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.config import Config
+
+
+class _ClientCache:
+    """Cached answers for one client at one data version"""
+
+    __slots__ = ("data_version", "questions", "vectors", "answers", "latencies")
+
+    def __init__(self, data_version: str):
+        self.data_version = data_version
+        self.questions: Dict[str, int] = {}  # Normalized question -> row
+        self.vectors: List[np.ndarray] = []
+        self.answers: List[str] = []
+        self.latencies: List[float] = []
+
+
+class SemanticResponseCache:
+    """Reuse answers to near-duplicate questions about the same client.
+
+    Questions are embedded with the vector store's embeddings and compared by
+    cosine similarity against earlier questions for the same client_id and
+    data version. Exact repeats are matched without an embedding call, and a
+    new data version drops the client's previous entries. The key holds no
+    conversation, so ChatService only uses it for a session's opening question.
+    """
+
+    def __init__(self, embeddings,
+                 threshold: float = Config.CHAT_CACHE_SIMILARITY_THRESHOLD,
+                 max_entries_per_client: int = Config.CHAT_CACHE_MAX_ENTRIES_PER_CLIENT):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_entries_per_client = max_entries_per_client
+        self._clients: Dict[str, _ClientCache] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_latency_seconds = 0.0
+
+    @staticmethod
+    def _normalize(question: str) -> str:
+        return " ".join(question.lower().split())
+
+    def lookup(self, question: str, client_id: str,
+               data_version: str) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """Return ``(answer, question_vector)``; answer is None on a miss.
+
+        The vector is the question's ``embed_query`` embedding, handed back so
+        the retrieval search and ``store`` do not embed the question again.
+        """
+        key = self._normalize(question)
+        with self._lock:
+            entries = self._entries_for(client_id, data_version)
+            row = entries.questions.get(key)
+            if row is not None:
+                return self._hit(entries, row), entries.vectors[row]
+
+        try:
+            vector = self._embed(question)
+        except Exception as e:
+            print(f"Response cache embedding error: {str(e)}")
+            with self._lock:
+                self.misses += 1
+            return None, None
+
+        with self._lock:
+            entries = self._entries_for(client_id, data_version)
+            if entries.vectors:
+                similarities = np.stack(entries.vectors) @ self._unit(vector)
+                row = int(np.argmax(similarities))
+                if similarities[row] >= self.threshold:
+                    return self._hit(entries, row), vector
+            self.misses += 1
+            return None, vector
+
+    def store(self, question: str, vector: Optional[np.ndarray], answer: str,
+              client_id: str, data_version: str, latency_seconds: float):
+        """Remember an answer produced by the full retrieval + LLM path"""
+        if vector is None:
+            return
+        with self._lock:
+            entries = self._entries_for(client_id, data_version)
+            if len(entries.answers) >= self.max_entries_per_client:
+                return  # Keep the earliest (most frequently reused) questions
+            entries.questions[self._normalize(question)] = len(entries.answers)
+            entries.vectors.append(self._unit(vector))
+            entries.answers.append(answer)
+            entries.latencies.append(latency_seconds)
+
+    def invalidate(self, client_id: Optional[str] = None):
+        """Drop cached answers for one client, or for every client"""
+        with self._lock:
+            if client_id is None:
+                self._clients.clear()
+            else:
+                self._clients.pop(client_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_latency_seconds": self.saved_latency_seconds,
+                "entries": sum(len(entries.answers) for entries in self._clients.values())
+            }
+
+    def _embed(self, question: str) -> np.ndarray:
+        return np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+
+    @staticmethod
+    def _unit(vector: np.ndarray) -> np.ndarray:
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _entries_for(self, client_id: str, data_version: str) -> _ClientCache:
+        entries = self._clients.get(client_id)
+        if entries is None or entries.data_version != data_version:
+            # Portfolio changed (or first use): earlier answers are stale
+            entries = _ClientCache(data_version)
+            self._clients[client_id] = entries
+        return entries
+
+    def _hit(self, entries: _ClientCache, row: int) -> str:
+        self.hits += 1
+        self.saved_latency_seconds += entries.latencies[row]
+        return entries.answers[row]
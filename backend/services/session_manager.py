@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+from backend.config import Config
+
+
+class ChatSession:
+    """Conversation state for one (user session, client) pair"""
+
+    __slots__ = (
+        "session_id", "client_id", "client_data", "history",
+        "max_messages", "size_bytes", "last_access",
+        "summary", "pending_summary", "summarizing", "generation", "__weakref__"
+    )
+
+    def __init__(self, session_id: str, client_data: Dict, max_messages: int):
+        self.session_id = session_id
+        self.client_id = client_data['clientInfo']['id']
+        self.client_data = client_data
+        self.history = deque()  # (role, content) tuples, oldest first
+        self.max_messages = max_messages
+        self.size_bytes = 0
+        self.last_access = time.monotonic()
+        # Rolling summary of turns that no longer fit in the history
+        self.summary = None
+        self.pending_summary = []
+        self.summarizing = False
+        # Bumped by clear(): a summary folded from the old conversation is dropped
+        self.generation = 0
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.session_id, self.client_id)
+
+    def append(self, role: str, content: str) -> List[Tuple[str, str]]:
+        """Append a message and return the oldest ones dropped to stay bounded"""
+        self.history.append((role, content))
+        self.size_bytes += len(content)
+        return self.pop_oldest(len(self.history) - self.max_messages)
+
+    def pop_oldest(self, count: int) -> List[Tuple[str, str]]:
+        """Remove and return the ``count`` oldest messages"""
+        dropped = []
+        for _ in range(min(count, len(self.history))):
+            old = self.history.popleft()
+            self.size_bytes -= len(old[1])
+            dropped.append(old)
+        return dropped
+
+    def clear(self):
+        self.history.clear()
+        self.size_bytes = 0
+        self.summary = None
+        self.pending_summary = []
+        self.summarizing = False
+        self.generation += 1
+
+
+class ChatSessionManager:
+    """Bounded registry of chat sessions keyed by (session_id, client_id).
+
+    Sessions are kept in LRU order and evicted when idle longer than the TTL,
+    when there are more than ``max_sessions`` of them, or when the combined
+    history size exceeds ``max_bytes``.
+    """
+
+    def __init__(self,
+                 max_sessions: int = Config.CHAT_MAX_SESSIONS,
+                 ttl_seconds: float = Config.CHAT_SESSION_TTL_SECONDS,
+                 max_messages: int = Config.CHAT_HISTORY_MAX_MESSAGES,
+                 max_bytes: int = Config.CHAT_SESSIONS_MAX_BYTES):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self._sessions = OrderedDict()
+        self._total_bytes = 0
+        self._evictions = 0
+        self._lock = threading.RLock()
+
+    def get_session(self, session_id: str, client_data: Dict) -> ChatSession:
+        """Return the session for this user and client, creating it if needed"""
+        key = (session_id, client_data['clientInfo']['id'])
+        with self._lock:
+            self._evict_expired()
+            session = self._sessions.get(key)
+            if session is None:
+                session = ChatSession(session_id, client_data, self.max_messages)
+                self._sessions[key] = session
+            else:
+                session.client_data = client_data  # Pick up refreshed portfolio data
+                self._sessions.move_to_end(key)
+            session.last_access = time.monotonic()
+            self._enforce_limits(keep=key)
+            return session
+
+    def append(self, session: ChatSession, role: str, content: str) -> List[Tuple[str, str]]:
+        """Append to a session's history, keeping memory accounting in sync"""
+        with self._lock:
+            before = session.size_bytes
+            dropped = session.append(role, content)
+            if self._sessions.get(session.key) is session:
+                self._total_bytes += session.size_bytes - before
+                self._enforce_limits(keep=session.key)
+            return dropped
+
+    def drop_oldest(self, session: ChatSession, count: int) -> List[Tuple[str, str]]:
+        """Remove the oldest messages from a session's history"""
+        with self._lock:
+            before = session.size_bytes
+            dropped = session.pop_oldest(count)
+            if self._sessions.get(session.key) is session:
+                self._total_bytes += session.size_bytes - before
+            return dropped
+
+    def set_summary(self, session: ChatSession, summary: str, generation: int) -> bool:
+        """Replace the session's rolling summary, unless it was cleared since ``generation``"""
+        with self._lock:
+            if session.generation != generation:
+                return False
+            session.summary = summary
+            return True
+
+    def reset(self, session_id: str, client_id: Optional[str] = None):
+        """Clear history for one client of a user session, or all of its clients"""
+        with self._lock:
+            for key, session in list(self._sessions.items()):
+                if key[0] == session_id and (client_id is None or key[1] == client_id):
+                    self._total_bytes -= session.size_bytes
+                    session.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "history_bytes": self._total_bytes,
+                "evictions": self._evictions
+            }
+
+    def _evict_expired(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        # LRU order means the idle sessions are at the front
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if session.last_access >= cutoff:
+                break
+            self._drop(key)
+
+    def _enforce_limits(self, keep: Tuple[str, str]):
+        for key in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions and self._total_bytes <= self.max_bytes:
+                break
+            if key != keep:  # Never evict the session currently in use
+                self._drop(key)
+
+    def _drop(self, key: Tuple[str, str]):
+        session = self._sessions.pop(key)
+        self._total_bytes -= session.size_bytes
+        self._evictions += 1
+
+
+def create_session_store(backend: Optional[str] = None):
+    """Build the chat session store named by ``backend`` (default: Config.CHAT_SESSION_STORE).
+
+    * ``memory`` - ChatSessionManager, private to this process
+    * ``sqlite`` - SQLiteSessionStore at Config.CHAT_SESSION_DB_PATH, shared by
+      every worker process on the host (e.g. behind the HTTP API)
+    """
+    backend = (backend or Config.CHAT_SESSION_STORE).lower()
+    if backend == "memory":
+        return ChatSessionManager()
+    if backend == "sqlite":
+        from backend.database.session_store import SQLiteSessionStore
+        return SQLiteSessionStore()
+    raise ValueError(f"Unknown chat session store: {backend}")
@@ -0,0 +1,18 @@
+_rebuilt_models = set()
+
+
+def ensure_model_rebuilt(model_cls) -> None:
+    """Run pydantic ``model_rebuild()`` at most once per class per process.
+
+    Older langchain/pydantic combinations need ChatOpenAI and OpenAIEmbeddings
+    rebuilt after ``BaseCache`` is importable; repeating it on every import or
+    rerun only costs startup time.
+    """
+    if model_cls in _rebuilt_models:
+        return
+    try:
+        if not getattr(model_cls, "__pydantic_complete__", False):
+            model_cls.model_rebuild()
+    except Exception as e:
+        print(f"{model_cls.__name__} model rebuild warning: {e}")
+    _rebuilt_models.add(model_cls)
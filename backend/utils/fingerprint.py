@@ -0,0 +1,15 @@
+import hashlib
+import json
+
+
+def _encode(value):
+    # Compact containers (e.g. holdings tables) expose their rows as plain records
+    if hasattr(value, "to_records"):
+        return value.to_records()
+    raise TypeError(f"Object of type {type(value).__name__} is not fingerprintable")
+
+
+def data_fingerprint(data) -> str:
+    """Stable short hash of JSON-like data, used as a cache version key"""
+    payload = json.dumps(data, sort_keys=True, separators=(",", ":"), default=_encode)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
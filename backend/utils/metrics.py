@@ -0,0 +1,255 @@
+"""Lightweight in-process metrics: timed spans, histograms and counters.
+
+    from backend.utils.metrics import metrics
+
+    with metrics.span("faiss_search"):
+        ...
+    metrics.counter("chat_requests_total", "Chat messages by path").inc(path="llm")
+
+Everything is exported in the Prometheus text format, either from a local
+HTTP endpoint (Config.METRICS_PORT) or to a file (Config.METRICS_FILE).
+When metrics are disabled (Config.METRICS_ENABLED, default: Config.DEBUG)
+spans and counters are no-ops.
+"""
+import atexit
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from backend.config import Config
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Spans finished inside an active ``collect_spans()`` block, per task/thread
+_collected: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "collected_spans", default=None
+)
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """Monotonic count per label set"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(key)} {value:g}"
+
+
+class Histogram:
+    """Bucketed distribution per label set (cumulative buckets, sum and count)"""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, List[float]] = {}  # per-bucket counts + [sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def summary(self, **labels) -> Dict[str, float]:
+        series = self._series.get(_label_key(labels))
+        if not series:
+            return {"count": 0, "sum": 0.0}
+        return {"count": series[-1], "sum": series[-2]}
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(key, (('le', f'{bound:g}'),))} {cumulative:g}"
+            yield f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {series[-1]:g}"
+            yield f"{self.name}_sum{_format_labels(key)} {series[-2]:.6f}"
+            yield f"{self.name}_count{_format_labels(key)} {series[-1]:g}"
+
+
+class _NullMetric:
+    def inc(self, *args, **kwargs):
+        pass
+
+    def observe(self, *args, **kwargs):
+        pass
+
+
+_NULL_METRIC = _NullMetric()
+
+
+class MetricsRegistry:
+    """Process-wide registry of named counters and histograms"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._writer = None
+
+    def counter(self, name: str, help_text: str = ""):
+        if not self.enabled:
+            return _NULL_METRIC
+        return self._get_or_create(name, lambda: Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        if not self.enabled:
+            return _NULL_METRIC
+        return self._get_or_create(name, lambda: Histogram(name, help_text, buckets))
+
+    def _get_or_create(self, name: str, factory):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = factory()
+        return metric
+
+    @contextmanager
+    def span(self, name: str, **labels):
+        """Time a block into ``span_duration_seconds{span=name}``; errors also count in ``span_errors_total``"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.counter("span_errors_total", "Spans that raised").inc(span=name, **labels)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.histogram("span_duration_seconds", "Duration of instrumented spans").observe(
+                elapsed, span=name, **labels
+            )
+            collected = _collected.get()
+            if collected is not None:
+                collected.append((name, elapsed))
+
+    @contextmanager
+    def collect_spans(self):
+        """Yield a list that receives (span, seconds) for every span finished inside the block"""
+        spans: List[Tuple[str, float]] = []
+        token = _collected.set(spans)
+        try:
+            yield spans
+        finally:
+            _collected.reset(token)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = [line for metric in metrics for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """Write the exposition atomically (for node_exporter's textfile collector or a sidecar)"""
+        temp_path = f"{path}.tmp.{os.getpid()}"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+
+    def start_exporters(self, port: Optional[int] = None, path: Optional[str] = None,
+                        interval: Optional[float] = None):
+        """Start the configured exporters once per process (safe to call repeatedly)"""
+        if not self.enabled:
+            return
+        port = Config.METRICS_PORT if port is None else port
+        path = Config.METRICS_FILE if path is None else path
+        interval = Config.METRICS_EXPORT_INTERVAL_SECONDS if interval is None else interval
+        with self._lock:
+            if port and self._server is None:
+                self._server = _serve(self, port)
+                print(f"Serving metrics on http://127.0.0.1:{self._server.server_address[1]}/metrics")
+            if path and self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_periodically, args=(path, interval), daemon=True, name="metrics-writer"
+                )
+                self._writer.start()
+                atexit.register(self.write, path)
+
+    def _write_periodically(self, path: str, interval: float):
+        while True:
+            time.sleep(interval)
+            try:
+                self.write(path)
+            except OSError as e:
+                print(f"Error writing metrics to {path}: {e}")
+
+
+def _serve(registry: MetricsRegistry, port: int) -> ThreadingHTTPServer:
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((Config.METRICS_HOST, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+    return server
+
+
+metrics = MetricsRegistry(enabled=Config.METRICS_ENABLED)
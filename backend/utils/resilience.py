@@ -0,0 +1,336 @@
+"""Deadlines, hedged requests and circuit breakers for calls to external services.
+
+    from backend.utils.resilience import resilience
+
+    quote = await resilience.policy("market").acall(lambda: fetch_quote(symbol))
+    vector = resilience.policy("embedding").call(lambda: embeddings.embed_query(text))
+
+Each upstream (llm_fast, llm_heavy, embedding, market, ...) has one policy per
+process, configured from Config.RESILIENCE_POLICIES: an exact entry, else the
+entry for the name's prefix ("llm" for "llm_fast"), on top of "default".
+
+* deadline: the call fails with DeadlineExceeded (a TimeoutError) after
+  ``timeout`` seconds, however the upstream client is configured
+* hedging: if no answer has arrived after ``hedge_after`` seconds, the same
+  call is issued again and the first answer wins; only use it for
+  idempotent, cheap requests
+* circuit breaker: after ``failure_threshold`` consecutive failures calls
+  fail fast with CircuitOpenError for ``reset_seconds``, then one trial call
+  decides whether the circuit closes again. Only timeouts, connection
+  errors, 429s and 5xx responses count as failures; an upstream that
+  rejects a bad request (400, 401, ...) is still answering
+
+Outcomes, latencies, hedges and breaker transitions are exported as metrics.
+"""
+import asyncio
+import concurrent.futures
+import sys
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from backend.config import Config
+from backend.utils.metrics import metrics
+
+T = TypeVar("T")
+
+
+class UpstreamUnavailable(Exception):
+    """An external service did not answer in time or is failing fast"""
+
+    def __init__(self, upstream: str, message: str):
+        super().__init__(f"{upstream}: {message}")
+        self.upstream = upstream
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(upstream, f"circuit open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(UpstreamUnavailable, TimeoutError):
+    def __init__(self, upstream: str, timeout: float):
+        super().__init__(upstream, f"no response within {timeout:g}s")
+        self.timeout = timeout
+
+
+# Errors that say the upstream itself is unhealthy, as opposed to rejecting the request
+UPSTREAM_FAILURES = (TimeoutError, asyncio.TimeoutError, concurrent.futures.TimeoutError, ConnectionError)
+
+
+def _client_connection_errors() -> tuple:
+    """Connection errors of the openai and aiohttp clients, if loaded.
+
+    An error from either client means its module is already imported, so market-only
+    workers never load openai (nor LLM-only ones aiohttp) just to classify errors.
+    """
+    errors = []
+    if "openai" in sys.modules:
+        errors.append(sys.modules["openai"].APIConnectionError)
+    if "aiohttp" in sys.modules:
+        errors.append(sys.modules["aiohttp"].ClientConnectionError)
+    return tuple(errors)
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """Whether ``error`` should count against the upstream's circuit breaker"""
+    if isinstance(error, (UpstreamUnavailable,) + UPSTREAM_FAILURES + _client_connection_errors()):
+        return True
+    # openai.APIStatusError has status_code, aiohttp.ClientResponseError has status
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open -> closed"""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless the call may go ahead"""
+        if not self.failure_threshold:
+            return
+        with self._lock:
+            if self.state == self.OPEN:
+                retry_after = self._opened_at + self.reset_seconds - time.monotonic()
+                if retry_after > 0:
+                    raise CircuitOpenError(self.name, retry_after)
+                self._transition(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                if self._trial_running:
+                    raise CircuitOpenError(self.name, self.reset_seconds)
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+            if self.state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def record_failure(self):
+        if not self.failure_threshold:
+            return
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self.state == self.HALF_OPEN or (
+                    self.state == self.CLOSED and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self._transition(self.OPEN)
+
+    def _transition(self, state: str):
+        print(f"Circuit {self.name}: {self.state} -> {state}")
+        self.state = state
+        metrics.counter("circuit_breaker_transitions_total", "Circuit breaker state changes").inc(
+            upstream=self.name, state=state
+        )
+
+
+# Shared by every policy's synchronous calls that need a deadline or a hedge
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=Config.RESILIENCE_MAX_WORKERS, thread_name_prefix="resilience"
+                )
+    return _executor
+
+
+def _discard(task: asyncio.Future):
+    # Losing attempts may fail after the race is decided; nobody awaits them
+    if not task.cancelled():
+        task.exception()
+
+
+class ResiliencePolicy:
+    """Deadline, optional hedging and a circuit breaker around calls to one upstream"""
+
+    def __init__(self, name: str, timeout: Optional[float] = None, hedge_after: Optional[float] = None,
+                 max_hedges: int = 1, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.max_hedges = max_hedges
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_seconds)
+
+    def call(self, fn: Callable[[], T], timeout: Optional[float] = None, hedge: bool = True) -> T:
+        """Run a blocking call. ``timeout`` overrides the policy's (0: no deadline).
+
+        A call that misses its deadline keeps running on its worker thread;
+        only the caller stops waiting for it.
+        """
+        timeout, hedge_after = self._limits(timeout, hedge)
+        self._before_call()
+        started = time.perf_counter()
+        if not timeout and not hedge_after:
+            # Nothing to race against: run inline
+            try:
+                result = fn()
+            except Exception as e:
+                self._finish("error", started, error=e)
+                raise
+            self._finish("ok", started)
+            return result
+
+        executor = _get_executor()
+        attempts = {executor.submit(fn): 0}
+        launched = 1
+        hedge_at = started + hedge_after if hedge_after else None
+        error = None
+        try:
+            while attempts:
+                done, _ = concurrent.futures.wait(
+                    list(attempts), timeout=self._next_wait(started, timeout, hedge_at),
+                    return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    attempt = attempts.pop(future)
+                    if future.exception() is None:
+                        self._finish("ok", started, attempt)
+                        return future.result()
+                    error = future.exception()
+                if attempts and self._expired(started, timeout):
+                    self._finish("timeout", started)
+                    raise DeadlineExceeded(self.name, timeout)
+                if attempts and hedge_at is not None and time.perf_counter() >= hedge_at:
+                    attempts[executor.submit(fn)] = launched
+                    launched += 1
+                    hedge_at = self._hedged(hedge_after, launched)
+            self._finish("error", started, error=error)
+            raise error
+        finally:
+            for future in attempts:
+                future.cancel()
+
+    async def acall(self, fn: Callable[[], Awaitable[T]], timeout: Optional[float] = None, hedge: bool = True) -> T:
+        """Await ``fn()`` under the policy. ``timeout`` overrides the policy's (0: no deadline)"""
+        timeout, hedge_after = self._limits(timeout, hedge)
+        self._before_call()
+        started = time.perf_counter()
+        attempts = {asyncio.ensure_future(fn()): 0}
+        launched = 1
+        hedge_at = started + hedge_after if hedge_after else None
+        error = None
+        try:
+            while attempts:
+                done, _ = await asyncio.wait(
+                    list(attempts), timeout=self._next_wait(started, timeout, hedge_at),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    attempt = attempts.pop(task)
+                    if task.exception() is None:
+                        self._finish("ok", started, attempt)
+                        return task.result()
+                    error = task.exception()
+                if attempts and self._expired(started, timeout):
+                    self._finish("timeout", started)
+                    raise DeadlineExceeded(self.name, timeout)
+                if attempts and hedge_at is not None and time.perf_counter() >= hedge_at:
+                    attempts[asyncio.ensure_future(fn())] = launched
+                    launched += 1
+                    hedge_at = self._hedged(hedge_after, launched)
+            self._finish("error", started, error=error)
+            raise error
+        finally:
+            for task in attempts:
+                task.cancel()
+                task.add_done_callback(_discard)
+
+    def _limits(self, timeout: Optional[float], hedge: bool):
+        timeout = self.timeout if timeout is None else timeout
+        hedge_after = self.hedge_after if hedge else None
+        if hedge_after and timeout and hedge_after >= timeout:
+            hedge_after = None
+        return timeout, hedge_after
+
+    def _before_call(self):
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            metrics.counter("upstream_calls_total", "External calls by upstream and outcome").inc(
+                upstream=self.name, outcome="rejected"
+            )
+            raise
+
+    @staticmethod
+    def _next_wait(started: float, timeout: Optional[float], hedge_at: Optional[float]) -> Optional[float]:
+        """Seconds until the deadline or the next hedge, whichever is first"""
+        now = time.perf_counter()
+        limits = [at - now for at in (started + timeout if timeout else None, hedge_at) if at is not None]
+        return max(0.0, min(limits)) if limits else None
+
+    @staticmethod
+    def _expired(started: float, timeout: Optional[float]) -> bool:
+        return bool(timeout) and time.perf_counter() - started >= timeout
+
+    def _hedged(self, hedge_after: float, launched: int) -> Optional[float]:
+        """Count a launched hedge and return when the next one is due, if any"""
+        metrics.counter("upstream_hedges_total", "Hedged requests by upstream").inc(
+            upstream=self.name, result="launched"
+        )
+        return time.perf_counter() + hedge_after if launched - 1 < self.max_hedges else None
+
+    def _finish(self, outcome: str, started: float, attempt: int = 0, error: Optional[BaseException] = None):
+        metrics.histogram("upstream_latency_seconds", "External call latency by upstream and outcome").observe(
+            time.perf_counter() - started, upstream=self.name, outcome=outcome
+        )
+        metrics.counter("upstream_calls_total", "External calls by upstream and outcome").inc(
+            upstream=self.name, outcome=outcome
+        )
+        if attempt:
+            metrics.counter("upstream_hedges_total", "Hedged requests by upstream").inc(
+                upstream=self.name, result="won"
+            )
+        if outcome == "ok" or (error is not None and not is_upstream_failure(error)):
+            # A rejected request still shows the upstream is up (and ends a half-open trial)
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+
+class Resilience:
+    """Per-process registry of upstream policies"""
+
+    def __init__(self, settings: Optional[Dict[str, Dict]] = None):
+        self.settings = settings if settings is not None else Config.RESILIENCE_POLICIES
+        self._policies: Dict[str, ResiliencePolicy] = {}
+        self._lock = threading.Lock()
+
+    def policy(self, name: str) -> ResiliencePolicy:
+        policy = self._policies.get(name)
+        if policy is None:
+            with self._lock:
+                policy = self._policies.get(name)
+                if policy is None:
+                    policy = self._policies[name] = ResiliencePolicy(name, **self._settings_for(name))
+        return policy
+
+    def _settings_for(self, name: str) -> Dict:
+        specific = self.settings.get(name) or self.settings.get(name.split("_")[0]) or {}
+        return {**self.settings.get("default", {}), **specific}
+
+    def status(self) -> Dict[str, str]:
+        """Breaker state per upstream seen so far"""
+        return {name: policy.breaker.state for name, policy in sorted(self._policies.items())}
+
+
+resilience = Resilience()
@@ -1,20 +1,44 @@
-import matplotlib.pyplot as plt
 import io
 import base64
+import threading
+from typing import Optional
+
+from backend.config import Config
+from backend.models.holdings import HoldingsTable
+
+_figure_class = None
+_figure_lock = threading.Lock()
+
+def _new_figure(**kwargs):
+    """A standalone Agg figure; unlike pyplot there is no shared current figure,
+    so reports can draw charts on several threads at once"""
+    global _figure_class
+    if _figure_class is None:
+        # Import matplotlib on first chart rather than at package import
+        with _figure_lock:
+            if _figure_class is None:
+                import matplotlib.style
+                from matplotlib.figure import Figure
+                # Use a built-in style that's clean and modern
+                matplotlib.style.use('fivethirtyeight')
+                _figure_class = Figure
+    return _figure_class(**kwargs)
+
+def _to_base64_png(fig, **savefig_kwargs) -> str:
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight',
+               facecolor='white', edgecolor='none',
+               transparent=False, **savefig_kwargs)
+    return base64.b64encode(buffer.getvalue()).decode()
 
 class PortfolioVisualizer:
-    def __init__(self):
-        # Use a built-in style that's clean and modern
-        plt.style.use('fivethirtyeight')
-        
+
     def create_asset_allocation_pie(self, allocation_data):
         """Create pie chart for asset allocation"""
         try:
-            # Clear any existing plots
-            plt.clf()
-            
             # Create figure with specific size and DPI
-            plt.figure(figsize=(10, 8), dpi=100, facecolor='white')
+            fig = _new_figure(figsize=(10, 8), dpi=100, facecolor='white')
+            ax = fig.add_subplot()
             
             # Extract data
             labels = []
@@ -26,7 +50,7 @@ class PortfolioVisualizer:
                 sizes.append(data['percentage'])
             
             # Create pie chart with improved styling
-            plt.pie(sizes, 
+            ax.pie(sizes, 
                    labels=labels,
                    colors=colors,
                    autopct='%1.1f%%',
@@ -35,25 +59,16 @@ class PortfolioVisualizer:
                    textprops={'fontsize': 12, 'color': 'black'},
                    wedgeprops={'width': 0.7, 'edgecolor': 'white'})
             
-            plt.title('Asset Allocation', pad=20, fontsize=14, fontweight='bold', color='black')
+            ax.set_title('Asset Allocation', pad=20, fontsize=14, fontweight='bold', color='black')
             
             # Ensure the pie is drawn as a circle
-            plt.axis('equal')
+            ax.axis('equal')
             
             # Add padding
-            plt.tight_layout(pad=3.0)
+            fig.tight_layout(pad=3.0)
             
             # Save to buffer with white background
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', bbox_inches='tight', 
-                       facecolor='white', edgecolor='none',
-                       transparent=False)
-            buffer.seek(0)
-            image_png = buffer.getvalue()
-            buffer.close()
-            plt.close()
-            
-            return base64.b64encode(image_png).decode()
+            return _to_base64_png(fig)
             
         except Exception as e:
             print(f"Error creating pie chart: {str(e)}")
@@ -62,92 +77,75 @@ class PortfolioVisualizer:
     def create_performance_chart(self, performance_data):
         """Create line graph for performance metrics"""
         try:
-            plt.clf()
-            plt.figure(figsize=(12, 6), dpi=100, facecolor='white')
+            fig = _new_figure(figsize=(12, 6), dpi=100, facecolor='white')
+            ax = fig.add_subplot()
             
-            # Define periods and values
+            # Define periods and values; newer accounts have no 3/5-year returns
             periods = ['YTD', '1 Year', '3 Year', '5 Year', 'Since Inception']
-            values = [
-                performance_data['ytd'],
-                performance_data['1year'],
-                performance_data['3year'],
-                performance_data['5year'],
-                performance_data['sinceInception']
-            ]
+            keys = ['ytd', '1year', '3year', '5year', 'sinceInception']
+            available = [(period, performance_data.get(key)) for period, key in zip(periods, keys)
+                         if performance_data.get(key) is not None]
+            periods = [period for period, _ in available]
+            values = [value for _, value in available]
             
             # Create line plot with markers
-            plt.plot(periods, values, marker='o', linewidth=2, markersize=8, 
+            ax.plot(periods, values, marker='o', linewidth=2, markersize=8, 
                     color='#2c5282', label='Return')
             
             # Add value labels above points
             for i, value in enumerate(values):
-                plt.text(i, value + 0.5, f'{value:.1f}%', 
+                ax.text(i, value + 0.5, f'{value:.1f}%', 
                         ha='center', va='bottom', fontsize=10, color='black')
             
             # Customize the plot
-            plt.title('Performance History', pad=20, fontsize=14, fontweight='bold', color='black')
-            plt.ylabel('Return (%)', fontsize=12, color='black')
-            plt.grid(True, alpha=0.3, linestyle='--')
+            ax.set_title('Performance History', pad=20, fontsize=14, fontweight='bold', color='black')
+            ax.set_ylabel('Return (%)', fontsize=12, color='black')
             
             # Customize axes
-            plt.xticks(range(len(periods)), periods, rotation=45, ha='right', fontsize=10, color='black')
-            plt.yticks(color='black')
+            ax.set_xticks(range(len(periods)))
+            ax.set_xticklabels(periods, rotation=45, ha='right', fontsize=10, color='black')
+            ax.tick_params(axis='y', labelcolor='black')
             
             # Add light background grid
-            plt.grid(True, linestyle='--', alpha=0.3)
+            ax.grid(True, linestyle='--', alpha=0.3)
             
             # Add padding and ensure proper layout
-            plt.tight_layout(pad=3.0)
+            fig.tight_layout(pad=3.0)
             
             # Save to buffer
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', bbox_inches='tight',
-                       facecolor='white', edgecolor='none',
-                       transparent=False,
-                       dpi=100)
-            buffer.seek(0)
-            image_png = buffer.getvalue()
-            buffer.close()
-            plt.close()
-            
-            return base64.b64encode(image_png).decode()
+            return _to_base64_png(fig, dpi=100)
             
         except Exception as e:
             print(f"Error creating performance chart: {str(e)}")
             print(f"Performance data received: {performance_data}")  # Debug log
             return ""
 
-    def create_holdings_chart(self, holdings_data):
-        """Create bar chart for top holdings"""
+    def create_holdings_chart(self, holdings_data, top_n: Optional[int] = Config.REPORT_TOP_HOLDINGS):
+        """Create bar chart for the ``top_n`` largest holdings by value (all of them with None)"""
         try:
-            plt.clf()
-            plt.figure(figsize=(10, 6), dpi=100, facecolor='white')
+            fig = _new_figure(figsize=(10, 6), dpi=100, facecolor='white')
+            ax = fig.add_subplot()
             
-            securities = [holding['name'] for holding in holdings_data]
-            gains = [holding['gain'] for holding in holdings_data]
+            holdings = HoldingsTable.coerce(holdings_data)
+            if top_n:
+                holdings = holdings.top(top_n)
+            securities = holdings.names
+            gains = holdings.gain
             
             # Create single bar chart for gains only
-            plt.bar(securities, gains, color='#48BB78', label='Gain ($)')
-            
-            plt.xlabel('Securities', fontsize=12, color='black')
-            plt.ylabel('Gain ($)', fontsize=12, color='black')
-            plt.title('Top Holdings Analysis', pad=20, fontsize=14, fontweight='bold', color='black')
-            plt.xticks(rotation=45, ha='right', fontsize=10, color='black')
-            plt.yticks(color='black')
-            plt.legend(fontsize=10)
-            
-            plt.tight_layout(pad=3.0)
-            
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', bbox_inches='tight',
-                       facecolor='white', edgecolor='none',
-                       transparent=False)
-            buffer.seek(0)
-            image_png = buffer.getvalue()
-            buffer.close()
-            plt.close()
-            
-            return base64.b64encode(image_png).decode()
+            ax.bar(securities, gains, color='#48BB78', label='Gain ($)')
+            
+            ax.set_xlabel('Securities', fontsize=12, color='black')
+            ax.set_ylabel('Gain ($)', fontsize=12, color='black')
+            ax.set_title('Top Holdings Analysis', pad=20, fontsize=14, fontweight='bold', color='black')
+            for label in ax.get_xticklabels():
+                label.set(rotation=45, ha='right', fontsize=10, color='black')
+            ax.tick_params(axis='y', labelcolor='black')
+            ax.legend(fontsize=10)
+            
+            fig.tight_layout(pad=3.0)
+            
+            return _to_base64_png(fig)
             
         except Exception as e:
             print(f"Error creating holdings chart: {str(e)}")
@@ -0,0 +1,73 @@
+"""Embedding and index-build cost, profiled separately.
+
+Replicates data/clients.json to the requested book size, generates the
+VectorStore documents and times the embedding step apart from the FAISS
+build and a batch of searches. The default ``hashing`` provider runs fully
+offline:
+
+    python -m benchmarks.bench_embeddings --clients 1000 --provider hashing
+"""
+import argparse
+import copy
+import json
+import os
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("ALPHA_VANTAGE_API_KEY", "benchmark")
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def replicate_book(clients: int) -> dict:
+    """Copy the sample clients with unique ids until the book has ``clients`` entries"""
+    with open(PROJECT_ROOT / "data" / "clients.json", "r", encoding="utf-8") as f:
+        seed = json.load(f)["clients"]
+    book = []
+    for i in range(clients):
+        client = copy.deepcopy(seed[i % len(seed)])
+        client["clientInfo"]["id"] = f"C{100000 + i}"
+        client["clientInfo"]["name"] = f"{client['clientInfo']['name']} #{i}"
+        book.append(client)
+    return {"clients": book}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--provider", default="hashing")
+    parser.add_argument("--dimensions", type=int, default=None)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    from backend.database.embeddings import create_embeddings
+    from backend.database.vector_store import VectorStore
+
+    embeddings = create_embeddings(args.provider, args.dimensions)
+    book = replicate_book(args.clients)
+    texts, _ = VectorStore.build_documents(book)
+
+    started = time.perf_counter()
+    embeddings.embed_documents(texts)
+    embed_seconds = time.perf_counter() - started
+
+    store = VectorStore(embeddings=embeddings)
+    started = time.perf_counter()
+    store.initialize_from_json(book)
+    build_seconds = time.perf_counter() - started
+
+    client_ids = [client["clientInfo"]["id"] for client in book["clients"]]
+    started = time.perf_counter()
+    for i in range(args.queries):
+        store.search("What are the realized gains?", client_id=client_ids[i % len(client_ids)])
+    search_seconds = time.perf_counter() - started
+
+    print(f"provider={args.provider} clients={args.clients} documents={len(texts)}")
+    print(f"embed only      {embed_seconds:8.3f}s  {len(texts) / embed_seconds:10.0f} docs/s")
+    print(f"full build      {build_seconds:8.3f}s  (index + lexical: {max(build_seconds - embed_seconds, 0):.3f}s)")
+    print(f"search          {search_seconds / args.queries * 1000:8.3f}ms/query")
+
+
+if __name__ == "__main__":
+    main()
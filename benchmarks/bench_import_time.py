@@ -0,0 +1,74 @@
+"""Cold-import benchmark for the backend package.
+
+Each target is imported in a fresh interpreter so module caches do not leak
+between runs. Run from the project root:
+
+    python -m benchmarks.bench_import_time --repeat 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Name -> statement executed (and timed) in a fresh interpreter
+TARGETS = {
+    "package": "import backend",
+    "market": "from backend import MarketService",
+    "models": "from backend import Portfolio",
+    "vector_store": "from backend import VectorStore",
+    "chat": "from backend import ChatService",
+    "report": "from backend import ReportService",
+    "all": "from backend import ChatService, ReportService, MarketService, VectorStore, Portfolio",
+}
+
+# Heavy dependencies reported per target. "market" (a quote-only worker, via the
+# quota scheduler and resilience policies) should load none of them but aiohttp;
+# "package" none at all
+HEAVY_MODULES = ("openai", "langchain_core", "faiss", "numpy", "matplotlib", "pdfkit", "aiohttp")
+
+_TIMER = (
+    "import sys, time; _t = time.perf_counter(); {stmt}; _t = time.perf_counter() - _t; "
+    "print(','.join(m for m in {heavy!r} if m in sys.modules)); print(_t)"
+)
+
+
+def time_import(stmt: str, repeat: int) -> Tuple[list, str]:
+    """Return wall-clock seconds for ``stmt`` in ``repeat`` fresh interpreters, and the heavy modules it loaded"""
+    env = dict(os.environ)
+    # Config validates API keys at import; the benchmark never calls out
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    env.setdefault("ALPHA_VANTAGE_API_KEY", "benchmark")
+    samples = []
+    loaded = ""
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", _TIMER.format(stmt=stmt, heavy=HEAVY_MODULES)],
+            cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"'{stmt}' failed:\n{result.stderr.strip()}")
+        loaded, seconds = result.stdout.rstrip("\n").splitlines()[-2:]
+        samples.append(float(seconds))
+    return samples, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("targets", nargs="*", default=list(TARGETS))
+    args = parser.parse_args()
+
+    print(f"{'target':<14}{'median ms':>12}{'min ms':>10}{'max ms':>10}  heavy modules loaded")
+    for name in args.targets:
+        samples, loaded = time_import(TARGETS[name], args.repeat)
+        print(f"{name:<14}{statistics.median(samples) * 1000:>12.1f}"
+              f"{min(samples) * 1000:>10.1f}{max(samples) * 1000:>10.1f}  {loaded or '-'}")
+
+
+if __name__ == "__main__":
+    main()
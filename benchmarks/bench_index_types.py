@@ -0,0 +1,64 @@
+"""Recall vs latency vs memory for the FAISS index types against the flat baseline.
+
+Vectors come from the local hashing embeddings over a replicated client book,
+so the benchmark runs offline:
+
+    python -m benchmarks.bench_index_types --clients 20000 --types flat sq8 hnsw ivfpq
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_embeddings import replicate_book
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / truth.size
+
+
+def main():
+    from backend.database.embeddings import create_embeddings
+    from backend.database.index_factory import INDEX_TYPES, build_index, index_nbytes
+    from backend.database.vector_store import VectorStore
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="*", default=list(INDEX_TYPES))
+    args = parser.parse_args()
+
+    embeddings = create_embeddings("hashing", args.dimensions)
+    texts, _ = VectorStore.build_documents(replicate_book(args.clients))
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+
+    # Queries: perturbed copies of random documents
+    rng = np.random.default_rng(42)
+    queries = vectors[rng.choice(len(vectors), args.queries, replace=False)]
+    queries = queries + rng.normal(0, 0.05, queries.shape).astype(np.float32)
+
+    baseline = build_index(vectors, "flat")
+    _, truth = baseline.search(queries, args.k)
+    baseline_bytes = index_nbytes(baseline)
+
+    print(f"documents={len(vectors)} dimensions={args.dimensions} k={args.k}")
+    print(f"{'type':<11}{'build s':>9}{'MB':>10}{'x smaller':>11}{'ms/query':>10}{'recall':>8}")
+    for index_type in args.types:
+        started = time.perf_counter()
+        index = build_index(vectors, index_type)
+        build_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        _, found = index.search(queries, args.k)
+        query_ms = (time.perf_counter() - started) / args.queries * 1000
+
+        nbytes = index_nbytes(index)
+        print(f"{index_type:<11}{build_seconds:>9.2f}{nbytes / 2**20:>10.1f}"
+              f"{baseline_bytes / nbytes:>11.1f}{query_ms:>10.3f}{recall_at_k(truth, found):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
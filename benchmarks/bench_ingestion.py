@@ -0,0 +1,63 @@
+"""Client ingestion throughput: batched pydantic validation of the book.
+
+Replicates data/clients.json to the requested size and times
+``ingest_book`` (one TypeAdapter pass plus the dump back to the service
+layout) against validating each client with ``Portfolio.model_validate``:
+
+    python -m benchmarks.bench_ingestion --clients 10000 --invalid 0.01
+"""
+import argparse
+import time
+
+from benchmarks.bench_embeddings import replicate_book
+from backend.models.ingestion import _book_adapter, ingest_book
+from backend.models.portfolio import Portfolio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=10000)
+    parser.add_argument("--invalid", type=float, default=0.0,
+                        help="fraction of clients to corrupt (exercises the error path)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    book = replicate_book(args.clients)
+    if args.invalid:
+        step = max(1, int(1 / args.invalid))
+        for client in book["clients"][::step]:
+            client["portfolioSummary"]["totalValue"] = "n/a"
+
+    def best_of(fn):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    records = book["clients"]
+    per_record = best_of(lambda: [_safe_validate(record) for record in records])
+    batched = best_of(lambda: _book_adapter.validate_python(records) if not args.invalid else None)
+    full = best_of(lambda: ingest_book(book))
+    result = ingest_book(book)
+
+    scale = 10000 / args.clients
+    print(f"clients: {args.clients}  rejected: {len(result.errors)}")
+    print(f"{'path':<28}{'seconds':>10}{'per 10k':>10}{'clients/s':>12}")
+    rows = [("per-record model_validate", per_record), ("ingest_book (validate+dump)", full)]
+    if not args.invalid:
+        rows.insert(1, ("batched TypeAdapter", batched))
+    for label, seconds in rows:
+        print(f"{label:<28}{seconds:>10.3f}{seconds * scale:>10.3f}{args.clients / seconds:>12,.0f}")
+
+
+def _safe_validate(record):
+    try:
+        return Portfolio.model_validate(record)
+    except Exception:
+        return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Cold load of the client book: clients.json versus the compiled snapshot.
+
+For each book size, times parsing + validating the JSON book against opening
+the snapshot and decoding one client (the app's start-up path), plus the
+per-client access time:
+
+    python -m benchmarks.bench_snapshot --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_embeddings import replicate_book
+from backend.database.snapshot import ClientBookSnapshot, compile_snapshot
+from backend.models.ingestion import ingest_book
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'clients':>9}{'json load s':>13}{'snapshot open s':>17}{'first client ms':>17}{'per lookup us':>15}{'MB':>8}")
+    with tempfile.TemporaryDirectory() as scratch:
+        for size in args.sizes:
+            json_path = os.path.join(scratch, f"clients_{size}.json")
+            snapshot_path = os.path.join(scratch, f"clients_{size}.snapshot")
+            book = replicate_book(size)
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(book, f)
+            compile_snapshot(json_path, snapshot_path)
+            ids = [client["clientInfo"]["id"] for client in book["clients"]]
+            del book
+
+            start = time.perf_counter()
+            ingest_book(json_path)
+            json_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            snapshot = ClientBookSnapshot(snapshot_path)
+            open_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            snapshot.get(ids[0])
+            first_ms = (time.perf_counter() - start) * 1000
+
+            sample = [random.choice(ids) for _ in range(args.lookups)]
+            start = time.perf_counter()
+            for client_id in sample:
+                snapshot.get(client_id)
+            lookup_us = (time.perf_counter() - start) / len(sample) * 1e6
+
+            size_mb = os.path.getsize(snapshot_path) / 1e6
+            print(f"{size:>9}{json_seconds:>13.3f}{open_seconds:>17.5f}{first_ms:>17.3f}{lookup_us:>15.1f}{size_mb:>8.1f}")
+            del snapshot
+
+
+if __name__ == "__main__":
+    main()
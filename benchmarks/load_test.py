@@ -0,0 +1,275 @@
+"""Concurrent-advisor load test for ChatService and ReportService.
+
+Simulates N relationship managers sharing one deployment: each advisor is a
+task with its own chat session that hops between clients, sends interleaved
+chat messages and now and then asks for a report (rendered on a worker
+thread, as the app does). The LLM and embedding APIs are the local stubs in
+``benchmarks.stubs``, so no API keys are needed:
+
+    python -m benchmarks.load_test --advisors 1 8 32 --messages 20 --report-every 5
+
+Reported per concurrency level: operations, throughput, chat and report
+latency percentiles, and correctness violations:
+
+    reply_leak      a chat reply answers a question asked about another client
+    prompt_leak     an LLM prompt carried another client's name or questions
+    session_leak    a chat prompt carried another advisor's questions as history
+    report_leak     a report names a client other than the one requested
+    chart_mismatch  a chart differs from the same client's chart drawn alone
+    error           the service returned its error reply or raised
+
+Every chat question carries a tag ``[lt <advisor>.<seq> <client id>]``; the
+stub echoes it in its reply and records every prompt it receives, which is
+what the leak checks read.
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+QUESTIONS = [
+    "What is the largest holding?",
+    "What is the YTD return?",
+    "Should we rebalance toward fixed income given the risk profile?",
+    "How did the top positions contribute to performance?",
+    "Explain the allocation variance against targets.",
+    "Summarize the realized and unrealized gains.",
+]
+TAG = re.compile(r"\[lt (\d+)\.(\d+) (\S+?)\]")
+CHART = re.compile(r'data:image/png;base64,([^"]*)"')
+
+
+class LeakChecker:
+    """Correctness checks against the book the advisors are working from"""
+
+    def __init__(self, clients: List[Dict]):
+        self.names = {client["clientInfo"]["id"]: client["clientInfo"]["name"] for client in clients}
+        # Longest first, so "Ava Chen 12" is never read as "Ava Chen 1"
+        alternatives = sorted(self.names.values(), key=len, reverse=True)
+        self._name_pattern = re.compile(r"\b(?:" + "|".join(map(re.escape, alternatives)) + r")\b")
+        self._charts: Dict[str, Tuple[str, ...]] = {}
+
+    def names_in(self, text: str) -> set:
+        return set(self._name_pattern.findall(text))
+
+    def check_reply(self, reply: str, client_id: str) -> List[str]:
+        if reply.startswith("I apologize"):
+            return ["error"]
+        if any(tag_client != client_id for _, _, tag_client in TAG.findall(reply)):
+            return ["reply_leak"]
+        return []
+
+    def check_prompt(self, messages: List[Dict]) -> List[str]:
+        """Tags and names in one recorded prompt must all belong to a single client"""
+        text = "\n".join(str(message.get("content", "")) for message in messages)
+        tags = TAG.findall(text)
+        clients = {tag_client for _, _, tag_client in tags}
+        names = self.names_in(text)
+        expected = {self.names.get(client_id) for client_id in clients}
+        violations = []
+        if len(clients) > 1 or len(names) > 1 or (clients and not names <= expected):
+            violations.append("prompt_leak")
+        if clients and not self._is_summary_prompt(messages):
+            # History turns sent with a chat question must come from the same advisor's session
+            advisors = {
+                advisor for message in messages if message.get("role") == "user"
+                for advisor, _, _ in TAG.findall(str(message.get("content", "")))
+            }
+            if len(advisors) > 1:
+                violations.append("session_leak")
+        return violations
+
+    @staticmethod
+    def _is_summary_prompt(messages: List[Dict]) -> bool:
+        # The rolling summary request quotes whole transcripts, including cached
+        # replies first given to other advisors of the same client
+        return "New turns:" in str(messages[-1].get("content", "")) if messages else False
+
+    def check_report(self, html: str, client: Dict) -> List[str]:
+        violations = []
+        if self.names_in(html) != {client["clientInfo"]["name"]}:
+            violations.append("report_leak")
+        charts = tuple(hashlib.sha1(chart.encode("ascii")).hexdigest() for chart in CHART.findall(html))
+        if charts != self.baseline_charts(client):
+            violations.append("chart_mismatch")
+        return violations
+
+    def baseline_charts(self, client: Dict) -> Tuple[str, ...]:
+        """The client's charts drawn on their own, in template order (computed once per client)"""
+        client_id = client["clientInfo"]["id"]
+        if client_id not in self._charts:
+            from backend.utils.visualization import PortfolioVisualizer
+            visualizer = PortfolioVisualizer()
+            with contextlib.redirect_stdout(io.StringIO()):
+                charts = (
+                    visualizer.create_performance_chart(client["performance"]),
+                    visualizer.create_asset_allocation_pie(client["assetAllocation"]),
+                    visualizer.create_holdings_chart(client["topHoldings"]),
+                )
+            self._charts[client_id] = tuple(hashlib.sha1(chart.encode("ascii")).hexdigest() for chart in charts)
+        return self._charts[client_id]
+
+
+def _percentile(latencies: List[float], q: float) -> Optional[float]:
+    return round(float(np.percentile(latencies, q)) * 1000, 1) if latencies else None
+
+
+async def run_level(advisors: int, clients: List[Dict], vector_store, stubs, checker: LeakChecker,
+                    options: Dict) -> Dict:
+    """One concurrency level with fresh services (sessions and caches do not carry over)"""
+    from backend.database.section_cache import SectionCache
+    from backend.services.chat_service import ChatService
+    from backend.services.report_service import ReportService
+
+    with contextlib.closing(SectionCache()) as section_cache:
+        section_cache.invalidate()
+    chat_service = ChatService(vector_store)
+    report_service = ReportService(vector_store=vector_store)
+    # Reports render on worker threads like the Streamlit app's script threads
+    executor = ThreadPoolExecutor(max_workers=advisors, thread_name_prefix="advisor-report")
+    loop = asyncio.get_running_loop()
+    stubs.chat_prompts.clear()
+
+    latencies = {"chat": [], "report": []}
+    violations = Counter()
+    reported = []
+
+    async def advisor(number: int):
+        rng = random.Random(options["seed"] * 100_003 + number)
+        client = None
+        for seq in range(options["messages"]):
+            if client is None or rng.random() < options["switch_rate"]:
+                client = rng.choice(clients)
+            client_id = client["clientInfo"]["id"]
+            start = time.perf_counter()
+            try:
+                if options["report_every"] and seq % options["report_every"] == options["report_every"] - 1:
+                    html = await loop.run_in_executor(executor, report_service.render_html, client)
+                    latencies["report"].append(time.perf_counter() - start)
+                    reported.append((html, client))
+                else:
+                    question = f"{rng.choice(QUESTIONS)} [lt {number}.{seq} {client_id}]"
+                    reply = await chat_service.process_message(
+                        question, session_id=f"advisor-{number}", client_data=client
+                    )
+                    latencies["chat"].append(time.perf_counter() - start)
+                    violations.update(checker.check_reply(reply, client_id))
+            except Exception as e:
+                violations["error"] += 1
+                if options["verbose"]:
+                    print(f"advisor {number} failed: {type(e).__name__}: {e}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(advisor(number) for number in range(advisors)))
+    seconds = time.perf_counter() - start
+    executor.shutdown()
+    # Let queued summaries finish so their prompts are checked too
+    chat_service._summary_executor.shutdown(wait=True)
+
+    for html, client in reported:
+        violations.update(checker.check_report(html, client))
+    for messages in list(stubs.chat_prompts):
+        violations.update(checker.check_prompt(messages))
+
+    ops = len(latencies["chat"]) + len(latencies["report"])
+    return {
+        "advisors": advisors,
+        "chats": len(latencies["chat"]),
+        "reports": len(latencies["report"]),
+        "seconds": round(seconds, 3),
+        "throughput": round(ops / seconds, 2) if seconds > 0 else None,
+        "chat_p50_ms": _percentile(latencies["chat"], 50),
+        "chat_p95_ms": _percentile(latencies["chat"], 95),
+        "chat_p99_ms": _percentile(latencies["chat"], 99),
+        "report_p50_ms": _percentile(latencies["report"], 50),
+        "report_p99_ms": _percentile(latencies["report"], 99),
+        "violations": dict(violations),
+    }
+
+
+def run(options: Dict) -> List[Dict]:
+    from benchmarks.stubs import StubServers
+
+    with StubServers(options["chat_latency_ms"], options["embedding_latency_ms"], jitter=options["jitter"],
+                     record_prompts=True) as stubs, tempfile.TemporaryDirectory() as scratch:
+        stubs.configure()
+        from backend.config import Config
+        Config.VECTOR_STORE_PATH = os.path.join(scratch, "vector_store")
+        Config.LLM_USAGE_DB_PATH = os.path.join(scratch, "llm_usage.sqlite3")
+        Config.REPORT_SECTION_CACHE_PATH = os.path.join(scratch, "report_sections.sqlite3")
+
+        from benchmarks.synthetic import synthetic_book
+        from backend.models.ingestion import ingest_book
+        from backend.database.vector_store import VectorStore
+
+        output = contextlib.nullcontext() if options["verbose"] else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            book = ingest_book(synthetic_book(options["clients"], seed=options["seed"])).book
+            vector_store = VectorStore()
+            vector_store.initialize_from_json(book)
+        checker = LeakChecker(book["clients"])
+
+        results = []
+        for advisors in options["advisors"]:
+            print(f"Running {advisors} advisors...", flush=True)
+            with output:
+                results.append(asyncio.run(run_level(advisors, book["clients"], vector_store, stubs, checker, options)))
+    return results
+
+
+def print_table(results: List[Dict]):
+    header = (f"{'advisors':>8}{'chats':>7}{'reports':>8}{'seconds':>9}{'ops/s':>8}"
+              f"{'chat p50':>10}{'p95':>8}{'p99':>8}{'report p50':>12}{'p99':>8}  violations")
+    print(header)
+    print("-" * len(header))
+
+    def fmt(value, width: int) -> str:
+        return f"{value:>{width}.1f}" if value is not None else "-".rjust(width)
+    for row in results:
+        violations = ", ".join(f"{kind}={count}" for kind, count in sorted(row["violations"].items())) or "none"
+        print(
+            f"{row['advisors']:>8}{row['chats']:>7}{row['reports']:>8}{row['seconds']:>9.2f}{fmt(row['throughput'], 8)}"
+            f"{fmt(row['chat_p50_ms'], 10)}{fmt(row['chat_p95_ms'], 8)}{fmt(row['chat_p99_ms'], 8)}"
+            f"{fmt(row['report_p50_ms'], 12)}{fmt(row['report_p99_ms'], 8)}  {violations}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--advisors", type=int, nargs="+", default=[1, 4, 16], help="concurrency levels")
+    parser.add_argument("--messages", type=int, default=12, help="requests per advisor")
+    parser.add_argument("--report-every", type=int, default=4, help="every n-th request is a report (0: none)")
+    parser.add_argument("--switch-rate", type=float, default=0.3, help="chance of moving to another client")
+    parser.add_argument("--clients", type=int, default=50, help="size of the synthetic book")
+    parser.add_argument("--chat-latency-ms", type=float, default=300.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="show service output")
+    args = parser.parse_args(argv)
+
+    options = vars(args)
+    results = run(options)
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"options": options, "results": results}, f, indent=2)
+    # Non-zero exit when any level saw a correctness violation, for CI
+    return 1 if any(row["violations"] for row in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,281 @@
+"""End-to-end benchmark suite against local OpenAI / Alpha Vantage stubs.
+
+Every stage goes through the real service code (VectorStore, ChatService,
+ReportService, MarketService), with the network calls answered by the stub
+servers in ``benchmarks.stubs``, so no API keys are needed. Each book size
+runs in a fresh process so peak RSS is not inherited from a larger run:
+
+    python -m benchmarks.run_suite --sizes 10 1000 100000 --chat-latency-ms 400 \\
+        --embedding-latency-ms 60 --json results.json
+
+Reported per stage: operations, wall time, throughput, p50/p99 latency per
+operation and peak resident memory while the stage ran.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+SEARCH_TEMPLATES = [
+    "How is the {security} position doing?",
+    "{name} holding value",
+    "asset allocation",
+    "realized and unrealized gains",
+    "portfolio value and risk profile",
+]
+CHAT_QUESTIONS = [
+    "What is the largest holding?",                                    # intent router
+    "What is the YTD return?",                                          # intent router
+    "Should we rebalance toward fixed income given the risk profile?",  # LLM
+    "How did the {name} position contribute to performance?",          # LLM
+    "Explain the allocation variance against targets.",                 # LLM
+]
+
+
+class RssSampler:
+    """Samples resident memory in the background and tracks the peak since the last reset"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._peak = 0
+        self._stop = threading.Event()
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self._thread = threading.Thread(target=self._run, daemon=True, name="rss-sampler")
+        self._thread.start()
+
+    def current(self) -> int:
+        try:
+            with open("/proc/self/statm", "r") as f:
+                return int(f.read().split()[1]) * self._page_size
+        except OSError:
+            # No procfs (macOS): fall back to the process-wide high-water mark
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._peak = max(self._peak, self.current())
+            time.sleep(self.interval)
+
+    def reset(self):
+        self._peak = self.current()
+
+    def peak_mb(self) -> float:
+        return max(self._peak, self.current()) / 1e6
+
+    def stop(self):
+        self._stop.set()
+
+
+def run_stage(name: str, sampler: RssSampler, body: Callable[[], Tuple[int, List[float], str]],
+              verbose: bool = False) -> Dict:
+    """Run ``body`` (returning ops, per-op latencies in seconds and a note) and summarize it"""
+    sampler.reset()
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    start = time.perf_counter()
+    try:
+        with output:
+            ops, latencies, note = body()
+    except Exception as e:
+        ops, latencies, note = 0, [], f"failed: {type(e).__name__}: {e}"
+    seconds = time.perf_counter() - start
+    result = {
+        "stage": name,
+        "ops": ops,
+        "seconds": round(seconds, 4),
+        "throughput": round(ops / seconds, 2) if seconds > 0 else None,
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3) if latencies else None,
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3) if latencies else None,
+        "peak_rss_mb": round(sampler.peak_mb(), 1),
+        "note": note,
+    }
+    return result
+
+
+def _timed(calls: List[Callable[[], object]]) -> List[float]:
+    latencies = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def _timed_async(calls) -> List[float]:
+    latencies = []
+    for call in calls:
+        start = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run_size(clients: int, options: Dict) -> List[Dict]:
+    """All stages for one book size (runs inside a fresh worker process)"""
+    from benchmarks.stubs import StubServers
+
+    random.seed(options["seed"])
+    sampler = RssSampler()
+    verbose = options["verbose"]
+    results = []
+    state = {}
+
+    with StubServers(options["chat_latency_ms"], options["embedding_latency_ms"],
+                     options["market_latency_ms"], options["jitter"]) as stubs, \
+            tempfile.TemporaryDirectory() as scratch:
+        stubs.configure()
+        from backend.config import Config
+        Config.VECTOR_STORE_PATH = os.path.join(scratch, "vector_store")
+        Config.LLM_USAGE_DB_PATH = os.path.join(scratch, "llm_usage.sqlite3")
+        Config.REPORT_SECTION_CACHE_PATH = os.path.join(scratch, "report_sections.sqlite3")
+        if options["embedding_dimensions"]:
+            Config.EMBEDDING_DIMENSIONS = options["embedding_dimensions"]
+
+        from benchmarks.synthetic import synthetic_book
+        from backend.models.ingestion import ingest_book
+
+        def generate():
+            state["raw"] = synthetic_book(clients, seed=options["seed"])
+            return clients, [], ""
+        results.append(run_stage("generate", sampler, generate, verbose))
+
+        def ingest():
+            state["book"] = ingest_book(state.pop("raw")).book
+            return clients, [], ""
+        results.append(run_stage("ingest", sampler, ingest, verbose))
+
+        book = state["book"]
+        sample_clients = [random.choice(book["clients"]) for _ in range(options["operations"])]
+
+        def index_build():
+            from backend.database.vector_store import VectorStore
+            state["vector_store"] = VectorStore()
+            state["vector_store"].initialize_from_json(book)
+            documents = len(state["vector_store"].texts)
+            return documents, [], f"{type(state['vector_store'].index).__name__}, {documents} documents"
+        results.append(run_stage("index_build", sampler, index_build, verbose))
+        vector_store = state.get("vector_store")
+
+        def search_queries() -> List[Tuple[str, str]]:
+            queries = []
+            for client in sample_clients:
+                holding = client["topHoldings"][0] if len(client["topHoldings"]) else {"security": "", "name": ""}
+                template = random.choice(SEARCH_TEMPLATES)
+                queries.append((template.format(**holding), client["clientInfo"]["id"]))
+            return queries
+
+        def search():
+            queries = search_queries()
+            latencies = _timed([
+                lambda query=query, client_id=client_id: vector_store.search(query, client_id=client_id, k=3)
+                for query, client_id in queries
+            ])
+            return len(queries), latencies, "client-scoped hybrid search"
+        results.append(run_stage("search", sampler, search, verbose))
+
+        def chat():
+            from backend.services.chat_service import ChatService
+            service = ChatService(vector_store)
+            calls = []
+            for i, client in enumerate(sample_clients):
+                holding = client["topHoldings"][0] if len(client["topHoldings"]) else {"name": "largest"}
+                question = random.choice(CHAT_QUESTIONS).format(name=holding["name"])
+                calls.append(lambda question=question, client=client, i=i: service.process_message(
+                    question, session_id=f"bench-{i % 8}", client_data=client
+                ))
+            latencies = asyncio.run(_timed_async(calls))
+            return len(calls), latencies, f"cache {service.response_cache.stats()}"
+        results.append(run_stage("chat", sampler, chat, verbose))
+
+        def reports():
+            from backend.services.report_service import ReportService
+            service = ReportService(vector_store=vector_store)
+            count = max(1, options["operations"] // 10)
+            make_pdf = options["pdf"] and service.wkhtmltopdf_path is not None
+            render = service.generate_report if make_pdf else service.render_html
+            latencies = _timed([lambda client=client: render(client) for client in sample_clients[:count]])
+            return count, latencies, "pdf" if make_pdf else "html only (no wkhtmltopdf or --pdf not set)"
+        results.append(run_stage("report", sampler, reports, verbose))
+
+        def market():
+            from backend.services.market_service import MarketService
+            service = MarketService()
+            symbols = [
+                client["topHoldings"][0]["security"] if len(client["topHoldings"]) else "SPY"
+                for client in sample_clients
+            ]
+            calls = [lambda symbol=symbol: service.get_stock_data(symbol) for symbol in symbols]
+            latencies = asyncio.run(_timed_async(calls))
+            return len(calls), latencies, ""
+        results.append(run_stage("market_quote", sampler, market, verbose))
+
+        requests = stubs.stats()
+
+    sampler.stop()
+    for result in results:
+        result["clients"] = clients
+    results.append({"clients": clients, "stage": "stub_requests", "note": json.dumps(requests)})
+    return results
+
+
+def print_table(results: List[Dict]):
+    header = f"{'clients':>8} {'stage':<14}{'ops':>8}{'seconds':>10}{'ops/s':>11}{'p50 ms':>10}{'p99 ms':>10}{'peak MB':>9}  note"
+    print(header)
+    print("-" * len(header))
+
+    def fmt(value, width: int, spec: str) -> str:
+        return f"{value:>{width}{spec}}" if value is not None else "-".rjust(width)
+    for row in results:
+        if row["stage"] == "stub_requests":
+            print(f"{row['clients']:>8} {'stub requests':<14}  {row['note']}")
+            continue
+        print(
+            f"{row['clients']:>8} {row['stage']:<14}{row['ops']:>8}{row['seconds']:>10.3f}"
+            f"{fmt(row['throughput'], 11, ',.1f')}{fmt(row['p50_ms'], 10, '.2f')}{fmt(row['p99_ms'], 10, '.2f')}"
+            f"{row['peak_rss_mb']:>9.1f}  {row['note']}"
+        )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--operations", type=int, default=200, help="searches / chats / quotes per size")
+    parser.add_argument("--chat-latency-ms", type=float, default=300.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=50.0)
+    parser.add_argument("--market-latency-ms", type=float, default=80.0)
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency jitter as a fraction of the mean")
+    parser.add_argument("--embedding-dimensions", type=int, default=None)
+    parser.add_argument("--pdf", action="store_true", help="include wkhtmltopdf in the report stage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="show service output")
+    args = parser.parse_args(argv)
+
+    options = vars(args)
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for clients in args.sizes:
+        print(f"Running {clients} clients...", flush=True)
+        with context.Pool(1) as pool:
+            results.extend(pool.apply(run_size, (clients, options)))
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"options": options, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Local stand-ins for the OpenAI and Alpha Vantage HTTP APIs.
+
+Both servers speak just enough of the real wire format for the official
+clients (openai / langchain-openai, aiohttp in MarketService) to work
+unchanged, with a configurable per-request latency:
+
+    with StubServers(chat_latency_ms=400, embedding_latency_ms=60) as stubs:
+        stubs.configure()          # point Config at the stubs
+        ...                        # run services as usual
+
+Embeddings are deterministic feature-hashing vectors, so retrieval quality
+is meaningful; chat replies are canned but shaped like the real ones (a
+report section request gets a short bulleted section body).
+"""
+import base64
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from backend.database.embeddings import HashingEmbeddings
+
+# Report analysis requests name their section on the first line (see ReportAnalyzer)
+SECTION_REQUEST = re.compile(r"\bSection: (.+)")
+
+
+class Latency:
+    """Per-request delay: ``mean_ms`` plus uniform jitter of +/- ``jitter`` (fraction of the mean)"""
+
+    def __init__(self, mean_ms: float = 0.0, jitter: float = 0.2):
+        self.mean_ms = mean_ms
+        self.jitter = jitter
+
+    def sleep(self):
+        if self.mean_ms <= 0:
+            return
+        spread = self.mean_ms * self.jitter
+        time.sleep(max(0.0, self.mean_ms + random.uniform(-spread, spread)) / 1000)
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler, latency: Dict[str, Latency]):
+        super().__init__(("127.0.0.1", 0), handler)
+        self.latency = latency
+        self.requests: Dict[str, int] = {}
+        # Chat message lists as received, when enabled (see StubServers.record_prompts)
+        self.chat_prompts: Optional[List[List[Dict]]] = None
+        self._lock = threading.Lock()
+
+    def count(self, route: str):
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+
+    def handle_error(self, request, client_address):
+        # Clients that time out and hang up are expected (e.g. model fallback tests)
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    def record_prompt(self, messages: List[Dict]):
+        if self.chat_prompts is not None:
+            with self._lock:
+                self.chat_prompts.append(messages)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload: Dict, status: int = 200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+
+class OpenAIStubHandler(_JsonHandler):
+    """POST /v1/embeddings and /v1/chat/completions"""
+
+    _embedders: Dict[int, HashingEmbeddings] = {}
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        request = self._read_json()
+        if path.endswith("/embeddings"):
+            self.server.count("embeddings")
+            self.server.latency["embeddings"].sleep()
+            self._send_json(self._embeddings(request))
+        elif path.endswith("/chat/completions"):
+            self.server.count("chat")
+            self.server.record_prompt(request.get("messages", []))
+            model_latency = self.server.latency.get(f"chat:{request.get('model')}")
+            (model_latency or self.server.latency["chat"]).sleep()
+            self._send_json(self._chat(request))
+        else:
+            self._send_json({"error": {"message": f"Unknown route {path}", "type": "invalid_request_error"}}, 404)
+
+    def _embeddings(self, request: Dict) -> Dict:
+        inputs = request.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        # Token-id inputs (tiktoken chunking) are hashed by their text form
+        inputs = [text if isinstance(text, str) else " ".join(map(str, text)) for text in inputs]
+        dimensions = int(request.get("dimensions") or 1536)
+        embedder = self._embedders.get(dimensions)
+        if embedder is None:
+            embedder = self._embedders.setdefault(dimensions, HashingEmbeddings(dimensions=dimensions))
+        vectors = np.asarray(embedder.embed_documents(inputs), dtype=np.float32)
+
+        base64_format = request.get("encoding_format") == "base64"
+        data = [
+            {
+                "object": "embedding",
+                "index": i,
+                "embedding": base64.b64encode(vector.tobytes()).decode("ascii") if base64_format else vector.tolist(),
+            }
+            for i, vector in enumerate(vectors)
+        ]
+        tokens = sum(len(text) // 4 + 1 for text in inputs)
+        return {
+            "object": "list",
+            "data": data,
+            "model": request.get("model", "stub-embedding"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    def _chat(self, request: Dict) -> Dict:
+        messages = request.get("messages", [])
+        prompt = " ".join(str(message.get("content", "")) for message in messages)
+        section = SECTION_REQUEST.search(prompt)
+        if section:
+            title = section.group(1).strip()
+            content = f"- Stub observation for {title.lower()}.\n- Second point."
+        else:
+            question = str(messages[-1].get("content", "")) if messages else ""
+            content = f"Stub answer to: {question[-200:]}"
+        prompt_tokens = len(prompt) // 4 + 1
+        completion_tokens = len(content) // 4 + 1
+        return {
+            "id": f"chatcmpl-stub-{zlib.crc32(prompt.encode('utf-8')):08x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub-chat"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+
+class AlphaVantageStubHandler(_JsonHandler):
+    """GET /query?function=GLOBAL_QUOTE&symbol=..."""
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        symbol = query.get("symbol", [""])[0]
+        self.server.count("quote")
+        self.server.latency["quote"].sleep()
+        if query.get("function", [""])[0] != "GLOBAL_QUOTE" or not symbol:
+            self._send_json({"Error Message": "Invalid API call."})
+            return
+        # Deterministic per symbol, so repeated runs compare like with like
+        seed = zlib.crc32(symbol.encode("utf-8"))
+        price = 20 + seed % 48000 / 100
+        change = (seed % 1000 - 500) / 100
+        self._send_json({"Global Quote": {
+            "01. symbol": symbol,
+            "05. price": f"{price:.4f}",
+            "06. volume": str(seed % 10_000_000),
+            "09. change": f"{change:.4f}",
+            "10. change percent": f"{change / price * 100:.4f}%",
+        }})
+
+
+class StubServers:
+    """Run both stubs on ephemeral localhost ports for the lifetime of a ``with`` block"""
+
+    def __init__(self, chat_latency_ms: float = 0.0, embedding_latency_ms: float = 0.0,
+                 market_latency_ms: float = 0.0, jitter: float = 0.2, record_prompts: bool = False,
+                 model_latency_ms: Optional[Dict[str, float]] = None):
+        self.openai = _StubServer(OpenAIStubHandler, {
+            "chat": Latency(chat_latency_ms, jitter),
+            "embeddings": Latency(embedding_latency_ms, jitter),
+            # Per-model overrides of the chat latency, e.g. {"gpt-4o-mini": 150}
+            **{f"chat:{model}": Latency(ms, jitter) for model, ms in (model_latency_ms or {}).items()},
+        })
+        if record_prompts:
+            self.openai.chat_prompts = []
+        self.market = _StubServer(AlphaVantageStubHandler, {"quote": Latency(market_latency_ms, jitter)})
+        self._threads: List[threading.Thread] = []
+
+    def __enter__(self) -> "StubServers":
+        for server in (self.openai, self.market):
+            thread = threading.Thread(target=server.serve_forever, daemon=True, name="benchmark-stub")
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def __exit__(self, *exc_info):
+        for server in (self.openai, self.market):
+            server.shutdown()
+            server.server_close()
+
+    @property
+    def openai_base_url(self) -> str:
+        return f"{self.openai.url}/v1"
+
+    @property
+    def market_url(self) -> str:
+        return f"{self.market.url}/query"
+
+    def configure(self, config=None):
+        """Point Config (and the environment, for child processes) at the stubs"""
+        if config is None:
+            from backend.config import Config as config
+        settings = {
+            "OPENAI_API_KEY": "sk-stub",
+            "ALPHA_VANTAGE_API_KEY": "stub",
+            "OPENAI_API_BASE": self.openai_base_url,
+            "ALPHA_VANTAGE_BASE_URL": self.market_url,
+        }
+        for name, value in settings.items():
+            os.environ[name] = value
+            setattr(config, name, value)
+        # The stubs have no tokenizer, and localhost must never go through a proxy
+        config.EMBEDDING_CHECK_CTX_LENGTH = False
+        os.environ["EMBEDDING_CHECK_CTX_LENGTH"] = "false"
+        # Nor any rate limits: benchmarks measure the services, not the API quotas
+        config.QUOTA_ENABLED = False
+        os.environ["QUOTA_ENABLED"] = "false"
+        no_proxy = os.environ.get("NO_PROXY", "")
+        os.environ["NO_PROXY"] = os.environ["no_proxy"] = ",".join(filter(None, [no_proxy, "127.0.0.1", "localhost"]))
+
+    @property
+    def chat_prompts(self) -> List[List[Dict]]:
+        """Every chat request's messages (requires ``record_prompts=True``)"""
+        return self.openai.chat_prompts or []
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.openai.requests, **self.market.requests}
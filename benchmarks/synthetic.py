@@ -0,0 +1,152 @@
+"""Synthetic client books in the data/clients.json schema, from 10 to 100k+ clients.
+
+Values are randomized but internally consistent: allocation percentages sum
+to 100 and agree with the allocation values, holdings are drawn from a
+shared security universe with Zipf-like popularity and their weights are
+shares of the total value. The same seed always yields the same book.
+
+    python -m benchmarks.synthetic --clients 10000 --output /tmp/clients_10k.json
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+FIRST_NAMES = ["Sarah", "Michael", "David", "Emily", "James", "Olivia", "Robert", "Sophia", "Daniel", "Ava",
+               "William", "Mia", "Joseph", "Isabella", "Thomas", "Grace", "Charles", "Chloe", "Henry", "Zoe"]
+LAST_NAMES = ["Chen", "Rodriguez", "Williams", "Patel", "Johnson", "Kim", "Nguyen", "Garcia", "Smith", "Brown",
+              "Davis", "Miller", "Wilson", "Moore", "Taylor", "Anderson", "Thomas", "Jackson", "White", "Harris"]
+ACCOUNT_TYPES = ["Individual Investment Account", "Joint Investment Account", "IRA", "Trust Account", "Family Trust"]
+RISK_PROFILES = ["Conservative", "Moderate", "Moderate Growth", "Growth", "Aggressive Growth"]
+STRATEGIES = ["Income Portfolio", "Balanced Portfolio", "Balanced Growth", "Growth Portfolio", "Long-term Growth"]
+MANAGERS = ["Michael Thompson", "Patricia Lee", "Jennifer Walsh", "Robert Martinez", "Linda Park"]
+ASSET_CLASSES = ["equities", "fixedIncome", "alternatives", "cash"]
+SEED_SECURITIES = [
+    ("AAPL", "Apple Inc."), ("MSFT", "Microsoft Corporation"), ("AMZN", "Amazon.com Inc."),
+    ("GOOGL", "Alphabet Inc."), ("NVDA", "NVIDIA Corporation"), ("BRK.B", "Berkshire Hathaway Inc."),
+    ("JNJ", "Johnson & Johnson"), ("PG", "Procter & Gamble Co."), ("TSLA", "Tesla Inc."),
+    ("VOO", "Vanguard S&P 500 ETF"), ("SPY", "SPDR S&P 500 ETF Trust"), ("AGG", "iShares Core US Aggregate Bond ETF"),
+    ("GOVT", "iShares US Treasury Bond ETF"), ("VGT", "Vanguard Information Technology ETF"),
+    ("US10Y", "US Treasury 10-Year"),
+]
+
+
+def security_universe(size: int) -> list:
+    """The real seed tickers followed by generated ones (e.g. ``SYN0042``)"""
+    universe = list(SEED_SECURITIES)
+    for i in range(len(universe), size):
+        universe.append((f"SYN{i:04d}", f"Synthetic Holdings {i} Corp."))
+    return universe[:size]
+
+
+def synthetic_book(clients: int, holdings: Tuple[int, int] = (3, 15), universe_size: int = 2000,
+                   seed: int = 0) -> Dict:
+    """Generate ``clients`` clients, each with between ``holdings[0]`` and ``holdings[1]`` holdings"""
+    rng = np.random.default_rng(seed)
+    universe = security_universe(universe_size)
+    popularity = np.cumsum(1.0 / np.arange(1, len(universe) + 1))
+    popularity /= popularity[-1]
+
+    with open(PROJECT_ROOT / "data" / "clients.json", "r", encoding="utf-8") as f:
+        report_metadata = json.load(f).get("reportMetadata", {})
+
+    totals = np.round(rng.lognormal(mean=13.8, sigma=0.9, size=clients), 2)
+    allocations = rng.dirichlet([6, 3, 1, 0.6], size=clients)
+    targets = rng.dirichlet([6, 3, 1, 0.6], size=clients)
+    returns = rng.normal(loc=[7, 8, 6, 7, 9], scale=[6, 8, 4, 3, 3], size=(clients, 5))
+    counts = rng.integers(holdings[0], holdings[1] + 1, size=clients)
+    # Draw every client's securities in one go; repeats within a client are dropped below
+    draws = np.searchsorted(popularity, rng.random(int(counts.sum())))
+    ends = np.cumsum(counts)
+
+    book = []
+    for i in range(clients):
+        total = float(totals[i])
+        percentages = np.round(allocations[i] * 100).astype(int)
+        percentages[0] += 100 - percentages.sum()
+        target_percentages = np.round(targets[i] * 100).astype(int)
+        target_percentages[0] += 100 - target_percentages.sum()
+        begin = round(total / (1 + float(returns[i, 0]) / 100), 2)
+        realized = round(total * abs(rng.normal(0.02, 0.01)), 2)
+        unrealized = round(total * rng.normal(0.02, 0.02), 2)
+
+        picks = list(dict.fromkeys(draws[ends[i] - counts[i]:ends[i]].tolist()))
+        shares = (rng.dirichlet(np.ones(len(picks))) * rng.uniform(0.2, 0.6)).tolist()
+        gains = rng.normal(0.1, 0.15, size=len(picks)).tolist()
+        top_holdings = [
+            {
+                "security": universe[pick][0],
+                "name": universe[pick][1],
+                "value": round(total * share, 2),
+                "weight": round(share * 100, 1),
+                "gain": round(total * share * gain, 2),
+            }
+            for pick, share, gain in zip(picks, shares, gains)
+        ]
+        young = i % 7 == 0  # Accounts too new to have 3/5-year returns
+
+        book.append({
+            "clientInfo": {
+                "id": f"C{100000 + i}",
+                "name": f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]} {i}",
+                "accountType": ACCOUNT_TYPES[i % len(ACCOUNT_TYPES)],
+                "riskProfile": RISK_PROFILES[int(rng.integers(len(RISK_PROFILES)))],
+                "investmentStrategy": STRATEGIES[int(rng.integers(len(STRATEGIES)))],
+                "relationshipManager": MANAGERS[i % len(MANAGERS)],
+                "accountOpenDate": f"{2015 + i % 9}-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            },
+            "portfolioSummary": {
+                "totalValue": total,
+                "periodStart": "2024-01-01",
+                "periodEnd": "2024-12-31",
+                "beginningBalance": begin,
+                "contributions": round(total * rng.uniform(0, 0.05), 2),
+                "withdrawals": round(total * rng.uniform(0, 0.03), 2),
+                "realizedGains": realized,
+                "unrealizedGains": unrealized,
+                "incomeEarned": round(total * rng.uniform(0.005, 0.03), 2),
+                "fees": -round(total * 0.0065, 2),
+            },
+            "assetAllocation": {
+                asset_class: {
+                    "percentage": int(percentages[k]),
+                    "value": round(total * int(percentages[k]) / 100, 2),
+                    "target": int(target_percentages[k]),
+                    "variance": int(percentages[k] - target_percentages[k]),
+                }
+                for k, asset_class in enumerate(ASSET_CLASSES)
+            },
+            "performance": {
+                "ytd": round(float(returns[i, 0]), 2),
+                "1year": round(float(returns[i, 1]), 2),
+                "3year": None if young else round(float(returns[i, 2]), 2),
+                "5year": None if young else round(float(returns[i, 3]), 2),
+                "sinceInception": round(float(returns[i, 4]), 2),
+            },
+            "topHoldings": top_holdings,
+        })
+
+    return {"clients": book, "reportMetadata": report_metadata}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--min-holdings", type=int, default=3)
+    parser.add_argument("--max-holdings", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    book = synthetic_book(args.clients, (args.min_holdings, args.max_holdings), seed=args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(book, f)
+    print(f"Wrote {args.clients} clients to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,9 @@
 import streamlit as st
 import asyncio
-import json
 from datetime import datetime
 import sys
 import os
+import uuid
 from pathlib import Path
 
 # Add project root to Python path
@@ -12,8 +12,9 @@ sys.path.append(str(project_root))
 
 # Import with better error handling
 try:
-    from backend import ChatService, ReportService, MarketService, VectorStore
-    from backend.models.portfolio import Portfolio
+    from backend.config import Config
+    from backend.models.holdings import HoldingsTable
+    from backend.utils.metrics import metrics
 except ImportError as e:
     st.error(f"Import Error: {e}")
     st.error("Please ensure all dependencies are installed correctly.")
@@ -21,17 +22,16 @@ except ImportError as e:
 
 import subprocess
 
+@st.cache_resource(show_spinner=False)
 def check_dependencies():
     try:
         import langchain_community
         import langchain_openai
         from langchain_core.caches import BaseCache
-        # Force model rebuilding to fix Pydantic issues
-        try:
-            from langchain_openai import ChatOpenAI
-            ChatOpenAI.model_rebuild()
-        except Exception as e:
-            print(f"Model rebuild warning: {e}")
+        # Force model rebuilding to fix Pydantic issues (no-op if already done)
+        from langchain_openai import ChatOpenAI
+        from backend.utils.compat import ensure_model_rebuilt
+        ensure_model_rebuilt(ChatOpenAI)
     except ImportError:
         st.error("Missing required dependencies. Installing...")
         try:
@@ -41,6 +41,26 @@ def check_dependencies():
             st.error(f"Failed to install dependencies: {e}")
             st.stop()
 
+@st.cache_resource(max_entries=1, show_spinner="Loading client data and building search index...")
+def load_services(data_path: str, data_signature: tuple) -> dict:
+    """Build the process-wide services once and share them across sessions and reruns.
+
+    The cache is keyed on ``data_signature`` so a change to the data file
+    builds a fresh set of services and evicts the previous one.
+    """
+    # Imported here so the thin client never loads langchain, FAISS or matplotlib
+    from backend.services.bootstrap import build_services
+
+    # Prometheus endpoint / metrics file, when configured (once per process)
+    metrics.start_exporters()
+    return build_services(data_path)
+
+@st.cache_resource(max_entries=1, show_spinner="Connecting to the API...")
+def load_remote_services(base_url: str) -> dict:
+    """Thin client: chat, search, reports and market data are served by the HTTP API"""
+    from backend.api.client import remote_services
+    return remote_services(base_url)
+
 # Custom CSS for better mobile responsiveness
 def apply_custom_css():
     st.markdown("""
@@ -255,34 +275,29 @@ class AssetManagementApp:
     def __init__(self):
         check_dependencies()
         try:
-            # Ensure data directory exists
-            if not os.path.exists('data'):
-                os.makedirs('data')
-                
-            # Initialize vector store first
-            self.vector_store = VectorStore()
-            
-            # Load client data
-            data_path = os.path.join('data', 'clients.json')
-            if not os.path.exists(data_path):
-                raise FileNotFoundError(f"Client data file not found at {data_path}")
-                
-            with open(data_path, 'r', encoding='utf-8') as f:
-                self.client_data = json.load(f)
-                
-            # Initialize vector store with data
-            self.vector_store.initialize_from_json(self.client_data)
-            
-            # Initialize other services with proper error handling
-            try:
-                self.chat_service = ChatService(self.vector_store)
-                self.report_service = ReportService()
-                self.market_service = MarketService()
-            except Exception as service_error:
-                st.error(f"Service initialization error: {service_error}")
-                st.error("This is likely due to missing or incorrect API keys.")
-                st.error("Please check your .env file and ensure OPENAI_API_KEY and ALPHA_VANTAGE_API_KEY are set correctly.")
-                st.stop()
+            if Config.API_BASE_URL:
+                services = load_remote_services(Config.API_BASE_URL)
+            else:
+                from backend.services.bootstrap import data_file_signature, resolve_data_path
+
+                # Ensure data directory exists
+                if not os.path.exists('data'):
+                    os.makedirs('data')
+                    
+                # Load client data
+                data_path = resolve_data_path('data')
+                if not os.path.exists(data_path):
+                    raise FileNotFoundError(f"Client data file not found at {data_path}")
+
+                # Shared services are built once per process and reused across reruns
+                services = load_services(data_path, data_file_signature(data_path))
+            self.client_book = services['client_book']
+            self.ingestion_errors = services['ingestion_errors']
+            self.vector_store = services['vector_store']
+            self.report_service = services['report_service']
+            self.market_service = services['market_service']
+            # Chat state is keyed per browser session and client inside ChatService
+            self.chat_service = services['chat_service']
                 
         except FileNotFoundError as fe:
             st.error(f"File Error: {str(fe)}")
@@ -320,20 +335,24 @@ class AssetManagementApp:
         
         st.title("Asset Management With AI")
 
+        if self.ingestion_errors:
+            with st.expander(f"{len(self.ingestion_errors)} client record(s) failed validation and were skipped"):
+                for error in self.ingestion_errors:
+                    st.write(error)
+
         # Always visible client selector
         st.markdown('<div class="client-selector">', unsafe_allow_html=True)
+        client_names = dict(self.client_book.client_directory())
         selected_client = st.selectbox(
             "Select Client",
-            options=[client['clientInfo']['name'] for client in self.client_data['clients']],
+            options=list(client_names),
+            format_func=client_names.get,
             key="client_selector"
         )
         st.markdown('</div>', unsafe_allow_html=True)
 
-        # Get selected client data
-        client_info = next(
-            client for client in self.client_data['clients'] 
-            if client['clientInfo']['name'] == selected_client
-        )
+        # Decode only the selected client
+        client_info = self.client_book.get(selected_client)
 
         # Tabs with improved spacing
         tab1, tab2, tab3 = st.tabs(["Portfolio", "Reports", "Chat"])
@@ -407,15 +426,13 @@ class AssetManagementApp:
         # Responsive holdings table
         st.subheader("Top Holdings")
         st.markdown('<div class="dataframe-container">', unsafe_allow_html=True)
-        holdings_data = [
-            {
-                "Security": holding['name'],
-                "Weight (%)": holding['weight'],
-                "Value ($)": holding['value'],
-                "Gain ($)": holding['gain']
-            }
-            for holding in client_info['topHoldings']
-        ]
+        holdings = HoldingsTable.coerce(client_info['topHoldings'])
+        holdings_data = {
+            "Security": holdings.names,
+            "Weight (%)": holdings.weight,
+            "Value ($)": holdings.value,
+            "Gain ($)": holdings.gain
+        }
         st.dataframe(holdings_data, use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
@@ -439,8 +456,9 @@ class AssetManagementApp:
     def show_chat_interface(self, client_info):
         st.header("AI Assistant")
         
-        # Set current client context
-        self.chat_service.set_current_client(client_info)
+        # Identify this browser session so the shared ChatService keeps its context apart
+        if "chat_session_id" not in st.session_state:
+            st.session_state.chat_session_id = uuid.uuid4().hex
         
         # Initialize chat history for the current client
         client_id = client_info['clientInfo']['id']
@@ -463,7 +481,11 @@ class AssetManagementApp:
             
             # Process response
             with st.spinner("Analyzing..."):
-                response = asyncio.run(self.chat_service.process_message(prompt))
+                response = asyncio.run(self.chat_service.process_message(
+                    prompt,
+                    session_id=st.session_state.chat_session_id,
+                    client_data=client_info
+                ))
             
             # Add assistant response to history
             with st.chat_message("assistant"):
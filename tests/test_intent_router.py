@@ -0,0 +1,66 @@
+import copy
+import json
+from pathlib import Path
+
+import pytest
+
+from backend.services.intent_router import IntentRouter
+
+CLIENT = json.loads((Path(__file__).parent.parent / "data" / "clients.json").read_text())["clients"][0]
+
+
+@pytest.fixture
+def client():
+    return copy.deepcopy(CLIENT)
+
+
+@pytest.fixture
+def router():
+    return IntentRouter()
+
+
+@pytest.mark.parametrize("question", [
+    "5 year vs 3 year return",
+    "benchmark return YTD",
+    "total value at the start of the year",
+    "How did the 3 year return compare to the 5 year return?",
+    "What was the portfolio value as of 2023?",
+])
+def test_comparisons_benchmarks_and_other_dates_go_to_the_llm(router, client, question):
+    assert router.route(question, client) is None
+
+
+def test_fixed_income_is_not_income_earned(router, client):
+    intent, answer = router.route("What is the total value of fixed income?", client)
+    assert intent == "allocation_fixedIncome"
+    assert "$375,000.00" in answer
+    assert "$28,000.00" not in answer
+
+
+def test_asset_class_value_is_not_the_portfolio_total(router, client):
+    intent, answer = router.route("total value of equities", client)
+    assert intent == "allocation_equities"
+    assert "$687,500.00" in answer
+    assert "$1,250,000.00" not in answer
+
+
+def test_two_specific_intents_are_ambiguous(router, client):
+    assert router.route("What are the fees and contributions?", client) is None
+
+
+@pytest.mark.parametrize("question, intent", [
+    ("What is the total portfolio value?", "total_value"),
+    ("What is the 3 year return?", "performance_3year"),
+    ("What is the YTD return?", "performance_ytd"),
+    ("How much income was earned?", "summary_incomeEarned"),
+    ("What is the asset allocation?", "asset_allocation"),
+    ("What is the fixed income allocation?", "allocation_fixedIncome"),
+    ("What is the beginning balance?", "summary_beginningBalance"),
+    ("What is the risk profile?", "client_riskProfile"),
+])
+def test_single_intent_questions_are_answered(router, client, question, intent):
+    assert router.route(question, client)[0] == intent
+
+
+def test_questions_naming_a_holding_go_to_the_llm(router, client):
+    assert router.route("What is the value of AAPL?", client) is None
@@ -0,0 +1,27 @@
+import pytest
+
+from backend.database.usage_ledger import UsageLedger, call_cost
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = UsageLedger(str(tmp_path / "usage.sqlite3"))
+    yield ledger
+    ledger.close()
+
+
+@pytest.mark.parametrize("model, expected", [
+    ("gpt-4o-mini", 0.75),
+    ("gpt-4o-mini-2024-07-18", 0.75),  # Dated name: priced as gpt-4o-mini, not gpt-4o
+    ("gpt-4o-2024-08-06", 12.50),
+    ("gpt-4-turbo-2024-04-09", 40.00),
+    ("some-unknown-model", 40.00),     # The default price
+])
+def test_call_cost_prices_dated_model_names(model, expected):
+    assert call_cost(model, 1_000_000, 1_000_000) == pytest.approx(expected)
+
+
+def test_ledger_records_dated_model_at_its_price(ledger):
+    cost = ledger.record("gpt-4o-mini-2024-07-18", "chat", "C1001", 1_000_000, 1_000_000, latency_seconds=1.0)
+    assert cost == pytest.approx(0.75)
+    assert ledger.spend(0.0, "C1001") == pytest.approx(0.75)
@@ -0,0 +1,50 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from backend.config import Config
+from backend.database.embeddings import HashingEmbeddings
+from backend.database.vector_store import VectorStore
+
+BOOK = json.loads((Path(__file__).parent.parent / "data" / "clients.json").read_text())
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    """Hashing embeddings that count the embedding requests made"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = 0
+
+    def embed_documents(self, texts):
+        self.requests += 1
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.requests += 1
+        return super().embed_query(text)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "VECTOR_STORE_PATH", str(tmp_path / "vector_store"))
+    store = VectorStore(CountingEmbeddings())
+    store.initialize_from_json(BOOK)
+    store.embeddings.requests = 0
+    return store
+
+
+def test_search_many_embeds_the_batch_in_one_request(store):
+    queries = ["portfolio performance this year", "fixed income allocation", "account risk profile"]
+    results = store.search_many(queries, k=2)
+    assert store.embeddings.requests == 1
+    assert len(results) == len(queries)
+    assert all(results)
+
+
+def test_search_many_embeds_only_queries_without_vectors(store):
+    known = store.embeddings.embed_query("fixed income allocation")
+    store.embeddings.requests = 0
+    store.search_many(["portfolio performance this year", "fixed income allocation"], query_vectors=[None, known])
+    assert store.embeddings.requests == 1